@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+"""兼容入口，等同于 ``linovel bench-items``（实现见 linovel_crawler/tools/benchmark_items.py）"""
+
+import sys
+
+from linovel_crawler import cli
+
+if __name__ == '__main__':
+    sys.exit(cli.run('bench-items'))
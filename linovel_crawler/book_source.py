@@ -0,0 +1,67 @@
+"""
+批量 book_id 输入
+
+为详情/评论 Spider 提供惰性的 book_id 来源，避免拼接超长的 ``book_ids`` 参数
+或一次性把全部ID读入内存：
+
+- 文件：每行一个（也允许逗号分隔），忽略空行与 ``#`` 注释；``-`` 表示标准输入
+- 数据库：按 book_id 键集分页查询 novels 表，排除 crawl_status 中已完成的书籍
+"""
+
+import sys
+
+
+def iter_lines(path):
+    """逐行读取 book_id；path 为 ``-`` 时读取标准输入"""
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line in stream:
+            line = line.split('#', 1)[0]
+            for book_id in line.split(','):
+                book_id = book_id.strip()
+                if book_id:
+                    yield book_id
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def iter_pending(spider, status_type, batch_size=1000):
+    """分页查询尚未完成的书籍，每次只在内存中保留一页"""
+    from linovel_crawler.pipelines import DatabasePipeline
+
+    pipeline = DatabasePipeline()
+    try:
+        pipeline.open_spider(spider)
+    except Exception as e:
+        spider.logger.error(f"查询待处理书籍失败，无法连接数据库: {e}")
+        return
+    total = 0
+    try:
+        after = None
+        while True:
+            book_ids = pipeline.fetch_pending_book_ids(spider.name, status_type, after, batch_size)
+            if not book_ids:
+                break
+            total += len(book_ids)
+            yield from book_ids
+            after = book_ids[-1]
+    finally:
+        pipeline.close_spider(spider)
+        spider.logger.info(f"数据库待处理书籍: 共 {total} 本 ({spider.name}/{status_type})")
+
+
+def iter_book_ids(spider, query_pending):
+    """按 spider 参数选择来源：book_ids（逗号分隔）> book_source（db / 文件路径 / -）
+
+    ``query_pending`` 为 book_source=db 时调用的查询函数。未指定任何来源时返回 None。
+    """
+    book_ids = getattr(spider, 'book_ids', None)
+    if book_ids:
+        return (b.strip() for b in book_ids.split(',') if b.strip())
+    source = getattr(spider, 'book_source', None)
+    if not source:
+        return None
+    if source == 'db':
+        return query_pending()
+    return iter_lines(source)
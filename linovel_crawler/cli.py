@@ -0,0 +1,57 @@
+"""
+统一命令行入口 ``linovel``
+
+用法：``linovel <子命令> [参数...]``，``linovel <子命令> --help`` 查看各子命令的参数。
+
+这里只解析子命令名，再按需导入 linovel_crawler.tools 中对应的模块：
+状态查询类命令不会导入 Scrapy，爬虫相关依赖只在 crawl 等命令真正执行时加载。
+"""
+
+import importlib
+import sys
+
+# 子命令 -> (linovel_crawler.tools 下的模块, 说明)
+COMMANDS = {
+    'crawl': ('run_spiders', '运行爬虫（list / detail / comment / all / pool）'),
+    'stats': ('crawler_stats', '爬虫统计报告'),
+    'check-status': ('check_status', '检查 crawl_status 表'),
+    'check-data': ('check_data', '检查各业务表的数据量'),
+    'check-redis': ('check_redis', '检查 Redis 中的断点缓存'),
+    'reset': ('reset_data', '清理数据（破坏性操作）'),
+    'export': ('export_data', '导出为 Parquet / Arrow 文件'),
+    'maintain-comments': ('maintain_comments', '评论表分区与孤立数据维护'),
+    'bench-items': ('benchmark_items', '比较 scrapy.Item 与轻量 item 的内存占用'),
+}
+
+
+def usage():
+    width = max(len(name) for name in COMMANDS)
+    lines = ['用法: linovel <子命令> [参数...]', '', '子命令:']
+    lines += [f"  {name:<{width}}  {help_text}" for name, (_, help_text) in COMMANDS.items()]
+    lines += ['', '查看子命令参数: linovel <子命令> --help']
+    return '\n'.join(lines)
+
+
+def run(command, argv=None, prog=None):
+    """导入并执行子命令，返回退出码；根目录的兼容脚本也通过这里执行"""
+    module = importlib.import_module(f"linovel_crawler.tools.{COMMANDS[command][0]}")
+    try:
+        return module.main(argv, prog=prog) or 0
+    except KeyboardInterrupt:
+        print('\n已取消')
+        return 130
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"未知的子命令: {command}\n\n{usage()}", file=sys.stderr)
+        return 2
+    return run(command, args, prog=f"linovel {command}")
+
+if __name__ == '__main__':
+    sys.exit(main())
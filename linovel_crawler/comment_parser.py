@@ -2,18 +2,41 @@
 评论数据解析工具模块
 
 提供独立的评论解析功能，避免Spider间的直接耦合。
+
+每个 Spider 在 from_crawler 中创建一个 CommentParser 并在所有响应间复用（解析器只保存配置，
+不保存请求相关的状态）。翻页请求的回调是 Spider 自身的 ``parse_comments`` 方法而不是 lambda，
+因此请求可以序列化进 JOBDIR 的磁盘队列。
 """
 
 import json
 import scrapy
 from datetime import datetime
 
+from linovel_crawler.items import NovelCommentItem
+
+COMMENT_PAGE_SIZE = 15
+COMMENT_HEADERS = {
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
+    'X-Requested-With': 'XMLHttpRequest',
+}
+
 
 class CommentParser:
     """评论解析器"""
 
-    def __init__(self, base_url):
+    def __init__(self, base_url, item_cls=NovelCommentItem):
         self.base_url = base_url
+        self.item_cls = item_cls
+
+    def build_request(self, book_id, page, callback):
+        """评论API请求；callback 须为 Spider 的方法，才能序列化进磁盘队列"""
+        return scrapy.Request(
+            f"{self.base_url}/comment/items?type=book&tid={book_id}&pageSize={COMMENT_PAGE_SIZE}&page={page}",
+            callback=callback,
+            meta={'book_id': book_id, 'page': page},
+            headers=COMMENT_HEADERS,
+        )
 
     def parse_comments(self, response, spider):
         """
@@ -24,10 +47,8 @@ class CommentParser:
             spider: 调用该方法的Spider实例
 
         Yields:
-            NovelCommentItem: 评论数据项
+            NovelCommentItem 或 NovelCommentRecord: 评论数据项（由 item_cls 决定）
         """
-        from linovel_crawler.items import NovelCommentItem, CrawlStatusItem
-
         book_id = response.meta['book_id']
         page = response.meta['page']
 
@@ -45,38 +66,27 @@ class CommentParser:
             has_more_pages = False
 
             for comment_data in comments:
-                comment_item = NovelCommentItem()
-                comment_item['book_id'] = book_id
-                comment_item['comment_id'] = str(comment_data.get('id'))
-                comment_item['user_name'] = comment_data.get('author', {}).get('nick', '')
-                comment_item['content'] = comment_data.get('content', '').strip()
+                comment_id = str(comment_data.get('id'))
+                content = comment_data.get('content', '').strip()
+                if not (comment_id and content):
+                    continue
 
                 create_time = comment_data.get('date')
-                if create_time:
-                    comment_item['create_time'] = datetime.fromtimestamp(create_time)
-
-                comment_item['like_count'] = int(comment_data.get('like', 0))
-
-                if comment_item.get('comment_id') and comment_item.get('content'):
-                    yield comment_item
+                yield self.item_cls(
+                    book_id=book_id,
+                    comment_id=comment_id,
+                    user_name=comment_data.get('author', {}).get('nick', ''),
+                    content=content,
+                    create_time=datetime.fromtimestamp(create_time) if create_time else None,
+                    like_count=int(comment_data.get('like', 0)),
+                )
 
             total_comments = data.get('count', 0)
-            page_size = 15
-            max_pages = (total_comments + page_size - 1) // page_size
+            max_pages = (total_comments + COMMENT_PAGE_SIZE - 1) // COMMENT_PAGE_SIZE
 
             if page < max_pages:
                 has_more_pages = True
-                next_page = page + 1
-                yield scrapy.Request(
-                    f"{self.base_url}/comment/items?type=book&tid={book_id}&pageSize=15&page={next_page}",
-                    callback=lambda r: self.parse_comments(r, spider),
-                    meta={'book_id': book_id, 'page': next_page},
-                    headers={
-                        'Accept': 'application/json, text/javascript, */*; q=0.01',
-                        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
-                        'X-Requested-With': 'XMLHttpRequest',
-                    }
-                )
+                yield self.build_request(book_id, page + 1, spider.parse_comments)
 
             yield spider.update_crawl_status('novel_comment', 'comment_page', f"{book_id}_{page}", 'completed')
 
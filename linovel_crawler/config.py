@@ -0,0 +1,77 @@
+"""
+共享配置加载
+
+爬虫与命令行工具共用的 .env 读取、MySQL/Redis 连接参数与运行目录初始化。
+本模块只依赖标准库：python-dotenv、pymysql、redis 与 Scrapy 都在首次使用时才导入，
+状态查询等短命令不必为用不到的依赖付出导入开销。
+"""
+
+import os
+
+# 爬虫运行时需要的本地目录（日志、断点状态、作业目录）
+RUNTIME_DIRS = ('logs', 'storage/state', 'storage/jobs')
+
+_env_loaded = False
+
+
+def load_env(path=None):
+    """加载 .env 到环境变量（每个进程只加载一次，已存在的环境变量优先）"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    from dotenv import load_dotenv
+
+    load_dotenv(path)
+
+
+def mysql_config(database=True):
+    """MySQL 连接参数；database=False 时不指定库（用于建库/删库）"""
+    load_env()
+    config = {
+        'host': os.getenv('mysql_host'),
+        'port': int(os.getenv('mysql_port', 3306)),
+        'user': os.getenv('mysql_user'),
+        'password': os.getenv('mysql_password'),
+        'charset': 'utf8mb4'
+    }
+    if database:
+        config['database'] = os.getenv('mysql_database')
+    return config
+
+
+def redis_config():
+    """Redis 连接参数；密码与 ACL 用户名为空字符串时视为未设置"""
+    load_env()
+    return {
+        'host': os.getenv('redis_host', 'localhost'),
+        'port': int(os.getenv('redis_port', 6379)),
+        'password': os.getenv('redis_password') or None,
+        'username': os.getenv('redis_username') or None,
+    }
+
+
+def mysql_connect(database=True):
+    import pymysql
+
+    return pymysql.connect(**mysql_config(database))
+
+
+def redis_client(decode_responses=True, **kwargs):
+    import redis
+
+    return redis.Redis(**redis_config(), decode_responses=decode_responses, **kwargs)
+
+
+def project_settings():
+    """Scrapy 项目配置（导入 Scrapy，只在真正需要时调用）"""
+    load_env()
+    from scrapy.utils.project import get_project_settings
+
+    return get_project_settings()
+
+
+def ensure_runtime_dirs():
+    """创建爬虫运行时需要的本地目录（启动爬虫前调用，而不是在导入 settings 时）"""
+    for path in RUNTIME_DIRS:
+        os.makedirs(path, exist_ok=True)
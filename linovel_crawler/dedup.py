@@ -0,0 +1,303 @@
+"""
+请求去重集合后端
+
+为 DuplicateRequestFilterMiddleware 提供可配置的已见指纹集合：
+
+- ``memory``：进程内有界集合，超过上限按写入顺序淘汰最早的指纹。
+- ``disk``：在内存集合基础上把指纹追加写入 JOBDIR 下的二进制文件，
+  进程重启后自动恢复。
+- ``redis``：Redis SET（或 RedisBloom 布隆过滤器）存储，可在多个进程间共享，
+  本地保留一个有界的内存前置缓存以减少往返。
+
+所有后端的指纹均为 fingerprint 模块生成的无符号64位整数。
+"""
+
+import itertools
+import logging
+import os
+from array import array
+
+logger = logging.getLogger(__name__)
+
+_RECORD = 'Q'      # 无符号64位整数
+_MAX_KEY = (1 << 64) - 1
+
+
+class MemorySeenSet:
+    """有界内存指纹集合
+
+    dict 保持插入顺序，超过 ``max_entries`` 时一次淘汰最早写入的 10%，
+    避免每次插入都做淘汰。``max_entries <= 0`` 表示不限制。
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_entries=0):
+        self.max_entries = max_entries
+        self._seen = {}
+        self.hits = 0
+        self.added = 0
+        self.evicted = 0
+
+    def open(self, spider):
+        pass
+
+    def close(self, spider):
+        pass
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, key):
+        return key in self._seen
+
+    def add(self, key):
+        """记录指纹；新指纹返回 True，已见过返回 False"""
+        seen = self._seen
+        if key in seen:
+            self.hits += 1
+            return False
+        if self.max_entries > 0 and len(seen) >= self.max_entries:
+            self._evict()
+        seen[key] = None
+        self.added += 1
+        return True
+
+    def _evict(self):
+        count = max(1, self.max_entries // 10)
+        seen = self._seen
+        for stale in list(itertools.islice(seen, count)):
+            del seen[stale]
+        self.evicted += count
+
+    def stats(self):
+        return {
+            'size': len(self._seen),
+            'hits': self.hits,
+            'added': self.added,
+            'evicted': self.evicted,
+        }
+
+
+class DiskSeenSet(MemorySeenSet):
+    """基于本地文件持久化的指纹集合
+
+    新指纹先写入内存缓冲，每 ``flush_every`` 条追加到文件；启动时从文件
+    尾部恢复最多 ``max_entries`` 条。关闭时如有淘汰或重复记录则整体压缩重写。
+    """
+
+    name = 'disk'
+
+    def __init__(self, path=None, max_entries=0, flush_every=1000):
+        super().__init__(max_entries)
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self._pending = array(_RECORD)
+        self._file_records = 0
+
+    def open(self, spider):
+        if not self.path:
+            jobdir = spider.crawler.settings.get('JOBDIR')
+            base = jobdir or os.path.join('storage', 'state')
+            filename = 'dedup_seen.bin' if jobdir else f'{spider.name}_dedup_seen.bin'
+            self.path = os.path.join(base, filename)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._load()
+        spider.logger.info(f"DiskSeenSet: 从 {self.path} 恢复 {len(self._seen)} 个指纹")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        keys = array(_RECORD)
+        try:
+            size = os.path.getsize(self.path)
+            usable = size - size % keys.itemsize
+            with open(self.path, 'rb') as f:
+                keys.fromfile(f, usable // keys.itemsize)
+        except (OSError, EOFError) as e:
+            logger.warning(f"读取去重文件失败，忽略: {self.path} - {e}")
+            return
+        self._file_records = len(keys)
+        if self.max_entries > 0 and len(keys) > self.max_entries:
+            # 只恢复最近写入的部分，较早的视为已淘汰
+            self.evicted += len(keys) - self.max_entries
+            keys = keys[-self.max_entries:]
+        self._seen = dict.fromkeys(keys)
+
+    def add(self, key):
+        if not super().add(key):
+            return False
+        if key <= _MAX_KEY:
+            self._pending.append(key)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+        return True
+
+    def flush(self):
+        if not self._pending:
+            return
+        try:
+            with open(self.path, 'ab') as f:
+                self._pending.tofile(f)
+            self._file_records += len(self._pending)
+        except OSError as e:
+            logger.warning(f"写入去重文件失败: {self.path} - {e}")
+        del self._pending[:]
+
+    def close(self, spider):
+        self.flush()
+        if self._file_records > len(self._seen):
+            self._compact()
+
+    def _compact(self):
+        """用当前内存集合原子重写文件，丢弃已淘汰的记录"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                array(_RECORD, (k for k in self._seen if k <= _MAX_KEY)).tofile(f)
+            os.replace(tmp_path, self.path)
+            self._file_records = len(self._seen)
+        except OSError as e:
+            logger.warning(f"压缩去重文件失败: {self.path} - {e}")
+
+
+class RedisSeenSet:
+    """Redis 共享指纹集合
+
+    默认使用 ``SADD`` 的返回值原子地完成“检查并记录”；开启 ``bloom`` 时改用
+    RedisBloom 的 ``BF.ADD``，内存占用更低但存在极小的误判（新请求被当作重复）。
+    本地前置缓存只记录已确认见过的指纹，Redis 不可用时退化为纯本地判断。
+    """
+
+    name = 'redis'
+
+    def __init__(self, client=None, key_prefix='dedup', bloom=False, ttl=0, local_max_entries=100000):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.bloom = bloom
+        self.ttl = ttl
+        self.key = None
+        self.local = MemorySeenSet(local_max_entries)
+        self.remote_hits = 0
+        self.errors = 0
+
+    def open(self, spider):
+        self.key = f"{self.key_prefix}:{'bf' if self.bloom else 'set'}:{spider.name}"
+        if self.client is None:
+            self.client = _redis_client_from_env()
+        try:
+            self.client.ping()
+            spider.logger.info(f"RedisSeenSet: 使用 {self.key}")
+        except Exception as e:
+            spider.logger.warning(f"RedisSeenSet: Redis不可用，退化为本地去重: {e}")
+            self.client = None
+
+    def close(self, spider):
+        if self.client is not None:
+            try:
+                if self.ttl > 0:
+                    # 集合在首次写入后才存在，关闭时再刷新一次过期时间
+                    self.client.expire(self.key, self.ttl)
+                self.client.close()
+            except Exception:
+                pass
+
+    def __len__(self):
+        if self.client is not None:
+            try:
+                if not self.bloom:
+                    return self.client.scard(self.key)
+            except Exception:
+                pass
+        return len(self.local)
+
+    def __contains__(self, key):
+        return key in self.local
+
+    def add(self, key):
+        if key in self.local:
+            self.local.hits += 1
+            return False
+        if self.client is None:
+            return self.local.add(key)
+        try:
+            if self.bloom:
+                added = self.client.execute_command('BF.ADD', self.key, key)
+            else:
+                added = self.client.sadd(self.key, key)
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"Redis去重失败，按本地判断: {e}")
+            return self.local.add(key)
+        self.local.add(key)
+        if not added:
+            self.remote_hits += 1
+            return False
+        return True
+
+    def stats(self):
+        stats = self.local.stats()
+        stats['remote_hits'] = self.remote_hits
+        stats['errors'] = self.errors
+        return stats
+
+
+def prune_file(path, predicate):
+    """从 DiskSeenSet 的去重文件中删除满足条件的指纹（选择性重置用），返回删除数量"""
+    keys = array(_RECORD)
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        keys.fromfile(f, (size - size % keys.itemsize) // keys.itemsize)
+    kept = array(_RECORD, (key for key in keys if not predicate(key)))
+    removed = len(keys) - len(kept)
+    if removed:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            kept.tofile(f)
+        os.replace(tmp_path, path)
+    return removed
+
+
+def prune_redis_set(client, key, predicate, batch_size=1000):
+    """增量 SSCAN RedisSeenSet 的集合，按批 SREM 满足条件的指纹，返回删除数量
+
+    布隆过滤器（``dedup:bf:*``）无法删除单个成员，不在此处理。
+    """
+    removed = 0
+    doomed = []
+    for member in client.sscan_iter(key, count=batch_size):
+        if predicate(int(member)):
+            doomed.append(member)
+            if len(doomed) >= batch_size:
+                removed += client.srem(key, *doomed)
+                doomed = []
+    if doomed:
+        removed += client.srem(key, *doomed)
+    return removed
+
+
+def _redis_client_from_env():
+    from linovel_crawler import config
+
+    return config.redis_client()
+
+
+def build_seen_set(settings):
+    """根据 DEDUP_* 配置创建去重集合"""
+    backend = (settings.get('DEDUP_BACKEND') or 'memory').lower()
+    max_entries = settings.getint('DEDUP_MAX_ENTRIES', 0)
+    if backend == 'memory':
+        return MemorySeenSet(max_entries)
+    if backend == 'disk':
+        return DiskSeenSet(
+            path=settings.get('DEDUP_DISK_PATH'),
+            max_entries=max_entries,
+            flush_every=settings.getint('DEDUP_FLUSH_EVERY', 1000),
+        )
+    if backend == 'redis':
+        return RedisSeenSet(
+            bloom=settings.getbool('DEDUP_REDIS_BLOOM', False),
+            ttl=settings.getint('DEDUP_REDIS_TTL', 0),
+            local_max_entries=max_entries or 100000,
+        )
+    raise ValueError(f"未知的 DEDUP_BACKEND: {backend}")
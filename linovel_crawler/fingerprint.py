@@ -0,0 +1,188 @@
+"""
+请求指纹模块
+
+为列表页、详情页和评论API提供预编译的URL路由，把请求映射为紧凑的整数键，
+供 ResumeCrawlerMiddleware 与 DuplicateRequestFilterMiddleware 共用。
+
+整数键布局（低位在右）::
+
+    | primary (book_id 或列表页码) | secondary (评论页码, 24位) | kind (2位) |
+
+其他URL使用62位摘要加 kind，因此所有键都能以无符号64位整数持久化。
+
+同一个键既能在内存集合中做去重/跳过判断，也能与 crawl_status 的
+``(spider_name, status_type, identifier)`` 三元组互相转换。
+"""
+
+import hashlib
+import re
+from typing import Iterable, Iterator, Optional, Tuple
+
+KIND_LIST = 0      # 列表页：primary=页码
+KIND_DETAIL = 1    # 详情页：primary=book_id
+KIND_COMMENT = 2   # 评论API：primary=book_id, secondary=页码
+KIND_OTHER = 3     # 其他URL：primary=URL摘要
+
+_KIND_BITS = 2
+_KIND_MASK = (1 << _KIND_BITS) - 1
+_SECONDARY_BITS = 24
+_SECONDARY_MASK = (1 << _SECONDARY_BITS) - 1
+
+_LIST_RE = re.compile(r'/cat/-1\.html\?(?:[^#]*&)?page=(\d+)')
+_DETAIL_RE = re.compile(r'/book/(\d+)\.html(?:[?#]|$)')
+_COMMENT_PATH = '/comment/items?'
+_COMMENT_TYPE_RE = re.compile(r'[?&]type=book(?:&|$)')
+_COMMENT_TID_RE = re.compile(r'[?&]tid=(\d+)')
+_COMMENT_PAGE_RE = re.compile(r'[?&]page=(\d+)')
+_CHAPTER_RE = re.compile(r'/book/\d+/(\d+)\.html(?:[?#]|$)')
+
+# kind -> (spider_name, status_type)，与各 Spider 写入 crawl_status 的取值一致
+STATUS_TYPES = {
+    KIND_LIST: ('novel_list', 'list_page'),
+    KIND_DETAIL: ('novel_detail', 'detail_page'),
+    KIND_COMMENT: ('novel_comment', 'comment_page'),
+}
+_STATUS_KINDS = {v: k for k, v in STATUS_TYPES.items()}
+_STATUS_PREFIX = 'crawl_status:'
+
+
+def pack(kind: int, primary: int, secondary: int = 0) -> int:
+    """把 (kind, primary, secondary) 打包为单个整数键"""
+    return (((primary << _SECONDARY_BITS) | secondary) << _KIND_BITS) | kind
+
+
+def unpack(key: int) -> Tuple[int, int, int]:
+    """整数键还原为 (kind, primary, secondary)"""
+    kind = key & _KIND_MASK
+    rest = key >> _KIND_BITS
+    return kind, rest >> _SECONDARY_BITS, rest & _SECONDARY_MASK
+
+
+def route(url: str) -> Optional[Tuple[int, int, int]]:
+    """识别业务URL，返回 (kind, primary, secondary)；无法识别时返回 None"""
+    if _COMMENT_PATH in url:
+        if not _COMMENT_TYPE_RE.search(url):
+            return None
+        tid = _COMMENT_TID_RE.search(url)
+        if not tid:
+            return None
+        page = _COMMENT_PAGE_RE.search(url)
+        return KIND_COMMENT, int(tid.group(1)), int(page.group(1)) if page else 1
+
+    match = _DETAIL_RE.search(url)
+    if match:
+        return KIND_DETAIL, int(match.group(1)), 0
+
+    match = _LIST_RE.search(url)
+    if match:
+        return KIND_LIST, int(match.group(1)), 0
+    return None
+
+
+def request_key(url: str) -> Optional[int]:
+    """业务URL的整数键；无法识别时返回 None"""
+    routed = route(url)
+    if routed is None:
+        return None
+    kind, primary, secondary = routed
+    if secondary > _SECONDARY_MASK:
+        return None
+    return pack(kind, primary, secondary)
+
+
+def url_key(url: str) -> int:
+    """任意URL的稳定整数键（62位摘要 + kind），跨进程/重启保持一致且不超过64位"""
+    digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+    return ((int.from_bytes(digest, 'big') >> _KIND_BITS) << _KIND_BITS) | KIND_OTHER
+
+
+def chapter_id(url: str) -> int:
+    """章节URL（``/book/<book_id>/<chapter_id>.html``）中的数字章节ID
+
+    无法识别的URL返回摘要键的相反数（62位，落在 BIGINT 范围内且不会与真实ID冲突），
+    保证 ``(book_id, chapter_id)`` 对任意章节URL都稳定唯一。
+    """
+    match = _CHAPTER_RE.search(url)
+    if match:
+        return int(match.group(1))
+    return -(url_key(url) >> _KIND_BITS)
+
+
+def item_key(*parts) -> int:
+    """任意字段组合的稳定64位摘要键，用于 item 级去重"""
+    data = '\x1f'.join(str(part) for part in parts).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def request_fingerprint(url: str) -> int:
+    """去重指纹：业务URL使用路由键，其余URL使用摘要键"""
+    key = request_key(url)
+    return key if key is not None else url_key(url)
+
+
+def status_parts(key: int) -> Optional[Tuple[str, str, str]]:
+    """整数键转换为 crawl_status 的 (spider_name, status_type, identifier)"""
+    kind, primary, secondary = unpack(key)
+    names = STATUS_TYPES.get(kind)
+    if names is None:
+        return None
+    identifier = f"{primary}_{secondary}" if kind == KIND_COMMENT else str(primary)
+    return names[0], names[1], identifier
+
+
+def from_status_parts(spider_name: str, status_type: str, identifier) -> Optional[int]:
+    """crawl_status 三元组转换为整数键；非请求级状态（如 book_comments）返回 None"""
+    kind = _STATUS_KINDS.get((spider_name, status_type))
+    if kind is None:
+        return None
+    try:
+        identifier = str(identifier)
+        if kind == KIND_COMMENT:
+            book_id, _, page = identifier.partition('_')
+            page = int(page)
+            if page > _SECONDARY_MASK:
+                return None
+            return pack(kind, int(book_id), page)
+        return pack(kind, int(identifier))
+    except ValueError:
+        return None
+
+
+def status_book_id(status_type: str, identifier) -> Optional[int]:
+    """crawl_status 标识中的 book_id（评论页为 ``<book_id>_<页码>``）；列表页等与书籍无关的状态返回 None"""
+    if status_type == STATUS_TYPES[KIND_LIST][1]:
+        return None
+    head = str(identifier).partition('_')[0]
+    return int(head) if head.isdigit() else None
+
+
+def status_key(key: int) -> Optional[str]:
+    """整数键转换为 Redis/本地状态文件使用的字符串键"""
+    parts = status_parts(key)
+    if parts is None:
+        return None
+    return f"{_STATUS_PREFIX}{parts[0]}:{parts[1]}:{parts[2]}"
+
+
+def from_status_key(cache_key: str) -> Optional[int]:
+    """``crawl_status:<spider>:<type>:<identifier>`` 字符串转换为整数键"""
+    parts = split_status_key(cache_key)
+    if parts is None:
+        return None
+    return from_status_parts(*parts)
+
+
+def split_status_key(cache_key: str) -> Optional[Tuple[str, str, str]]:
+    """``crawl_status:<spider>:<type>:<identifier>`` 字符串拆分为三元组，格式不符时返回 None"""
+    if not cache_key.startswith(_STATUS_PREFIX):
+        return None
+    parts = cache_key[len(_STATUS_PREFIX):].split(':', 2)
+    return tuple(parts) if len(parts) == 3 else None
+
+
+def keys_from_status(cache_keys: Iterable[str]) -> Iterator[int]:
+    """批量转换字符串键，忽略无法识别的条目"""
+    for cache_key in cache_keys:
+        key = from_status_key(cache_key)
+        if key is not None:
+            yield key
@@ -0,0 +1,33 @@
+"""
+调度容量辅助工具
+
+供 Spider 在异步 start() 中按调度器容量逐步生成请求（背压），
+兼容 Scrapy 2.13 前后 engine.slot / engine._slot 的命名差异。
+"""
+
+
+def pending_requests(crawler):
+    """调度器中排队与正在处理的请求总数"""
+    engine = crawler.engine
+    slot = getattr(engine, '_slot', None) or getattr(engine, 'slot', None)
+    if slot is None:
+        return 0
+    return len(slot.scheduler) + len(slot.inprogress)
+
+
+async def sleep(seconds):
+    """在 Twisted reactor 上异步等待，可用于 async start()"""
+    from twisted.internet import reactor, task
+    from scrapy.utils.defer import maybe_deferred_to_future
+
+    await maybe_deferred_to_future(task.deferLater(reactor, seconds, lambda: None))
+
+
+async def wait_for_capacity(crawler):
+    """待处理请求达到 FRONTIER_MAX_PENDING 时等待；未启用（<=0）时立即返回"""
+    high_water = crawler.settings.getint('FRONTIER_MAX_PENDING', 0)
+    if high_water <= 0:
+        return
+    poll_interval = crawler.settings.getfloat('FRONTIER_POLL_INTERVAL', 1.0)
+    while pending_requests(crawler) >= high_water:
+        await sleep(poll_interval)
@@ -3,6 +3,10 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
 import scrapy
 
 
@@ -36,6 +40,8 @@ class NovelChapterItem(scrapy.Item):
     """小说章节信息"""
     book_id = scrapy.Field()  # 小说ID
     volume_index = scrapy.Field()  # 所属卷序号
+    chapter_id = scrapy.Field()  # 章节ID（取自章节URL）
+    chapter_index = scrapy.Field()  # 章节在全书中的顺序（从1开始）
     chapter_url = scrapy.Field()  # 章节URL
     chapter_title = scrapy.Field()  # 章节标题
 
@@ -50,6 +56,18 @@ class NovelCommentItem(scrapy.Item):
     like_count = scrapy.Field()  # 点赞数
 
 
+# NovelChapterBatchItem 中卷/章节的列名（book_id 在批次上只存一份）
+VOLUME_BATCH_FIELDS = ('volume_index', 'volume_title', 'volume_word_count', 'volume_desc')
+CHAPTER_BATCH_FIELDS = ('volume_index', 'chapter_id', 'chapter_index', 'chapter_url', 'chapter_title')
+
+
+class NovelChapterBatchItem(scrapy.Item):
+    """一本书的全部卷与章节（列式），由 CHAPTER_BATCH_ITEMS 启用"""
+    book_id = scrapy.Field()  # 小说ID
+    volumes = scrapy.Field()  # {列名: 值列表}，列见 VOLUME_BATCH_FIELDS
+    chapters = scrapy.Field()  # {列名: 值列表}，列见 CHAPTER_BATCH_FIELDS
+
+
 class CrawlStatusItem(scrapy.Item):
     """爬取状态信息"""
     spider_name = scrapy.Field()  # Spider名称
@@ -58,3 +76,75 @@ class CrawlStatusItem(scrapy.Item):
     status = scrapy.Field()  # 状态 (pending, processing, completed, failed)
     last_update = scrapy.Field()  # 最后更新时间
     retry_count = scrapy.Field()  # 重试次数
+
+
+class _Record:
+    """轻量 item 基类
+
+    子类为显式声明 ``__slots__`` 的 dataclass：每个实例只有固定的槽位，没有
+    ``scrapy.Item`` 内部的 dict 与 ``__dict__``（6个字段时约80字节，scrapy.Item 约500字节，
+    见 benchmark_items.py）。
+    itemadapter 原生支持 dataclass，Feed 导出与 SinkFanoutPipeline 无需改动；
+    另外提供与 ``scrapy.Item`` 一致的 ``get`` / 下标读取，pipeline 可以同样方式访问字段。
+    所有字段都须在构造时传入（Python 3.8 的 dataclass 不支持带默认值的 ``__slots__``）。
+    """
+
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+
+@dataclass
+class NovelChapterRecord(_Record):
+    """小说章节信息（轻量版，字段同 NovelChapterItem）"""
+    __slots__ = ('book_id', 'volume_index', 'chapter_id', 'chapter_index', 'chapter_url', 'chapter_title')
+    book_id: str
+    volume_index: int
+    chapter_id: int
+    chapter_index: int
+    chapter_url: str
+    chapter_title: str
+
+
+@dataclass
+class NovelCommentRecord(_Record):
+    """小说评论信息（轻量版，字段同 NovelCommentItem）"""
+    __slots__ = ('book_id', 'comment_id', 'user_name', 'content', 'create_time', 'like_count')
+    book_id: str
+    comment_id: str
+    user_name: str
+    content: str
+    create_time: Optional[datetime]
+    like_count: int
+
+
+def chapter_item_class(settings):
+    """按 LIGHTWEIGHT_ITEMS 选择章节 item 类"""
+    return NovelChapterRecord if settings.getbool('LIGHTWEIGHT_ITEMS', False) else NovelChapterItem
+
+
+def comment_item_class(settings):
+    """按 LIGHTWEIGHT_ITEMS 选择评论 item 类"""
+    return NovelCommentRecord if settings.getbool('LIGHTWEIGHT_ITEMS', False) else NovelCommentItem
+
+
+def chapter_batch(book_id, parsed):
+    """把 parse_chapters 产出的卷/章节 item 收集为一个 NovelChapterBatchItem
+
+    整本书的卷和章节只以一个 item 经过 Spider 中间件与 item pipeline；没有任何卷和章节时不产出。
+    """
+    volumes = {name: [] for name in VOLUME_BATCH_FIELDS}
+    chapters = {name: [] for name in CHAPTER_BATCH_FIELDS}
+    for item in parsed:
+        columns = volumes if isinstance(item, NovelVolumeItem) else chapters
+        for name, values in columns.items():
+            values.append(item.get(name))
+    if volumes['volume_index'] or chapters['chapter_id']:
+        yield NovelChapterBatchItem(book_id=book_id, volumes=volumes, chapters=chapters)
@@ -4,12 +4,16 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals, Request
-from scrapy.exceptions import IgnoreRequest
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from collections import Counter
 import os
+import time
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from linovel_crawler import fingerprint, redis_status
+
 
 class ResumeCrawlerMiddleware:
     """断点续爬中间件
@@ -18,19 +22,47 @@ class ResumeCrawlerMiddleware:
     - 预加载已完成状态到内存集合，作为Redis不可用时的本地快速判断。
     - 通过本地文件存储（LocalStateStore）在无DB/Redis时也能跨运行跳过已完成任务。
     - 修正原先未使用的 pipelines 字段逻辑，按 spider 维护独立的 pipeline 和状态。
+    - 分层跳过检查：内存 -> 负缓存 -> Redis（完成位图与 url_cache 合并为一次往返），
+      并统计各层命中次数；Redis 键布局见 redis_status 模块。
+    - 启动时流式批量加载失败/重试状态到内存并随失败状态项实时更新，
+      跳过检查中不再逐请求查询数据库。
+    - 内存中的状态键统一使用 fingerprint 模块的整数键，仅在访问
+      本地状态文件时才转换为 ``crawl_status:...`` 字符串。
     """
 
-    def __init__(self):
+    # 分层检查的各层名称，用于命中统计
+    TIERS = ('retry', 'memory', 'negative', 'redis', 'url_cache', 'miss')
+
+    def __init__(self, negative_ttl=300, negative_max_size=100000, redis_lookup=True,
+                 max_retry=3, preload_batch_size=5000):
         # 每个 spider 维护独立的 pipeline、内存完成集和本地状态存储
         self.pipelines = {}
-        self.completed_map = {}  # spider.name -> set(keys)
+        self.completed_map = {}  # spider.name -> set(int keys)
         self.local_state = {}    # spider.name -> LocalStateStore
         # 达到重试上限而需要跳过的键集合（仅内存，按 spider 隔离）
         self.retry_skip_map = {}
+        # 未达上限的失败键 -> 重试次数（与 crawl_status.retry_count 保持一致）
+        self.failure_counts = {}  # spider.name -> dict(key -> retry_count)
+        self.max_retry = max_retry
+        self.preload_batch_size = preload_batch_size
+        # 负缓存：已确认未完成的键 -> 过期时间戳，避免重复查询 Redis/DB
+        self.negative_cache = {}  # spider.name -> dict(key -> expire_at)
+        self.negative_ttl = negative_ttl
+        self.negative_max_size = negative_max_size
+        self.redis_lookup = redis_lookup
+        # 各层命中计数
+        self.tier_stats = {}     # spider.name -> Counter
 
     @classmethod
     def from_crawler(cls, crawler):
-        s = cls()
+        settings = crawler.settings
+        s = cls(
+            negative_ttl=settings.getfloat('RESUME_NEGATIVE_CACHE_TTL', 300),
+            negative_max_size=settings.getint('RESUME_NEGATIVE_CACHE_SIZE', 100000),
+            redis_lookup=settings.getbool('RESUME_REDIS_LOOKUP', True),
+            max_retry=settings.getint('RESUME_MAX_RETRY_COUNT', 3),
+            preload_batch_size=settings.getint('RESUME_PRELOAD_BATCH_SIZE', 5000),
+        )
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
         return s
@@ -40,11 +72,13 @@ class ResumeCrawlerMiddleware:
         # 初始化本地状态存储
         try:
             from linovel_crawler.state_store import LocalStateStore
-            state_path = os.path.join('storage', 'state', f'{spider.name}_status.json')
+            state_path = spider.crawler.settings.get(
+                'RESUME_STATE_PATH', os.path.join('storage', 'state', '{spider}_status.json')
+            ).format(spider=spider.name)
             store = LocalStateStore(state_path)
             store.load()
             self.local_state[spider.name] = store
-            self.completed_map[spider.name] = store.snapshot()
+            self.completed_map[spider.name] = set(fingerprint.keys_from_status(store.snapshot()))
             spider.logger.info(f"ResumeCrawlerMiddleware: 已加载本地状态 {len(self.completed_map[spider.name])} 条")
         except Exception as e:
             spider.logger.warning(f"ResumeCrawlerMiddleware: 加载本地状态失败: {e}")
@@ -74,16 +108,16 @@ class ResumeCrawlerMiddleware:
                 # 写入内存集合
                 keys = []
                 for record_spider, status_type, identifier in completed_status:
-                    cache_key = f"crawl_status:{record_spider}:{status_type}:{identifier}"
-                    mem_set.add(cache_key)
-                    keys.append(cache_key)
+                    keys.append(f"crawl_status:{record_spider}:{status_type}:{identifier}")
+                    key = fingerprint.from_status_parts(record_spider, status_type, identifier)
+                    if key is not None:
+                        mem_set.add(key)
                 self.completed_map[spider.name] = mem_set
 
-                # 尝试写入Redis（可选）
+                # 尝试写入Redis（可选），按批管道写入完成位图并更新计数
                 try:
                     if pipeline.redis_client:
-                        for k in keys:
-                            pipeline.redis_client.set(k, "completed", ex=86400)
+                        redis_status.cache_completed(pipeline.redis_client, completed_status)
                 except Exception as cache_error:
                     spider.logger.warning(f"ResumeCrawlerMiddleware: 写入Redis缓存失败: {cache_error}")
 
@@ -100,16 +134,77 @@ class ResumeCrawlerMiddleware:
         except Exception as e:
             spider.logger.warning(f"ResumeCrawlerMiddleware: 预加载状态查询失败: {e}")
 
+        # 流式批量加载失败/重试状态，跳过检查中不再逐请求查询数据库
+        try:
+            pipeline._execute_with_lock(lambda: self._load_failure_state(pipeline, spider))
+            spider.logger.info(
+                f"ResumeCrawlerMiddleware: 预加载失败状态，已达重试上限 "
+                f"{len(self.retry_skip_map.get(spider.name, ()))} 个，未达上限 "
+                f"{len(self.failure_counts.get(spider.name, ()))} 个"
+            )
+        except Exception as e:
+            spider.logger.warning(f"ResumeCrawlerMiddleware: 预加载失败状态查询失败: {e}")
+
     def _query_completed_status(self, pipeline):
-        """查询数据库中的所有完成状态"""
+        """查询数据库中的完成状态
+
+        只取能转换为请求键的状态类型，走 (status, spider_name, status_type, identifier)
+        覆盖索引，不回表。
+        """
+        status_types = sorted({status_type for _, status_type in fingerprint.STATUS_TYPES.values()})
         cursor = pipeline.connection.cursor()
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT spider_name, status_type, identifier
             FROM crawl_status
-            WHERE status = 'completed'
-        """)
+            WHERE status = 'completed' AND status_type IN ({', '.join(['%s'] * len(status_types))})
+        """, status_types)
         return cursor.fetchall()
 
+    def _load_failure_state(self, pipeline, spider):
+        """使用服务端游标分批读取失败状态：达到上限的进入重试跳过集，其余记录重试次数"""
+        retry_set = self.retry_skip_map.setdefault(spider.name, set())
+        counts = self.failure_counts.setdefault(spider.name, {})
+        cursor = pipeline.backend.stream_cursor()
+        try:
+            cursor.execute("""
+                SELECT spider_name, status_type, identifier, retry_count
+                FROM crawl_status
+                WHERE status = 'failed'
+            """)
+            while True:
+                rows = cursor.fetchmany(self.preload_batch_size)
+                if not rows:
+                    break
+                for record_spider, status_type, identifier, retry_count in rows:
+                    key = fingerprint.from_status_parts(record_spider, status_type, identifier)
+                    if key is None:
+                        continue
+                    if retry_count >= self.max_retry:
+                        retry_set.add(key)
+                    else:
+                        counts[key] = retry_count
+        finally:
+            cursor.close()
+
+    def _record_status(self, spider, key, status, retry_count):
+        """按 DatabasePipeline.save_crawl_status 的计数规则同步内存中的重试状态"""
+        counts = self.failure_counts.get(spider.name)
+        if status == 'failed':
+            if counts is None:
+                counts = self.failure_counts[spider.name] = {}
+            count = counts.pop(key, 0) + 1
+            if count >= self.max_retry:
+                self.retry_skip_map.setdefault(spider.name, set()).add(key)
+                spider.logger.info(f"键已达重试上限，后续请求将跳过: {fingerprint.status_key(key)} (retry={count}, max={self.max_retry})")
+            else:
+                counts[key] = count
+        elif counts:
+            # 非失败状态会把 retry_count 覆盖为状态项自带的值（通常为0）
+            if retry_count:
+                counts[key] = retry_count
+            else:
+                counts.pop(key, None)
+
     def spider_closed(self, spider):
         """Spider关闭时持久化本地状态并清理资源"""
         try:
@@ -118,11 +213,14 @@ class ResumeCrawlerMiddleware:
                 # 将内存中的完成集落盘
                 mem = self.completed_map.get(spider.name)
                 if mem is not None:
-                    store.extend_completed(mem)
+                    store.extend_completed(fingerprint.status_key(k) for k in mem)
                 store.save()
         except Exception as e:
             spider.logger.warning(f"ResumeCrawlerMiddleware: 关闭时保存本地状态失败: {e}")
 
+        self._report_tier_stats(spider)
+        self.negative_cache.pop(spider.name, None)
+
         # 关闭并清理pipeline
         pipeline = self.pipelines.pop(spider.name, None)
         if pipeline:
@@ -143,8 +241,22 @@ class ResumeCrawlerMiddleware:
             if item_name == 'CrawlStatusItem':
                 try:
                     status = item_or_request.get('status')
+                    key = fingerprint.from_status_parts(
+                        item_or_request.get('spider_name'),
+                        item_or_request.get('status_type'),
+                        item_or_request.get('identifier'),
+                    )
+                    if key is None:
+                        # 书籍级等非请求状态不参与跳过判断
+                        status = None
+                    else:
+                        self._record_status(spider, key, status, item_or_request.get('retry_count', 0))
+                    if status in ('completed', 'failed'):
+                        # 状态已变化，负缓存中的旧结论失效
+                        neg = self.negative_cache.get(spider.name)
+                        if neg:
+                            neg.pop(key, None)
                     if status == 'completed':
-                        key = f"crawl_status:{item_or_request.get('spider_name')}:{item_or_request.get('status_type')}:{item_or_request.get('identifier')}"
                         # 更新内存集合
                         mem = self.completed_map.get(spider.name)
                         if mem is not None:
@@ -173,115 +285,113 @@ class ResumeCrawlerMiddleware:
             yield item_or_request
 
     def should_skip_request(self, request, spider):
-        """判断是否应该跳过请求：优先检查内存/本地状态，随后可用则检查Redis。"""
+        """判断是否应该跳过请求。
+
+        按代价从低到高分层检查：重试上限集 -> 内存完成集 -> 负缓存 ->
+        Redis（完成状态与 url_cache 一次往返）。重试上限集在启动时批量加载
+        并随失败状态实时更新，因此不再逐请求查询数据库。
+        确认未完成的键写入带 TTL 的负缓存，新请求的重复检查几乎零成本。
+        ``meta['resume_dont_skip']`` 为真的请求（如总页数探测）始终放行。
+        """
         try:
+            if request.meta.get('resume_dont_skip'):
+                return False
             url = request.url
+            stats = self.tier_stats.get(spider.name)
+            if stats is None:
+                stats = self.tier_stats[spider.name] = Counter()
 
-            # 计算与该请求对应的完成状态键
-            cache_key = self._get_cache_key(url, spider)
+            # 计算与该请求对应的完成状态键（整数）
+            cache_key = fingerprint.request_key(url)
 
-            # 0) 重试上限跳过集（仅内存）
-            if cache_key:
+            if cache_key is not None:
+                # 0) 重试上限跳过集（仅内存）
                 retry_set = self.retry_skip_map.get(spider.name)
                 if retry_set and cache_key in retry_set:
+                    stats['retry'] += 1
                     return True
 
-            # 1) 先查内存集合（最快速、无需外部依赖）
-            if cache_key:
+                # 1) 内存完成集（启动时已合并本地状态文件与数据库预加载结果）
                 mem = self.completed_map.get(spider.name)
                 if mem and cache_key in mem:
+                    stats['memory'] += 1
                     return True
 
-                # 2) 再查本地存储（如果尚未在内存中）
-                store = self.local_state.get(spider.name)
-                if store and store.is_completed(cache_key):
-                    # 同步回内存，加速后续判断
-                    mem = self.completed_map.setdefault(spider.name, set())
-                    mem.add(cache_key)
-                    return True
+                # 2) 负缓存：TTL 内已确认未完成的键直接放行
+                neg = self.negative_cache.get(spider.name)
+                if neg:
+                    expire_at = neg.get(cache_key)
+                    if expire_at is not None:
+                        if expire_at > time.monotonic():
+                            stats['negative'] += 1
+                            return False
+                        del neg[cache_key]
 
-            # 3) 可选：如果Redis可用，检查Redis缓存
             pipeline = self.pipelines.get(spider.name)
-            if cache_key and pipeline and getattr(pipeline, 'redis_client', None):
-                try:
-                    cached_status = pipeline.redis_client.get(cache_key)
-                    if cached_status:
-                        status_str = cached_status.decode() if isinstance(cached_status, bytes) else cached_status
-                        if status_str == "completed":
-                            # 同步回内存/本地
-                            self.completed_map.setdefault(spider.name, set()).add(cache_key)
-                            return True
-                except Exception as cache_error:
-                    spider.logger.debug(f"读取Redis缓存失败: {cache_key} - {cache_error}")
 
-            # 3.5) 数据库重试阈值判断：超过上限则跳过
-            if cache_key and pipeline and getattr(pipeline, 'connection', None):
-                parsed = self._parse_cache_key(cache_key)
-                if parsed:
-                    p_spider, status_type, identifier = parsed
-                    try:
-                        status, retry_count = pipeline.get_crawl_status(p_spider, status_type, identifier)
-                        max_retry = spider.crawler.settings.getint('RESUME_MAX_RETRY_COUNT', 3)
-                        if status == 'failed' and retry_count >= max_retry:
-                            self.retry_skip_map.setdefault(spider.name, set()).add(cache_key)
-                            spider.logger.info(f"跳过已达重试上限的请求: {url} (retry={retry_count}, max={max_retry})")
-                            return True
-                    except Exception as e:
-                        spider.logger.debug(f"查询重试状态失败: {cache_key} - {e}")
-
-            # 4) URL级别的短期缓存（仅作为性能优化）
-            if pipeline and hasattr(pipeline, 'is_url_cached') and pipeline.is_url_cached(url):
+            # 3) Redis：完成状态与 URL 短期缓存合并为一次往返
+            tier = self._check_redis(pipeline, cache_key, url, spider)
+            if tier:
+                stats[tier] += 1
+                if tier == 'redis':
+                    # 同步回内存
+                    self.completed_map.setdefault(spider.name, set()).add(cache_key)
                 return True
 
+            stats['miss'] += 1
+            if cache_key is not None:
+                self._remember_negative(spider, cache_key)
             return False
         except Exception as e:
             spider.logger.debug(f"ResumeCrawlerMiddleware: 检查请求状态失败: {e}")
             return False
 
-    def _get_cache_key(self, url, spider):
-        """根据URL生成缓存键"""
-        try:
-            # 列表页面
-            if 'cat/-1.html?page=' in url:
-                page = url.split('page=')[-1].split('&')[0]
-                return f"crawl_status:novel_list:list_page:{page}"
-
-            # 详情页面
-            elif '/book/' in url and url.endswith('.html'):
-                import re
-                match = re.search(r'/book/(\d+)\.html', url)
-                if match:
-                    book_id = match.group(1)
-                    return f"crawl_status:novel_detail:detail_page:{book_id}"
-                else:
-                    spider.logger.debug(f"详情页面URL格式异常: {url}")
-
-            # 评论API
-            elif '/comment/items' in url and 'type=book' in url:
-                from urllib.parse import urlparse, parse_qs
-                parsed = urlparse(url)
-                query = parse_qs(parsed.query)
-                book_id = query.get('tid', [''])[0]
-                page = query.get('page', ['1'])[0]
-                if book_id:
-                    return f"crawl_status:novel_comment:comment_page:{book_id}_{page}"
-
+    def _check_redis(self, pipeline, cache_key, url, spider):
+        """在一次 Redis 往返中检查完成位图和 URL 缓存，返回命中的层名或 None"""
+        redis_client = getattr(pipeline, 'redis_client', None) if pipeline else None
+        if not redis_client or not self.redis_lookup:
             return None
-
-        except Exception as e:
-            spider.logger.warning(f"生成缓存键失败: {url} - {e}")
+        try:
+            completed, url_cached = redis_status.lookup(redis_client, cache_key, url)
+        except Exception as cache_error:
+            spider.logger.debug(f"读取Redis缓存失败: {url} - {cache_error}")
             return None
 
-    def _parse_cache_key(self, cache_key):
-        """将缓存键解析为 (spider_name, status_type, identifier)"""
-        try:
-            parts = cache_key.split(':', 3)
-            if len(parts) == 4 and parts[0] == 'crawl_status':
-                return parts[1], parts[2], parts[3]
-        except Exception:
-            pass
+        if completed:
+            return 'redis'
+        # URL级别的短期缓存（仅作为性能优化）
+        if url_cached:
+            return 'url_cache'
         return None
 
+    def _remember_negative(self, spider, cache_key):
+        """记录未完成的键到负缓存，超过容量时淘汰最早写入的条目"""
+        if self.negative_ttl <= 0:
+            return
+        neg = self.negative_cache.get(spider.name)
+        if neg is None:
+            neg = self.negative_cache[spider.name] = {}
+        elif len(neg) >= self.negative_max_size:
+            # dict 保持插入顺序，淘汰最早的一批
+            for stale in list(neg)[:max(1, self.negative_max_size // 10)]:
+                del neg[stale]
+        neg[cache_key] = time.monotonic() + self.negative_ttl
+
+    def _report_tier_stats(self, spider):
+        """输出各层命中次数与命中率，并写入 Scrapy stats"""
+        stats = self.tier_stats.pop(spider.name, None)
+        if not stats:
+            return
+        total = sum(stats.values())
+        crawler_stats = getattr(getattr(spider, 'crawler', None), 'stats', None)
+        parts = []
+        for tier in self.TIERS:
+            count = stats.get(tier, 0)
+            parts.append(f"{tier}={count} ({count / total:.1%})")
+            if crawler_stats is not None:
+                crawler_stats.set_value(f'resume/skip_check/{tier}', count)
+        spider.logger.info(f"ResumeCrawlerMiddleware: 跳过检查 {total} 次，各层命中: {', '.join(parts)}")
+
     async def process_start(self, start):
         """在起始阶段也进行跳过判断，避免已完成任务的首个请求重复发出"""
         async for item_or_request in start:
@@ -300,6 +410,122 @@ class ResumeCrawlerMiddleware:
             yield item_or_request
 
 
+class PriorityPolicyMiddleware:
+    """按策略为列表/详情/评论请求分配调度优先级
+
+    - ``depth``（默认）：评论 > 详情 > 列表，尽快把单本书完整写入数据库，
+      同时抑制列表页扩张导致的队列膨胀。
+    - ``breadth``：列表 > 详情 > 评论，优先发现全部书籍。
+    - ``none``：不修改优先级。
+
+    另外按书统计在途请求数，超过 PRIORITY_BOOK_MAX_OUTSTANDING 的请求降级；
+    经过的 NovelItem 带有热度时，记录热度并按 PRIORITY_POPULARITY_BOOSTS 提升
+    该书后续请求的优先级。两张表都有上限，内存保持有界。
+
+    需放在其他 Spider 中间件之前（数值更小），以便只统计真正发出的请求。
+    """
+
+    POLICIES = {
+        'depth': {fingerprint.KIND_LIST: 0, fingerprint.KIND_DETAIL: 10, fingerprint.KIND_COMMENT: 20},
+        'breadth': {fingerprint.KIND_LIST: 20, fingerprint.KIND_DETAIL: 10, fingerprint.KIND_COMMENT: 0},
+    }
+
+    def __init__(self, policy='depth', book_max_outstanding=0, outstanding_penalty=30,
+                 popularity_boosts=None, popularity_cache_size=50000):
+        self.base_priorities = self.POLICIES.get(policy)
+        self.book_max_outstanding = book_max_outstanding
+        self.outstanding_penalty = outstanding_penalty
+        # 从高到低排列的 (热度阈值, 提升值)
+        self.popularity_boosts = sorted(
+            ((int(k), int(v)) for k, v in (popularity_boosts or {}).items()), reverse=True
+        )
+        self.popularity_cache_size = popularity_cache_size
+        self.outstanding = {}   # book_id(int) -> 在途请求数
+        self.popularity = {}    # book_id(int) -> 热度
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        policy = (settings.get('PRIORITY_POLICY') or 'none').lower()
+        if policy not in cls.POLICIES:
+            raise NotConfigured
+        s = cls(
+            policy=policy,
+            book_max_outstanding=settings.getint('PRIORITY_BOOK_MAX_OUTSTANDING', 0),
+            outstanding_penalty=settings.getint('PRIORITY_OUTSTANDING_PENALTY', 30),
+            popularity_boosts=settings.getdict('PRIORITY_POPULARITY_BOOSTS'),
+            popularity_cache_size=settings.getint('PRIORITY_POPULARITY_CACHE_SIZE', 50000),
+        )
+        crawler.signals.connect(s.request_finished, signal=signals.request_left_downloader)
+        crawler.signals.connect(s.request_finished, signal=signals.request_dropped)
+        return s
+
+    async def process_spider_output(self, response, result, spider):
+        async for item_or_request in result:
+            if isinstance(item_or_request, Request):
+                self._prioritize(item_or_request)
+            elif type(item_or_request).__name__ == 'NovelItem':
+                self._remember_popularity(item_or_request)
+            yield item_or_request
+
+    async def process_start(self, start):
+        async for item_or_request in start:
+            if isinstance(item_or_request, Request):
+                self._prioritize(item_or_request)
+            yield item_or_request
+
+    def _prioritize(self, request):
+        routed = fingerprint.route(request.url)
+        if routed is None:
+            return
+        kind, primary, _ = routed
+        priority = request.priority + self.base_priorities.get(kind, 0)
+        if kind != fingerprint.KIND_LIST:
+            book_id = primary
+            priority += self._popularity_boost(book_id)
+            count = self.outstanding.get(book_id, 0)
+            if self.book_max_outstanding > 0 and count >= self.book_max_outstanding:
+                priority -= self.outstanding_penalty
+            self.outstanding[book_id] = count + 1
+            request.meta['priority_book_id'] = book_id
+        request.priority = priority
+
+    def _popularity_boost(self, book_id):
+        popularity = self.popularity.get(book_id)
+        if popularity is None:
+            return 0
+        for threshold, boost in self.popularity_boosts:
+            if popularity >= threshold:
+                return boost
+        return 0
+
+    def _remember_popularity(self, item):
+        popularity = item.get('popularity')
+        if popularity is None or not self.popularity_boosts:
+            return
+        try:
+            book_id = int(item.get('book_id'))
+        except (TypeError, ValueError):
+            return
+        cache = self.popularity
+        if book_id not in cache and len(cache) >= self.popularity_cache_size:
+            # 淘汰最早记录的一批
+            for stale in list(cache)[:max(1, self.popularity_cache_size // 10)]:
+                del cache[stale]
+        cache[book_id] = popularity
+
+    def request_finished(self, request, spider=None):
+        """请求离开下载器或被调度器丢弃时，减少该书的在途计数"""
+        book_id = request.meta.get('priority_book_id')
+        if book_id is None:
+            return
+        count = self.outstanding.get(book_id, 0) - 1
+        if count > 0:
+            self.outstanding[book_id] = count
+        else:
+            self.outstanding.pop(book_id, None)
+
+
 class LinovelCrawlerSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
     # scrapy acts as if the spider middleware does not modify the
@@ -391,77 +617,240 @@ class LinovelCrawlerDownloaderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
+class _EndpointThrottle:
+    """单个端点类别的 AIMD 限速状态"""
+
+    def __init__(self, name, concurrency=4, delay=0.1, min_concurrency=1, max_concurrency=8,
+                 min_delay=0.0, max_delay=10.0, target_latency=2.0, max_error_rate=0.05, window=20):
+        self.name = name
+        self.slot_key = f"linovel:{name}"
+        self.concurrency = concurrency
+        self.delay = delay
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.window = max(1, window)
+        self._reset_window()
+
+    def _reset_window(self):
+        self.responses = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.rate_limited = False
+
+    def record(self, latency=None, error=False, rate_limited=False):
+        """记录一次响应/异常，返回是否需要重新计算限速参数"""
+        self.responses += 1
+        if error:
+            self.errors += 1
+        if rate_limited:
+            self.rate_limited = True
+        if latency is not None:
+            self.latency_sum += latency
+            self.latency_count += 1
+        # 429 不等待整个窗口，但至少积累 1/4 窗口的样本，避免同一批在途请求连续减半
+        if self.rate_limited and self.responses >= max(1, self.window // 4):
+            return True
+        return self.responses >= self.window
+
+    def adjust(self):
+        """按窗口统计执行乘性减/加性增，返回 'decrease' 或 'increase'"""
+        error_rate = self.errors / self.responses if self.responses else 0.0
+        avg_latency = self.latency_sum / self.latency_count if self.latency_count else 0.0
+        if self.rate_limited or error_rate > self.max_error_rate or avg_latency > self.target_latency:
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            self.delay = min(self.max_delay, max(self.delay * 2, 0.05))
+            direction = 'decrease'
+        else:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            self.delay = max(self.min_delay, self.delay * 0.75)
+            if self.delay < 0.01:
+                self.delay = self.min_delay
+            direction = 'increase'
+        self.last_error_rate = error_rate
+        self.last_latency = avg_latency
+        self._reset_window()
+        return direction
+
+
+class AdaptiveThrottleMiddleware:
+    """按端点类别（列表/详情/评论）自适应限速的下载中间件
+
+    每类端点使用独立的下载槽（``download_slot = linovel:<endpoint>``），按窗口统计
+    延迟和 429/5xx/网络异常比例：超过目标时并发减半、延迟加倍，否则并发加一、
+    延迟递减，使各端点在服务器可承受的范围内尽量快地运行。
+
+    需放在 RetryMiddleware(550) 之后（数值更大），才能在重试前观察到原始响应。
+    """
+
+    ENDPOINTS = {
+        fingerprint.KIND_LIST: 'list',
+        fingerprint.KIND_DETAIL: 'detail',
+        fingerprint.KIND_COMMENT: 'comment',
+    }
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ADAPTIVE_THROTTLE_ENABLED', False):
+            raise NotConfigured
+        self.crawler = crawler
+        defaults = {
+            'concurrency': settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN', 8),
+            'delay': settings.getfloat('DOWNLOAD_DELAY', 0.0),
+            'target_latency': settings.getfloat('ADAPTIVE_THROTTLE_TARGET_LATENCY', 2.0),
+            'max_error_rate': settings.getfloat('ADAPTIVE_THROTTLE_MAX_ERROR_RATE', 0.05),
+            'max_delay': settings.getfloat('ADAPTIVE_THROTTLE_MAX_DELAY', 10.0),
+            'window': settings.getint('ADAPTIVE_THROTTLE_WINDOW', 20),
+        }
+        endpoints = settings.getdict('ADAPTIVE_THROTTLE_ENDPOINTS')
+        self.states = {}
+        for name in self.ENDPOINTS.values():
+            config = dict(defaults)
+            config.update(endpoints.get(name) or {})
+            self.states[name] = _EndpointThrottle(name, **config)
+        # 端点 -> 已同步参数的下载槽对象；下载器会回收空闲约60秒的槽，
+        # 重建后的槽是新对象（默认并发/延迟），需要重新同步
+        self._synced = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = cls(crawler)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_request(self, request, spider):
+        routed = fingerprint.route(request.url)
+        if routed is None:
+            return None
+        name = self.ENDPOINTS.get(routed[0])
+        state = self.states.get(name)
+        if state is None:
+            return None
+        # 显式指定了下载槽的请求保持原样
+        if 'download_slot' not in request.meta:
+            request.meta['download_slot'] = state.slot_key
+            request.meta['adaptive_throttle'] = name
+            slot = self.crawler.engine.downloader.slots.get(state.slot_key)
+            if slot is not None and self._synced.get(name) is not slot:
+                self._apply(state, spider)
+        return None
+
+    def process_response(self, request, response, spider):
+        state = self.states.get(request.meta.get('adaptive_throttle'))
+        if state is not None:
+            status = response.status
+            rate_limited = status == 429
+            error = rate_limited or status >= 500
+            if state.record(request.meta.get('download_latency'), error, rate_limited):
+                self._adjust(state, spider)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        state = self.states.get(request.meta.get('adaptive_throttle'))
+        if state is not None and not isinstance(exception, IgnoreRequest):
+            if state.record(error=True):
+                self._adjust(state, spider)
+        return None
+
+    def _adjust(self, state, spider):
+        direction = state.adjust()
+        self._apply(state, spider)
+        stats = self.crawler.stats
+        stats.inc_value(f'throttle/{state.name}/{direction}')
+        message = (
+            f"AdaptiveThrottle[{state.name}]: {direction} -> 并发={state.concurrency}, "
+            f"延迟={state.delay:.2f}s (错误率={state.last_error_rate:.1%}, 平均延迟={state.last_latency:.2f}s)"
+        )
+        if direction == 'decrease':
+            spider.logger.info(message)
+        else:
+            spider.logger.debug(message)
+
+    def _apply(self, state, spider):
+        """把端点状态写入对应的下载槽"""
+        slot = self.crawler.engine.downloader.slots.get(state.slot_key)
+        if slot is None:
+            return
+        slot.concurrency = state.concurrency
+        slot.delay = state.delay
+        self._synced[state.name] = slot
+        stats = self.crawler.stats
+        stats.set_value(f'throttle/{state.name}/concurrency', state.concurrency)
+        stats.set_value(f'throttle/{state.name}/delay', state.delay)
+
+    def spider_closed(self, spider):
+        for state in self.states.values():
+            spider.logger.info(
+                f"AdaptiveThrottle[{state.name}]: 最终并发={state.concurrency}, 延迟={state.delay:.2f}s"
+            )
+
+
 class DuplicateRequestFilterMiddleware:
     """
     自定义重复请求过滤中间件
 
     通过自定义请求指纹生成逻辑，避免真正的重复请求，
-    同时允许业务需要的参数化请求。
+    同时允许业务需要的参数化请求。指纹为 fingerprint 模块生成的整数键，
+    相比字符串指纹显著降低已见集合的内存占用。
+
+    已见集合由 DEDUP_BACKEND 选择（memory/disk/redis，见 dedup 模块），
+    DEDUP_MAX_ENTRIES 限制内存中的指纹数量。
     """
 
-    def __init__(self):
-        self.seen_requests = set()
+    def __init__(self, seen_requests=None):
+        if seen_requests is None:
+            from linovel_crawler.dedup import MemorySeenSet
+            seen_requests = MemorySeenSet()
+        self.seen_requests = seen_requests
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls()
+        from linovel_crawler.dedup import build_seen_set
+        s = cls(build_seen_set(crawler.settings))
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def spider_opened(self, spider):
+        self.seen_requests.open(spider)
+
+    def spider_closed(self, spider):
+        try:
+            self.seen_requests.close(spider)
+        except Exception as e:
+            spider.logger.warning(f"DuplicateRequestFilterMiddleware: 关闭去重集合失败: {e}")
+        stats = self.seen_requests.stats()
+        crawler_stats = getattr(getattr(spider, 'crawler', None), 'stats', None)
+        if crawler_stats is not None:
+            for name, value in stats.items():
+                crawler_stats.set_value(f'dedup/{name}', value)
+        spider.logger.info(
+            f"DuplicateRequestFilterMiddleware: 后端={self.seen_requests.name}, "
+            + ', '.join(f"{name}={value}" for name, value in stats.items())
+        )
 
     async def process_spider_output(self, response, result, spider):
         """处理Spider输出，过滤重复请求（支持异步输出）"""
+        seen = self.seen_requests
         async for item in result:
-            if isinstance(item, Request):  # 这是Request对象
-                # 生成自定义指纹
-                fingerprint = self._get_request_fingerprint(item, spider)
-                if fingerprint and fingerprint in self.seen_requests:
-                    spider.logger.debug(f"过滤重复请求: {item.url} (指纹: {fingerprint[:16]}...)")
+            if isinstance(item, Request) and not item.dont_filter:  # 这是Request对象
+                # 生成自定义指纹并记录；已见过的指纹直接过滤（dont_filter 的请求始终放行）
+                fp = self._get_request_fingerprint(item, spider)
+                if not seen.add(fp):
+                    spider.logger.debug("过滤重复请求: %s (指纹: %x)", item.url, fp)
                     continue
 
-                # 记录已处理的请求指纹
-                if fingerprint:
-                    self.seen_requests.add(fingerprint)
-
             yield item
 
     def _get_request_fingerprint(self, request, spider):
         """
         生成自定义请求指纹
 
-        根据不同类型的请求生成合适的指纹，避免不必要的重复。
+        列表页基于页码、详情页基于book_id、评论API基于book_id和页码，
+        其他请求使用URL的稳定摘要。
         """
-        url = request.url
-
-        try:
-            # 对于列表页面请求：基于页码生成指纹
-            if spider.name == 'novel_list' and '/cat/-1.html?page=' in url:
-                page = url.split('page=')[-1].split('&')[0]
-                return f"list_page_{page}"
-
-            # 对于详情页请求：基于book_id生成指纹
-            elif spider.name == 'novel_detail' and '/book/' in url:
-                # 提取book_id
-                import re
-                match = re.search(r'/book/(\d+)\.html', url)
-                if match:
-                    book_id = match.group(1)
-                    return f"detail_page_{book_id}"
-
-            # 对于评论API请求：基于book_id和页码生成指纹
-            elif '/comment/items' in url and 'type=book' in url:
-                # 解析查询参数
-                from urllib.parse import urlparse, parse_qs
-                parsed = urlparse(url)
-                query = parse_qs(parsed.query)
-
-                book_id = query.get('tid', [''])[0]
-                page = query.get('page', ['1'])[0]
-
-                if book_id:
-                    return f"comment_{book_id}_{page}"
-
-            # 其他请求使用默认URL作为指纹
-            else:
-                return url
-
-        except Exception as e:
-            spider.logger.warning(f"生成请求指纹失败: {url} - {e}")
-            return url  # 出错时使用完整URL作为指纹
+        return fingerprint.request_fingerprint(request.url)
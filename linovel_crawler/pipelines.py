@@ -3,53 +3,136 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
-import os
 import json
-import pymysql
 import redis
 from datetime import datetime
 from urllib.parse import urlparse
 import logging
+import time
+from collections import Counter
 from threading import Lock
-from linovel_crawler.items import CrawlStatusItem
+from scrapy.exceptions import DropItem, NotConfigured
+from twisted.internet import task
+from linovel_crawler import config, fingerprint, redis_status, storage
+from linovel_crawler.dedup import MemorySeenSet
+from linovel_crawler.row_cache import RowHashCache
+from linovel_crawler.items import (
+    CHAPTER_BATCH_FIELDS, VOLUME_BATCH_FIELDS, CrawlStatusItem, NovelChapterBatchItem,
+    NovelChapterItem, NovelChapterRecord, NovelCommentItem, NovelCommentRecord, NovelItem, NovelVolumeItem,
+)
 
 logger = logging.getLogger(__name__)
 
+NOVEL_COLUMNS = (
+    'book_id', 'title', 'cover_url', 'author', 'intro', 'tags',
+    'word_count', 'popularity', 'favorites', 'status',
+    'sign_status', 'last_update', 'detail_url',
+)
+VOLUME_COLUMNS = ('book_id',) + VOLUME_BATCH_FIELDS
+VOLUME_UPDATES = {'volume_title': 'replace', 'volume_word_count': 'replace', 'volume_desc': 'replace'}
+CHAPTER_COLUMNS = ('book_id',) + CHAPTER_BATCH_FIELDS
+CHAPTER_UPDATES = {
+    'volume_index': 'replace', 'chapter_index': 'coalesce',
+    'chapter_url': 'replace', 'chapter_title': 'replace',
+}
+
+
+# 重复 item 很多，新版 Scrapy 支持降低 DropItem 的日志级别
+try:
+    DropItem('', log_level='DEBUG')
+    _DROP_KWARGS = {'log_level': 'DEBUG'}
+except TypeError:
+    _DROP_KWARGS = {}
+
+
+class ItemDedupPipeline:
+    """丢弃同一进程内重复的卷/章节 item
+
+    run_all_spiders 在同一进程中运行多个 Spider，novel_list 与 novel_detail 可能解析
+    同一本书的详情页。卷按 ``(book_id, volume_index)``、章节按 ``chapter_url`` 生成
+    64位摘要键，存入进程内所有 Spider 共享的有界集合（ITEM_DEDUP_MAX_ENTRIES），
+    重复的 item 在写库与其他输出之前被丢弃。NovelChapterBatchItem 按行去重，只丢弃其中重复的行。
+    """
+
+    _seen = None
+
+    def __init__(self, max_entries=500000, stats=None):
+        cls = type(self)
+        if cls._seen is None:
+            cls._seen = MemorySeenSet(max_entries)
+        self.seen = cls._seen
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('ITEM_DEDUP_ENABLED', True):
+            raise NotConfigured
+        return cls(settings.getint('ITEM_DEDUP_MAX_ENTRIES', 500000), crawler.stats)
+
+    def process_item(self, item, spider):
+        if isinstance(item, NovelVolumeItem):
+            kind, label = 'volume', '卷'
+            key = fingerprint.item_key(kind, item.get('book_id'), item.get('volume_index'))
+        elif isinstance(item, (NovelChapterItem, NovelChapterRecord)):
+            kind, label = 'chapter', '章节'
+            key = fingerprint.item_key(kind, item.get('chapter_url'))
+        elif isinstance(item, NovelChapterBatchItem):
+            return self._process_batch(item)
+        else:
+            return item
+        if self.seen.add(key):
+            return item
+        if self.stats is not None:
+            self.stats.inc_value(f'item_dedup/dropped/{kind}')
+        raise DropItem(f"重复的{label}: book_id {item.get('book_id')}", **_DROP_KWARGS)
+
+    def _process_batch(self, item):
+        """批次 item 逐行去重：去掉重复的卷/章节行，全部重复时丢弃整个批次"""
+        book_id = item.get('book_id')
+        volumes = item['volumes']
+        chapters = item['chapters']
+        item['volumes'] = self._filter_rows('volume', volumes, [
+            fingerprint.item_key('volume', book_id, volume_index) for volume_index in volumes['volume_index']
+        ])
+        item['chapters'] = self._filter_rows('chapter', chapters, [
+            fingerprint.item_key('chapter', chapter_url) for chapter_url in chapters['chapter_url']
+        ])
+        if item['volumes']['volume_index'] or item['chapters']['chapter_id']:
+            return item
+        raise DropItem(f"重复的卷与章节批次: book_id {book_id}", **_DROP_KWARGS)
+
+    def _filter_rows(self, kind, columns, keys):
+        keep = [self.seen.add(key) for key in keys]
+        dropped = keep.count(False)
+        if not dropped:
+            return columns
+        if self.stats is not None:
+            self.stats.inc_value(f'item_dedup/dropped/{kind}', dropped)
+        return {name: [v for v, k in zip(values, keep) if k] for name, values in columns.items()}
+
 
 class DatabasePipeline:
-    def __init__(self):
-        # 加载环境变量
-        self.mysql_config = {
-            'host': os.getenv('mysql_host'),
-            'port': int(os.getenv('mysql_port', 3306)),
-            'user': os.getenv('mysql_user'),
-            'password': os.getenv('mysql_password'),
-            'database': os.getenv('mysql_database'),
-            'charset': 'utf8mb4'
-        }
-
-        # 兼容带密码与无密码的Redis配置；空字符串视为未设置
-        redis_password = os.getenv('redis_password')
-        if not redis_password:
-            redis_password = None
-
-        # 可选：Redis ACL 用户名
-        redis_username = os.getenv('redis_username')
-        if not redis_username:
-            redis_username = None
-
-        self.redis_config = {
-            'host': os.getenv('redis_host'),
-            'port': int(os.getenv('redis_port', 6379)),
-            'password': redis_password,
-            'username': redis_username,
-            'decode_responses': True
-        }
-
-        # 数据库连接和锁
+    def __init__(self, backend=None):
+        # 连接参数来自 .env / 环境变量
+        self.mysql_config = config.mysql_config()
+        self.redis_config = {**config.redis_config(), 'decode_responses': True}
+
+        # 存储后端（未指定时在 open_spider 中按 STORAGE_BACKEND 创建）、数据库连接和锁
+        self.backend = backend
         self.connection = None
         self.connection_lock = Lock()
         self.redis_client = None
+        self._saver_cache = {}
+        # crawl_status_summary 的待写入增量：(spider_name, status_type, status) -> 行数变化
+        self._status_deltas = Counter()
+        self.summary_flush_interval = 5.0
+        self._summary_flushed_at = time.monotonic()
+        # 行内容摘要缓存：内容未变化的 item 跳过写入（ROW_HASH_CACHE_ENABLED）
+        self.row_cache = None
+        self.stats = None
+        # 批量提交的后端（SQLite）按提交间隔定时提交，空闲时不长期占用写锁
+        self._flush_timer = None
 
     def _execute_with_lock(self, operation_func, *args, **kwargs):
         """使用锁安全地执行数据库操作"""
@@ -59,11 +142,11 @@ class DatabasePipeline:
                 return None
             try:
                 return operation_func(*args, **kwargs)
-            except pymysql.Error as e:
+            except self.backend.errors as e:
                 logger.error(f"数据库操作失败: {e}")
                 # 尝试重连
                 try:
-                    self.connection.ping(reconnect=True)
+                    self.backend.reconnect()
                     return operation_func(*args, **kwargs)
                 except Exception as reconnect_error:
                     logger.error(f"数据库重连失败: {reconnect_error}")
@@ -72,31 +155,21 @@ class DatabasePipeline:
     def open_spider(self, spider):
         """Spider启动时初始化数据库连接"""
         try:
-            # 连接MySQL（不指定数据库）
-            mysql_config_no_db = self.mysql_config.copy()
-            mysql_config_no_db.pop('database', None)
-
-            temp_connection = pymysql.connect(**mysql_config_no_db)
-
-            # 创建数据库，转义数据库名防止注入
-            db_name = os.getenv('mysql_database')
-            if not db_name:
-                raise ValueError("mysql_database环境变量未设置")
-
-            # 验证和转义数据库名（只允许字母、数字、下划线）
-            import re
-            if not re.match(r'^[a-zA-Z0-9_]+$', db_name):
-                raise ValueError(f"数据库名包含非法字符: {db_name}")
-
-            with temp_connection.cursor() as cursor:
-                cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
-                logger.info(f"数据库 `{db_name}` 创建成功")
-
-            temp_connection.close()
-
-            # 连接到指定数据库
-            self.connection = pymysql.connect(**self.mysql_config)
-            logger.info("MySQL连接成功")
+            settings = spider.crawler.settings
+            if self.backend is None:
+                self.backend = storage.build_backend(settings, self.mysql_config)
+            self.summary_flush_interval = settings.getfloat('STATUS_SUMMARY_FLUSH_INTERVAL', 5.0)
+            if settings.getbool('ROW_HASH_CACHE_ENABLED', True):
+                path = settings.get('ROW_HASH_CACHE_PATH')
+                self.row_cache = RowHashCache(
+                    settings.getint('ROW_HASH_CACHE_SIZE', 200000),
+                    path.format(spider=spider.name) if path else None,
+                )
+            self.stats = spider.crawler.stats
+            self.connection = self.backend.connect()
+            if self.backend.flush_interval:
+                self._flush_timer = task.LoopingCall(self._flush_due)
+                self._flush_timer.start(self.backend.flush_interval, now=False)
 
             # 连接Redis
             try:
@@ -117,10 +190,33 @@ class DatabasePipeline:
             logger.error(f"数据库连接失败: {e}")
             raise
 
+    def _flush_due(self):
+        """定时提交到期的批量写入（在反应器线程中执行，不会与 process_item 交错）"""
+        with self.connection_lock:
+            if self.connection is None:
+                return
+            try:
+                self.backend.flush_due()
+            except self.backend.errors as e:
+                logger.error(f"提交批量写入失败: {e}")
+
     def close_spider(self, spider):
         """Spider关闭时关闭连接"""
-        if self.connection:
-            self.connection.close()
+        if self._flush_timer is not None and self._flush_timer.running:
+            self._flush_timer.stop()
+        if self.backend is not None and self.connection is not None:
+            with self.connection_lock:
+                try:
+                    self._flush_status_summary()
+                except self.backend.errors as e:
+                    logger.error(f"写入状态汇总失败: {e}")
+                self.backend.close()
+                self.connection = None
+        if self.row_cache is not None:
+            try:
+                self.row_cache.save()
+            except OSError as e:
+                logger.warning(f"保存行摘要缓存失败: {e}")
         if self.redis_client:
             try:
                 self.redis_client.close()
@@ -128,219 +224,161 @@ class DatabasePipeline:
                 pass
 
     def create_tables(self):
-        """自动创建数据库表"""
-        with self.connection.cursor() as cursor:
-            # 小说基本信息表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS novels (
-                    book_id VARCHAR(20) PRIMARY KEY,
-                    title VARCHAR(255) NOT NULL,
-                    cover_url TEXT,
-                    author VARCHAR(100),
-                    intro TEXT,
-                    tags JSON,
-                    word_count INT,
-                    popularity INT,
-                    favorites INT,
-                    status VARCHAR(20),
-                    sign_status VARCHAR(50),
-                    last_update VARCHAR(50),
-                    detail_url TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-
-            # 小说卷信息表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS novel_volumes (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    book_id VARCHAR(20) NOT NULL,
-                    volume_index INT NOT NULL,
-                    volume_title VARCHAR(255),
-                    volume_word_count INT,
-                    volume_desc TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE KEY unique_book_volume (book_id, volume_index),
-                    FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-
-            # 小说章节信息表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS novel_chapters (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    book_id VARCHAR(20) NOT NULL,
-                    volume_index INT,
-                    chapter_url TEXT NOT NULL,
-                    chapter_title VARCHAR(500),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE KEY unique_chapter_url (chapter_url(500)),
-                    FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-
-            # 小说评论表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS novel_comments (
-                    comment_id VARCHAR(50) PRIMARY KEY,
-                    book_id VARCHAR(20) NOT NULL,
-                    user_name VARCHAR(100),
-                    content TEXT,
-                    create_time DATETIME,
-                    like_count INT DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-
-            # 爬取状态表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS crawl_status (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    spider_name VARCHAR(50) NOT NULL,
-                    status_type VARCHAR(50) NOT NULL,
-                    identifier VARCHAR(100) NOT NULL,
-                    status VARCHAR(20) DEFAULT 'pending',
-                    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    retry_count INT DEFAULT 0,
-                    UNIQUE KEY unique_status (spider_name, status_type, identifier)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-
-            self.connection.commit()
-            logger.info("数据库表检查/创建完成")
+        """自动创建数据库表（表结构见各存储后端）"""
+        self.backend.create_tables()
+
+    # item 类 -> 保存方法名；子类沿 MRO 匹配到最近的已注册父类
+    SAVERS = {
+        NovelItem: 'save_novel',
+        NovelVolumeItem: 'save_novel_volume',
+        NovelChapterItem: 'save_novel_chapter',
+        NovelChapterRecord: 'save_novel_chapter',
+        NovelCommentItem: 'save_novel_comment',
+        NovelCommentRecord: 'save_novel_comment',
+        NovelChapterBatchItem: 'save_chapter_batch',
+        CrawlStatusItem: 'save_crawl_status',
+    }
+
+    def _saver_for(self, item_cls):
+        cache = self._saver_cache
+        if item_cls not in cache:
+            name = next((self.SAVERS[c] for c in item_cls.__mro__ if c in self.SAVERS), None)
+            cache[item_cls] = getattr(self, name) if name else None
+        return cache[item_cls]
 
     def process_item(self, item, spider):
-        """处理不同的item类型"""
+        """按 item 类分发到对应的保存方法"""
+        saver = self._saver_for(type(item))
+        if saver is None:
+            logger.warning(f"未知的item类型: {type(item).__name__}, item内容: {dict(item)}")
+            return item
         try:
-            logger.debug(f"处理item: {type(item).__name__}, spider: {spider.name}")
-
-            # 检查item类型 - 使用更可靠的方法
-            item_class_name = type(item).__name__
-
-            if item_class_name == 'NovelItem':
-                # NovelItem
-                logger.debug(f"保存小说: {item.get('book_id')} - {item.get('title')[:30] if item.get('title') else 'N/A'}")
-                self.save_novel(item)
-            elif item_class_name == 'NovelVolumeItem':
-                # NovelVolumeItem
-                logger.debug(f"保存小说卷: {item.get('book_id')} - {item.get('volume_index')}")
-                self.save_novel_volume(item)
-            elif item_class_name == 'NovelChapterItem':
-                # NovelChapterItem
-                logger.debug(f"保存小说章节: {item.get('book_id')} - {item.get('chapter_title')[:30] if item.get('chapter_title') else 'N/A'}")
-                self.save_novel_chapter(item)
-            elif item_class_name == 'NovelCommentItem':
-                # NovelCommentItem
-                logger.debug(f"保存评论: {item.get('comment_id')}")
-                self.save_novel_comment(item)
-            elif item_class_name == 'CrawlStatusItem':
-                # CrawlStatusItem
-                logger.debug(f"保存爬取状态: {item.get('spider_name')} - {item.get('status_type')} - {item.get('identifier')}")
-                self.save_crawl_status(item)
-            else:
-                logger.warning(f"未知的item类型: {item_class_name}, item内容: {dict(item)}")
-
+            saver(item)
             return item
-
         except Exception as e:
             logger.error(f"处理item失败: {e}, item类型: {type(item)}, item内容: {item}")
             raise
 
+    def _unchanged(self, table, key, params):
+        """与上次写入的内容相同时返回 True，并计入 row_cache/skipped 统计"""
+        if self.row_cache is None or not self.row_cache.unchanged(table, key, params):
+            return False
+        if self.stats is not None:
+            self.stats.inc_value(f'row_cache/skipped/{table}')
+        return True
+
+    def _remember(self, table, key, params):
+        if self.row_cache is not None:
+            self.row_cache.remember(table, key, params)
+
     def save_novel(self, item):
         """保存小说基本信息"""
+        # 避免用缺失字段覆盖已有值：仅当 item 含有该字段时才写入；否则传 None 以触发 COALESCE 使用旧值
+        tags_val = item.get('tags') if 'tags' in item else None
+        tags_json = json.dumps(tags_val) if tags_val is not None else None
+        params = (
+            item.get('book_id'),
+            item.get('title') if 'title' in item else None,
+            item.get('cover_url') if 'cover_url' in item else None,
+            item.get('author') if 'author' in item else None,
+            item.get('intro') if 'intro' in item else None,
+            tags_json,
+            item.get('word_count') if 'word_count' in item else None,
+            item.get('popularity') if 'popularity' in item else None,
+            item.get('favorites') if 'favorites' in item else None,
+            item.get('status') if 'status' in item else None,
+            item.get('sign_status') if 'sign_status' in item else None,
+            item.get('last_update') if 'last_update' in item else None,
+            item.get('detail_url') if 'detail_url' in item else None
+        )
+        if self._unchanged('novels', params[0], params):
+            return
         with self.connection.cursor() as cursor:
-            sql = """
-                INSERT INTO novels (
-                    book_id, title, cover_url, author, intro, tags,
-                    word_count, popularity, favorites, status,
-                    sign_status, last_update, detail_url
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    title=COALESCE(VALUES(title), title),
-                    cover_url=COALESCE(VALUES(cover_url), cover_url),
-                    author=COALESCE(VALUES(author), author),
-                    intro=COALESCE(VALUES(intro), intro),
-                    tags=COALESCE(VALUES(tags), tags),
-                    word_count=COALESCE(VALUES(word_count), word_count),
-                    popularity=COALESCE(VALUES(popularity), popularity),
-                    favorites=COALESCE(VALUES(favorites), favorites),
-                    status=COALESCE(VALUES(status), status),
-                    sign_status=COALESCE(VALUES(sign_status), sign_status),
-                    last_update=COALESCE(VALUES(last_update), last_update),
-                    detail_url=COALESCE(VALUES(detail_url), detail_url)
-            """
-            # 避免用缺失字段覆盖已有值：仅当 item 含有该字段时才写入；否则传 None 以触发 COALESCE 使用旧值
-            tags_val = item.get('tags') if 'tags' in item else None
-            tags_json = json.dumps(tags_val) if tags_val is not None else None
-            cursor.execute(sql, (
-                item.get('book_id'),
-                item.get('title') if 'title' in item else None,
-                item.get('cover_url') if 'cover_url' in item else None,
-                item.get('author') if 'author' in item else None,
-                item.get('intro') if 'intro' in item else None,
-                tags_json,
-                item.get('word_count') if 'word_count' in item else None,
-                item.get('popularity') if 'popularity' in item else None,
-                item.get('favorites') if 'favorites' in item else None,
-                item.get('status') if 'status' in item else None,
-                item.get('sign_status') if 'sign_status' in item else None,
-                item.get('last_update') if 'last_update' in item else None,
-                item.get('detail_url') if 'detail_url' in item else None
-            ))
+            sql = self.backend.upsert_sql('novels', NOVEL_COLUMNS, {
+                col: 'coalesce' for col in NOVEL_COLUMNS[1:]
+            })
+            cursor.execute(sql, params)
             self.connection.commit()
             logger.debug(f"小说保存成功: {item.get('book_id')} - {cursor.rowcount}行受影响")
+        self._remember('novels', params[0], params)
 
     def save_novel_volume(self, item):
         """保存小说卷信息"""
+        params = tuple(item.get(col) for col in VOLUME_COLUMNS)
+        if self._unchanged('novel_volumes', params[:2], params):
+            return
         with self.connection.cursor() as cursor:
-            sql = """
-                INSERT INTO novel_volumes (
-                    book_id, volume_index, volume_title, volume_word_count, volume_desc
-                ) VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    volume_title=VALUES(volume_title),
-                    volume_word_count=VALUES(volume_word_count),
-                    volume_desc=VALUES(volume_desc)
-            """
-            cursor.execute(sql, (
-                item.get('book_id'), item.get('volume_index'), item.get('volume_title'),
-                item.get('volume_word_count'), item.get('volume_desc')
-            ))
+            sql = self.backend.upsert_sql('novel_volumes', VOLUME_COLUMNS, VOLUME_UPDATES)
+            cursor.execute(sql, params)
             self.connection.commit()
+        self._remember('novel_volumes', params[:2], params)
 
     def save_novel_chapter(self, item):
         """保存小说章节信息"""
         with self.connection.cursor() as cursor:
-            sql = """
-                INSERT INTO novel_chapters (
-                    book_id, volume_index, chapter_url, chapter_title
-                ) VALUES (%s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    chapter_title=VALUES(chapter_title)
-            """
+            chapter_id = item.get('chapter_id')
+            if chapter_id is None:
+                chapter_id = fingerprint.chapter_id(item.get('chapter_url'))
+            sql = self.backend.upsert_sql('novel_chapters', CHAPTER_COLUMNS, CHAPTER_UPDATES)
             cursor.execute(sql, (
-                item.get('book_id'), item.get('volume_index'),
-                item.get('chapter_url'), item.get('chapter_title')
+                item.get('book_id'), item.get('volume_index'), chapter_id,
+                item.get('chapter_index'), item.get('chapter_url'), item.get('chapter_title')
             ))
             self.connection.commit()
 
+    def save_chapter_batch(self, item):
+        """批量保存一本书的卷与章节：卷、章节各一条多行 UPSERT，同一事务提交"""
+        book_id = item.get('book_id')
+        volumes = item.get('volumes') or {}
+        chapters = item.get('chapters') or {}
+        volume_rows = []
+        for row in zip(*(volumes.get(col, ()) for col in VOLUME_BATCH_FIELDS)):
+            params = (book_id,) + row
+            if not self._unchanged('novel_volumes', params[:2], params):
+                volume_rows.append(params)
+        chapter_rows = [
+            (book_id, volume_index,
+             chapter_id if chapter_id is not None else fingerprint.chapter_id(chapter_url),
+             chapter_index, chapter_url, chapter_title)
+            for volume_index, chapter_id, chapter_index, chapter_url, chapter_title
+            in zip(*(chapters.get(col, ()) for col in CHAPTER_BATCH_FIELDS))
+        ]
+        if not volume_rows and not chapter_rows:
+            return
+        with self.connection.cursor() as cursor:
+            # pymysql 把 INSERT ... VALUES 的 executemany 改写为一条多行语句
+            if volume_rows:
+                cursor.executemany(
+                    self.backend.upsert_sql('novel_volumes', VOLUME_COLUMNS, VOLUME_UPDATES), volume_rows
+                )
+            if chapter_rows:
+                cursor.executemany(
+                    self.backend.upsert_sql('novel_chapters', CHAPTER_COLUMNS, CHAPTER_UPDATES), chapter_rows
+                )
+            self.connection.commit()
+        for params in volume_rows:
+            self._remember('novel_volumes', params[:2], params)
+        logger.debug(f"卷/章节批量保存成功: {book_id} - {len(volume_rows)} 卷, {len(chapter_rows)} 章")
+
     def save_novel_comment(self, item):
         """保存小说评论"""
+        create_time = item.get('create_time')
+        if create_time is None and self.backend.comment_partitioned:
+            # 分区布局中 create_time 是主键的一部分，不能为空
+            create_time = storage.UNKNOWN_COMMENT_TIME
+        params = (
+            item.get('comment_id'), item.get('book_id'), item.get('user_name'),
+            item.get('content'), create_time, item.get('like_count')
+        )
+        if self._unchanged('novel_comments', params[0], params):
+            return
         with self.connection.cursor() as cursor:
-            sql = """
-                INSERT INTO novel_comments (
-                    comment_id, book_id, user_name, content, create_time, like_count
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    content=VALUES(content), like_count=VALUES(like_count)
-            """
-            cursor.execute(sql, (
-                item.get('comment_id'), item.get('book_id'), item.get('user_name'),
-                item.get('content'), item.get('create_time'), item.get('like_count')
-            ))
+            sql = self.backend.upsert_sql('novel_comments', (
+                'comment_id', 'book_id', 'user_name', 'content', 'create_time', 'like_count'
+            ), {'content': 'replace', 'like_count': 'replace'})
+            cursor.execute(sql, params)
             self.connection.commit()
+        self._remember('novel_comments', params[0], params)
 
     def save_crawl_status(self, item):
         """保存爬取状态"""
@@ -351,32 +389,65 @@ class DatabasePipeline:
                 identifier = item.get('identifier')
                 status = item.get('status')
 
-                # 如果是失败状态，自动查询现有重试次数并自增
+                # 查询现有记录：旧状态用于维护汇总表，失败状态的重试次数在此基础上自增
+                cursor.execute("""
+                    SELECT status, retry_count FROM crawl_status
+                    WHERE spider_name=%s AND status_type=%s AND identifier=%s
+                """, (spider_name, status_type, identifier))
+                result = cursor.fetchone()
                 retry_count = item.get('retry_count', 0)
                 if status == 'failed':
-                    # 查询现有记录的retry_count
-                    cursor.execute("""
-                        SELECT retry_count FROM crawl_status
-                        WHERE spider_name=%s AND status_type=%s AND identifier=%s
-                    """, (spider_name, status_type, identifier))
-                    result = cursor.fetchone()
-                    existing_retry_count = result[0] if result else 0
-                    retry_count = existing_retry_count + 1
-
-                sql = """
-                    INSERT INTO crawl_status (
-                        spider_name, status_type, identifier, status, retry_count
-                    ) VALUES (%s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        status=VALUES(status), retry_count=VALUES(retry_count)
-                """
+                    existing_retry_count = result[1] if result else 0
+                    retry_count = (existing_retry_count or 0) + 1
+
+                sql = self.backend.upsert_sql('crawl_status', (
+                    'spider_name', 'status_type', 'identifier', 'status', 'retry_count'
+                ), {'status': 'replace', 'retry_count': 'replace'})
                 cursor.execute(sql, (
                     spider_name, status_type, identifier, status, retry_count
                 ))
                 self.connection.commit()
                 logger.debug(f"状态保存成功: {spider_name}-{status_type}-{identifier} -> {status} (重试:{retry_count})")
 
+            # 提交成功后再记录增量，重连重试时不会重复计数
+            new_status = status or 'pending'
+            old_status = (result[0] or 'pending') if result else None
+            if old_status != new_status:
+                self._status_deltas[(spider_name, status_type, new_status)] += 1
+                if old_status is not None:
+                    self._status_deltas[(spider_name, status_type, old_status)] -= 1
+            if time.monotonic() - self._summary_flushed_at >= self.summary_flush_interval:
+                self._flush_status_summary()
+
         self._execute_with_lock(_save_status)
+        if item.get('status') == 'completed':
+            self._cache_completed(item)
+
+    def _cache_completed(self, item):
+        """把刚完成的页面写入 Redis 完成位图与计数（一次往返），其他进程和分片随即可以跳过"""
+        if not self.redis_client:
+            return
+        try:
+            redis_status.cache_completed(self.redis_client, [
+                (item.get('spider_name'), item.get('status_type'), item.get('identifier'))
+            ])
+        except Exception as e:
+            logger.warning(f"写入Redis完成位图失败: {e}")
+
+    def _flush_status_summary(self):
+        """把累积的状态增量合并写入 crawl_status_summary（调用方持有连接锁）"""
+        self._summary_flushed_at = time.monotonic()
+        deltas = [(*key, delta) for key, delta in self._status_deltas.items() if delta]
+        if not deltas:
+            self._status_deltas.clear()
+            return
+        sql = self.backend.upsert_sql('crawl_status_summary', (
+            'spider_name', 'status_type', 'status', 'row_count'
+        ), {'row_count': 'add'})
+        with self.connection.cursor() as cursor:
+            cursor.executemany(sql, deltas)
+        self.connection.commit()
+        self._status_deltas.clear()
 
     def get_crawl_status(self, spider_name, status_type, identifier):
         """获取爬取状态"""
@@ -391,6 +462,28 @@ class DatabasePipeline:
 
         return self._execute_with_lock(_get_status) or ('pending', 0)
 
+    def fetch_pending_book_ids(self, spider_name, status_type, after=None, limit=1000):
+        """按 book_id 键集分页查询 novels 中尚未完成指定状态的书籍
+
+        使用 ``book_id > after`` 代替 OFFSET，每页都走主键索引，深分页不退化。
+        """
+        def _fetch():
+            with self.connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT n.book_id FROM novels n
+                    WHERE n.book_id > %s
+                      AND NOT EXISTS (
+                          SELECT 1 FROM crawl_status s
+                          WHERE s.spider_name=%s AND s.status_type=%s
+                            AND s.identifier=n.book_id AND s.status='completed'
+                      )
+                    ORDER BY n.book_id
+                    LIMIT %s
+                """, (after or '', spider_name, status_type, limit))
+                return [row[0] for row in cursor.fetchall()]
+
+        return self._execute_with_lock(_fetch) or []
+
     def update_crawl_status(self, spider_name, status_type, identifier, status, retry_count=0):
         """更新爬取状态"""
         item = CrawlStatusItem()
@@ -406,8 +499,7 @@ class DatabasePipeline:
         if not self.redis_client:
             return False
         try:
-            cache_key = f"url_cache:{url}"
-            return bool(self.redis_client.exists(cache_key))
+            return redis_status.url_cached(self.redis_client, url, expire_time)
         except:
             return False
 
@@ -416,7 +508,6 @@ class DatabasePipeline:
         if not self.redis_client:
             return
         try:
-            cache_key = f"url_cache:{url}"
-            self.redis_client.setex(cache_key, expire_time, "1")
+            redis_status.cache_url(self.redis_client, url, expire_time)
         except:
             pass
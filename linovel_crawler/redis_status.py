@@ -0,0 +1,336 @@
+"""
+Redis 断点缓存的键布局与统计
+
+ResumeCrawlerMiddleware / DatabasePipeline 写入、check_redis / reset_data 读取与清理的
+Redis 键集中在这里定义。完成状态按 fingerprint 的整数键压缩为位图，不再每页一个字符串键；
+中间件启动时从数据库预加载，DatabasePipeline 在每个页面完成时写入，多个进程与分片共享：
+
+- ``crawl_status_bits:novel_list:list_page:<shard>`` / ``crawl_status_bits:novel_detail:detail_page:<shard>``：
+  列表页码、book_id 按 65536 一段分片的位图（每段最多 8KB），位偏移为号码的低16位
+- ``crawl_status_bits:novel_comment:comment_page:<shard>``：评论页按 book_id 每 1024 本一段分片的位图，
+  每本书占一个32位槽位，依次对应第1~32页（每片 4KB）；``BITFIELD GET u32`` 一条命令即可取出整本书的完成页
+- ``crawl_status_bits:novel_comment:comment_page:overflow:<book_id>``：超过32页的评论页码集合（少数书才有）
+- ``url_cache:<时间桶>``：已跳过请求的短期缓存，按 TTL 分桶的集合，成员为请求指纹整数，
+  查询时同时检查当前桶与上一个桶（实际有效期在 1 到 2 个 TTL 之间）
+- ``crawl_stats:<spider>:<type>:completed``：HyperLogLog 计数，与位图同一次管道往返写入，
+  诊断时用 PFCOUNT 常数时间得到近似完成数，不需要遍历键空间
+
+位图和计数的过期时间随每次写入刷新；旧版本写入的 ``crawl_status:*`` 字符串键不再读取，
+到期后自动删除，也可以用 reset_data 的 --clear-redis 立即清理。
+
+所有批量读写都按批使用非事务管道；遍历键空间只用增量 SCAN，不使用会阻塞服务端的 KEYS。
+"""
+
+import time
+
+from linovel_crawler import fingerprint
+
+BITS_PREFIX = 'crawl_status_bits:'
+URL_CACHE_PREFIX = 'url_cache:'
+STATS_PREFIX = 'crawl_stats:'
+# 旧版本每页一个的字符串键，仅用于诊断和清理
+LEGACY_STATUS_PREFIX = 'crawl_status:'
+
+COMPLETED_TTL = 86400
+URL_CACHE_TTL = 3600
+
+# 列表页/详情页位图的分片大小（位数的对数）：每片 65536 位，即 8KB
+SHARD_BITS = 16
+_SHARD_MASK = (1 << SHARD_BITS) - 1
+# 评论页位图：每本书 2**5=32 个页码槽位，每片 2**10=1024 本书
+COMMENT_SLOT_BITS = 5
+COMMENT_SLOT_PAGES = 1 << COMMENT_SLOT_BITS
+COMMENT_SHARD_BITS = 10
+_COMMENT_SHARD_MASK = (1 << COMMENT_SHARD_BITS) - 1
+OVERFLOW_TAG = 'overflow'
+
+# 写入完成状态的 (spider_name, status_type)，与 fingerprint.STATUS_TYPES 一致
+STATUS_TYPES = tuple(fingerprint.STATUS_TYPES.values())
+
+# 清理/诊断时覆盖的全部键前缀
+KEY_PATTERNS = (f'{BITS_PREFIX}*', f'{URL_CACHE_PREFIX}*', f'{STATS_PREFIX}*', f'{LEGACY_STATUS_PREFIX}*')
+
+
+def completed_hll_key(spider_name, status_type):
+    return f"{STATS_PREFIX}{spider_name}:{status_type}:completed"
+
+
+def completed_bit(key):
+    """fingerprint 整数键 -> (Redis 键, 位偏移)；位偏移为 None 表示页码存放在溢出集合中
+
+    非请求级的键返回 None。
+    """
+    kind, primary, secondary = fingerprint.unpack(key)
+    names = fingerprint.STATUS_TYPES.get(kind)
+    if names is None:
+        return None
+    prefix = f"{BITS_PREFIX}{names[0]}:{names[1]}"
+    if kind != fingerprint.KIND_COMMENT:
+        return f"{prefix}:{primary >> SHARD_BITS}", primary & _SHARD_MASK
+    if not 1 <= secondary <= COMMENT_SLOT_PAGES:
+        return f"{prefix}:{OVERFLOW_TAG}:{primary}", None
+    return f"{prefix}:{primary >> COMMENT_SHARD_BITS}", _comment_slot(primary) + secondary - 1
+
+
+def _comment_slot(book_id):
+    return (book_id & _COMMENT_SHARD_MASK) << COMMENT_SLOT_BITS
+
+
+def _queue_set(pipe, key):
+    redis_key, offset = completed_bit(key)
+    if offset is None:
+        pipe.sadd(redis_key, fingerprint.unpack(key)[2])
+    else:
+        pipe.setbit(redis_key, offset, 1)
+    return redis_key
+
+
+def _queue_get(pipe, key):
+    redis_key, offset = completed_bit(key)
+    if offset is None:
+        pipe.sismember(redis_key, fingerprint.unpack(key)[2])
+    else:
+        pipe.getbit(redis_key, offset)
+
+
+def cache_completed(redis_client, rows, batch_size=1000, ttl=COMPLETED_TTL):
+    """把 (spider_name, status_type, identifier) 记入完成位图并更新计数，返回写入条数
+
+    每 ``batch_size`` 条一次管道往返；同一批中的位图只刷新一次过期时间。
+    无法转换为请求键的状态（如 book_comments）忽略。
+    """
+    written = 0
+    pipe = redis_client.pipeline(transaction=False)
+    bitmaps = set()
+    members = {}
+    for spider_name, status_type, identifier in rows:
+        key = fingerprint.from_status_parts(spider_name, status_type, identifier)
+        if key is None:
+            continue
+        bitmaps.add(_queue_set(pipe, key))
+        members.setdefault(completed_hll_key(spider_name, status_type), []).append(identifier)
+        written += 1
+        if written % batch_size == 0:
+            _flush(pipe, bitmaps, members, ttl)
+            bitmaps, members = set(), {}
+    _flush(pipe, bitmaps, members, ttl)
+    return written
+
+
+def _flush(pipe, bitmaps, members, ttl):
+    for bitmap in bitmaps:
+        pipe.expire(bitmap, ttl)
+    for hll_key, identifiers in members.items():
+        pipe.pfadd(hll_key, *identifiers)
+        pipe.expire(hll_key, ttl)
+    pipe.execute()
+
+
+def _url_buckets(ttl, now=None):
+    bucket = int((time.time() if now is None else now) // ttl)
+    return f"{URL_CACHE_PREFIX}{bucket}", f"{URL_CACHE_PREFIX}{bucket - 1}"
+
+
+def cache_url(redis_client, url, ttl=URL_CACHE_TTL):
+    """把请求指纹加入当前时间桶（一次往返）"""
+    current, _ = _url_buckets(ttl)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.sadd(current, fingerprint.request_fingerprint(url))
+    pipe.expire(current, ttl * 2)
+    pipe.execute()
+
+
+def lookup(redis_client, key, url, ttl=URL_CACHE_TTL):
+    """一次往返检查完成位图与 URL 缓存，返回 (已完成, URL已缓存)
+
+    ``key`` 为 fingerprint 整数键，无法识别的 URL 传 None，只检查 URL 缓存。
+    """
+    checked = key is not None and completed_bit(key) is not None
+    member = fingerprint.request_fingerprint(url)
+    pipe = redis_client.pipeline(transaction=False)
+    if checked:
+        _queue_get(pipe, key)
+    for bucket in _url_buckets(ttl):
+        pipe.sismember(bucket, member)
+    results = pipe.execute()
+    completed = bool(results[0]) if checked else False
+    return completed, any(results[-2:])
+
+
+def url_cached(redis_client, url, ttl=URL_CACHE_TTL):
+    return lookup(redis_client, None, url, ttl)[1]
+
+
+def completed_pages(redis_client, book_id):
+    """一本书已完成的评论页码：一次往返读取32位槽位与溢出集合"""
+    slot_key, offset = completed_bit(fingerprint.pack(fingerprint.KIND_COMMENT, book_id, 1))
+    overflow_key, _ = completed_bit(fingerprint.pack(fingerprint.KIND_COMMENT, book_id, 0))
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.bitfield(slot_key).get(f'u{COMMENT_SLOT_PAGES}', offset).execute()
+    pipe.smembers(overflow_key)
+    (mask,), overflow = pipe.execute()
+    pages = [page for page in range(1, COMMENT_SLOT_PAGES + 1)
+             if mask & (1 << (COMMENT_SLOT_PAGES - page))]
+    return pages + sorted(int(page) for page in overflow)
+
+
+def counters(redis_client, ttl=URL_CACHE_TTL):
+    """各 (spider, type) 的近似完成数与 url_cache 成员数，一次往返
+
+    HyperLogLog 随预加载和每个页面完成时更新，只增不减，位图过期后计数不会随之减少，
+    结果是最近一个 TTL 周期内记录过的完成数（误差约 0.8%）；url_cache 为两个时间桶的成员数之和。
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    for spider_name, status_type in STATUS_TYPES:
+        pipe.pfcount(completed_hll_key(spider_name, status_type))
+    for bucket in _url_buckets(ttl):
+        pipe.scard(bucket)
+    results = pipe.execute()
+    counts = {names: count for names, count in zip(STATUS_TYPES, results)}
+    counts['url_cache'] = sum(results[-2:])
+    return counts
+
+
+def scan_batches(redis_client, pattern, batch_size=1000, limit=0, pause=0.0):
+    """增量 SCAN 匹配的键，按批产出键列表
+
+    服务端每次只处理 ``batch_size`` 个槽位，不会像 KEYS 那样长时间阻塞；
+    ``pause`` 为批间休眠秒数，``limit`` 大于 0 时最多返回这么多键。
+    """
+    cursor = 0
+    seen = 0
+    while True:
+        cursor, keys = redis_client.scan(cursor, match=pattern, count=batch_size)
+        if keys:
+            if limit:
+                keys = keys[:limit - seen]
+            seen += len(keys)
+            yield keys
+        if cursor == 0 or (limit and seen >= limit):
+            return
+        if pause:
+            time.sleep(pause)
+
+
+def delete_keys(redis_client, batches, chunk_size=1000, progress=None):
+    """按块删除键，返回删除的键数
+
+    ``batches`` 为键列表的可迭代对象（如 scan_batches 的结果）。每个块一条 ``UNLINK``
+    （服务端在后台线程释放内存，不阻塞），累计到 10 个块再一次管道往返提交；
+    Redis 4.0 以下不支持 UNLINK 时改用 DEL。``progress(累计删除数)`` 在每次提交后调用。
+    """
+    state = {'deleted': 0, 'unlink': True}
+    pending = []
+
+    def flush():
+        if not pending:
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        for chunk in pending:
+            if state['unlink']:
+                pipe.unlink(*chunk)
+            else:
+                pipe.delete(*chunk)
+        try:
+            results = pipe.execute()
+        except Exception as e:
+            if not state['unlink'] or 'unknown command' not in str(e).lower():
+                raise
+            state['unlink'] = False
+            return flush()
+        state['deleted'] += sum(results)
+        pending.clear()
+        if progress:
+            progress(state['deleted'])
+
+    buffer = []
+    for keys in batches:
+        buffer.extend(keys)
+        while len(buffer) >= chunk_size:
+            pending.append(buffer[:chunk_size])
+            del buffer[:chunk_size]
+            if len(pending) >= 10:
+                flush()
+    if buffer:
+        pending.append(buffer)
+    flush()
+    return state['deleted']
+
+
+def delete_matching(redis_client, patterns, batch_size=1000, pause=0.0, progress=None):
+    """增量 SCAN 并批量 UNLINK 匹配任一模式的键，返回删除的键数"""
+    def batches():
+        for pattern in patterns:
+            yield from scan_batches(redis_client, pattern, batch_size, pause=pause)
+
+    return delete_keys(redis_client, batches(), batch_size, progress)
+
+
+def _in_range(book_id, book_from, book_to):
+    return (book_id is not None
+            and (book_from is None or book_id >= book_from)
+            and (book_to is None or book_id <= book_to))
+
+
+def clear_completed(redis_client, spider_name=None, status_type=None, book_from=None, book_to=None,
+                    batch_size=1000, progress=None):
+    """清除选中的完成状态，返回 (删除的键数, 逐本清零的 book_id 数)
+
+    未指定 book 范围时按前缀整体删除所选 (spider, type) 的位图、计数与旧版字符串键；
+    指定范围时只处理带 book_id 的状态（不含列表页）：分片完全落在范围内的整片删除，
+    部分重叠的分片逐本清零（评论页为整本书的32位槽位），溢出集合与旧版键按 book_id 过滤。
+    HyperLogLog 计数无法删除单个成员，按范围清除时保留。url_cache 不区分 spider，总是整体删除。
+    """
+    by_range = book_from is not None or book_to is not None
+    deleted = delete_matching(redis_client, [f"{URL_CACHE_PREFIX}*"], batch_size)
+    cleared = 0
+    for kind, (spider, type_name) in fingerprint.STATUS_TYPES.items():
+        if ((spider_name and spider != spider_name) or (status_type and type_name != status_type)
+                or (by_range and kind == fingerprint.KIND_LIST)):
+            continue
+        prefix = f"{BITS_PREFIX}{spider}:{type_name}:"
+        legacy_prefix = f"{LEGACY_STATUS_PREFIX}{spider}:{type_name}:"
+        if not by_range:
+            deleted += delete_matching(
+                redis_client, [completed_hll_key(spider, type_name), f"{prefix}*", f"{legacy_prefix}*"],
+                batch_size, progress=progress)
+            continue
+
+        doomed = []
+        pipe = redis_client.pipeline(transaction=False)
+        for keys in scan_batches(redis_client, f"{prefix}*", batch_size):
+            for key in keys:
+                suffix = key[len(prefix):]
+                if suffix.startswith(f"{OVERFLOW_TAG}:"):
+                    if _in_range(int(suffix[len(OVERFLOW_TAG) + 1:]), book_from, book_to):
+                        doomed.append(key)
+                    continue
+                cleared += _clear_shard(pipe, key, kind, int(suffix), book_from, book_to, doomed, batch_size)
+        pipe.execute()
+        for keys in scan_batches(redis_client, f"{legacy_prefix}*", batch_size):
+            doomed.extend(key for key in keys
+                          if _in_range(fingerprint.status_book_id(type_name, key[len(legacy_prefix):]),
+                                       book_from, book_to))
+        deleted += delete_keys(redis_client, [doomed], batch_size, progress)
+    return deleted, cleared
+
+
+def _clear_shard(pipe, key, kind, shard, book_from, book_to, doomed, batch_size):
+    """分片完全在范围内时加入待删除列表，否则逐本清零重叠部分；返回逐本清零的 book_id 数"""
+    shard_bits = COMMENT_SHARD_BITS if kind == fingerprint.KIND_COMMENT else SHARD_BITS
+    first, last = shard << shard_bits, ((shard + 1) << shard_bits) - 1
+    low = first if book_from is None else max(first, book_from)
+    high = last if book_to is None else min(last, book_to)
+    if low > high:
+        return 0
+    if low == first and high == last:
+        doomed.append(key)
+        return 0
+    for book_id in range(low, high + 1):
+        if kind == fingerprint.KIND_COMMENT:
+            pipe.bitfield(key).set(f'u{COMMENT_SLOT_PAGES}', _comment_slot(book_id), 0).execute()
+        else:
+            pipe.setbit(key, book_id & _SHARD_MASK, 0)
+        if len(pipe) >= batch_size:
+            pipe.execute()
+    return high - low + 1
@@ -0,0 +1,90 @@
+"""
+行内容摘要缓存
+
+DatabasePipeline 写入前按 (表, 主键) 查询上次写入的内容摘要，内容相同则跳过 UPSERT，
+避免刷新爬取时大量未变化的行仍触发 ``updated_at`` 更新与 redo/binlog 写入。
+
+- 键与内容都压缩为64位整数摘要，每条约占一百多字节内存，按 LRU 淘汰
+- 可选持久化到本地文件（每条16字节），下次运行继续使用；只在有新写入时保存
+
+缓存只反映本进程（及其持久化文件）写入过的内容：其他进程或人工修改数据库后，
+相同内容的 item 仍会被跳过，需要强制全量写入时关闭 ROW_HASH_CACHE_ENABLED 或删除缓存文件。
+"""
+
+import hashlib
+import logging
+import os
+from array import array
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(value) -> int:
+    return int.from_bytes(hashlib.blake2b(repr(value).encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class RowHashCache:
+    """(表, 主键) -> 内容摘要 的 LRU 缓存"""
+
+    def __init__(self, max_size=200000, path=None):
+        self.max_size = max(1, int(max_size))
+        self.path = path
+        self._rows = OrderedDict()
+        self._loaded = path is None
+        self._dirty = False
+
+    def _load(self):
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        data = array('Q')
+        try:
+            with open(self.path, 'rb') as f:
+                data.frombytes(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning(f"行摘要缓存文件读取失败，忽略: {e}")
+            return
+        # 文件按从旧到新的顺序保存，只保留最新的 max_size 条
+        start = max(0, len(data) // 2 - self.max_size) * 2
+        for i in range(start, len(data) - 1, 2):
+            self._rows[data[i]] = data[i + 1]
+        logger.info(f"已加载行摘要缓存 {len(self._rows)} 条: {self.path}")
+
+    def unchanged(self, table, key, values) -> bool:
+        """本行内容与上次写入的内容相同时返回 True"""
+        if not self._loaded:
+            self._load()
+        row_key = _digest((table, key))
+        if self._rows.get(row_key) != _digest(values):
+            return False
+        self._rows.move_to_end(row_key)
+        return True
+
+    def remember(self, table, key, values):
+        """写入成功后记录本行内容摘要"""
+        if not self._loaded:
+            self._load()
+        row_key = _digest((table, key))
+        self._rows[row_key] = _digest(values)
+        self._rows.move_to_end(row_key)
+        if len(self._rows) > self.max_size:
+            self._rows.popitem(last=False)
+        self._dirty = True
+
+    def __len__(self):
+        return len(self._rows)
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = array('Q')
+        for row_key, digest in self._rows.items():
+            data.append(row_key)
+            data.append(digest)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            data.tofile(f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -21,6 +21,7 @@ USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTM
 ROBOTSTXT_OBEY = False
 
 # Concurrency and throttling settings
+# (per-endpoint values are tuned at runtime by AdaptiveThrottleMiddleware when enabled, see below)
 CONCURRENT_REQUESTS = 16
 CONCURRENT_REQUESTS_PER_DOMAIN = 8
 DOWNLOAD_DELAY = 0.1
@@ -40,15 +41,32 @@ DOWNLOAD_DELAY = 0.1
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 SPIDER_MIDDLEWARES = {
+    "linovel_crawler.middlewares.PriorityPolicyMiddleware": 540,
     "linovel_crawler.middlewares.ResumeCrawlerMiddleware": 543,
     "linovel_crawler.middlewares.DuplicateRequestFilterMiddleware": 544,
 }
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "linovel_crawler.middlewares.LinovelCrawlerDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    # Must sit after RetryMiddleware (550) to observe 429/5xx before they are retried
+    "linovel_crawler.middlewares.AdaptiveThrottleMiddleware": 600,
+}
+
+# Adaptive per-endpoint throttling (list/detail/comment get their own download slot).
+# Each window of responses either halves concurrency and doubles the delay
+# (429, 5xx/network error rate or latency above target) or adds one to concurrency
+# and shrinks the delay. CONCURRENT_REQUESTS_PER_DOMAIN and DOWNLOAD_DELAY act as defaults.
+ADAPTIVE_THROTTLE_ENABLED = False  # Opt in; off keeps the fixed concurrency and delay above
+ADAPTIVE_THROTTLE_TARGET_LATENCY = 2.0  # Seconds
+ADAPTIVE_THROTTLE_MAX_ERROR_RATE = 0.05
+ADAPTIVE_THROTTLE_MAX_DELAY = 10.0
+ADAPTIVE_THROTTLE_WINDOW = 20  # Responses per adjustment
+ADAPTIVE_THROTTLE_ENDPOINTS = {
+    "list": {"concurrency": 2, "max_concurrency": 4},
+    "detail": {"concurrency": 4, "max_concurrency": 8},
+    "comment": {"concurrency": 4, "max_concurrency": 12, "target_latency": 1.0},
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -59,9 +77,57 @@ SPIDER_MIDDLEWARES = {
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
+    "linovel_crawler.pipelines.ItemDedupPipeline": 200,
     "linovel_crawler.pipelines.DatabasePipeline": 300,
+    "linovel_crawler.sinks.SinkFanoutPipeline": 400,
+}
+
+# Extra outputs fanned out in parallel by SinkFanoutPipeline (disabled when empty).
+# Each sink batches in a worker thread; failures and slow sinks never block the crawl.
+# Common options: item_classes, batch_size, flush_interval, max_pending
+STORAGE_SINKS = {
+    # "linovel_crawler.sinks.JsonLinesSink": {"path": "storage/sinks/{spider}/{item}.jsonl"},
+    # "linovel_crawler.sinks.ColumnarSink": {"file_format": "parquet", "item_classes": ["linovel_crawler.items.NovelCommentItem"]},
+    # "linovel_crawler.sinks.RedisQueueSink": {"key": "sink:{spider}:{item}", "max_length": 100000},
 }
 
+# Storage backend used by DatabasePipeline: mysql (network) | sqlite (embedded, WAL)
+STORAGE_BACKEND = 'mysql'
+SQLITE_PATH = 'storage/db/linovel.sqlite3'
+SQLITE_COMMIT_EVERY = 500  # Writes per SQLite transaction
+SQLITE_COMMIT_INTERVAL = 1.0  # Max seconds between SQLite commits
+CHAPTER_MIGRATION_BATCH_SIZE = 5000  # Rows per batch for MySQL table migrations (chapter_id backfill, comment conversion)
+STATUS_SUMMARY_FLUSH_INTERVAL = 5.0  # Seconds between crawl_status_summary counter flushes
+
+# Drop volume/chapter items already seen in this process (shared by all spiders of run_all_spiders)
+ITEM_DEDUP_ENABLED = True
+ITEM_DEDUP_MAX_ENTRIES = 500000  # Bounded set of 64-bit keys; oldest 10% evicted when full
+
+# Yield chapters/comments as slotted dataclasses (NovelChapterRecord / NovelCommentRecord) instead of
+# scrapy.Item: ~80 vs ~500 bytes per item (see benchmark_items.py). Sinks filtering on item_classes
+# must list the *Record classes as well.
+LIGHTWEIGHT_ITEMS = False
+
+# Emit one NovelChapterBatchItem (columnar volumes/chapters) per detail page instead of one item per
+# volume and chapter; DatabasePipeline writes each batch with one multi-row upsert per table
+CHAPTER_BATCH_ITEMS = False
+
+# Skip novel/volume/comment upserts whose content matches what this pipeline last wrote
+ROW_HASH_CACHE_ENABLED = True
+ROW_HASH_CACHE_SIZE = 200000  # LRU entries (~150 bytes each in memory, 16 bytes on disk)
+# Persist the cache across runs, e.g. 'storage/state/{spider}_rowhash.bin'. Delete the file (or run
+# reset_data.py --clear-local) after truncating tables, otherwise unchanged rows will not be rewritten.
+ROW_HASH_CACHE_PATH = None
+
+# novel_comments layout (MySQL): standard | partitioned
+# partitioned: PRIMARY KEY (book_id, create_time, comment_id), monthly RANGE partitions on create_time,
+# no foreign key (check orphans with maintain_comments.py). Convert an existing table with
+# `python maintain_comments.py --convert` while comment spiders are stopped.
+COMMENT_TABLE_LAYOUT = 'standard'
+COMMENT_FOREIGN_KEY = True  # standard layout only; False drops the FK check from every comment insert
+COMMENT_PARTITION_START = '2018-01'  # Older comments go to the p_history partition
+COMMENT_PARTITIONS_AHEAD = 12  # Monthly partitions kept ahead of the current month (added on startup)
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 #AUTOTHROTTLE_ENABLED = True
@@ -85,6 +151,18 @@ ITEM_PIPELINES = {
 
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
+FEED_EXPORTERS = {
+    "parquet": "linovel_crawler.export.ParquetItemExporter",
+    "arrow": "linovel_crawler.export.ArrowItemExporter",
+}
+
+# Columnar export (export_data.py; requires the optional pyarrow dependency)
+EXPORT_DIR = 'storage/exports'
+EXPORT_FORMAT = 'parquet'  # parquet | arrow
+EXPORT_PARTITION_BY = 'date'  # date (updated_at/created_at) | book_id (hashed buckets) | none
+EXPORT_BATCH_SIZE = 10000  # Rows fetched from the server-side cursor and written per row group
+EXPORT_BOOK_BUCKETS = 64
+EXPORT_MAX_OPEN_FILES = 32  # Partition files kept open at once; older ones are closed and a new part is started
 
 # Logging configuration
 LOG_LEVEL = 'DEBUG'
@@ -99,14 +177,38 @@ RETRY_HTTP_CODES = [500, 502, 503, 504, 408, 429]  # HTTP codes to retry
 
 # Resume crawler settings
 RESUME_MAX_RETRY_COUNT = 3  # Maximum retry count before giving up
+RESUME_NEGATIVE_CACHE_TTL = 300  # Seconds a known-not-completed key skips Redis/DB lookups (0 disables)
+RESUME_NEGATIVE_CACHE_SIZE = 100000  # Max entries in the negative cache per spider
+RESUME_REDIS_LOOKUP = True  # Check Redis for keys completed by other processes
+RESUME_STATE_PATH = 'storage/state/{spider}_status.json'  # LocalStateStore file; {spider} is the spider name
+RESUME_PRELOAD_BATCH_SIZE = 5000  # Rows fetched per batch when streaming crawl_status at spider start
+
+# Scheduling priority policy
+PRIORITY_POLICY = 'none'  # Opt in: depth (comment > detail > list) | breadth (list > detail > comment) | none
+PRIORITY_BOOK_MAX_OUTSTANDING = 4  # Requests per book beyond this are demoted (0 = no cap)
+PRIORITY_OUTSTANDING_PENALTY = 30  # Priority subtracted from requests over the per-book cap
+PRIORITY_POPULARITY_BOOSTS = {100000: 3, 1000000: 6}  # popularity threshold -> priority boost
+PRIORITY_POPULARITY_CACHE_SIZE = 50000  # Max books whose popularity is remembered
+
+# Duplicate request filter settings
+DEDUP_BACKEND = 'memory'  # memory | disk (persisted under JOBDIR) | redis (shared across processes)
+DEDUP_MAX_ENTRIES = 2000000  # Max fingerprints kept in memory (0 = unbounded); oldest are evicted first
+DEDUP_FLUSH_EVERY = 1000  # disk backend: append to file every N new fingerprints
+DEDUP_REDIS_BLOOM = False  # redis backend: use RedisBloom BF.ADD instead of a SET
+DEDUP_REDIS_TTL = 0  # redis backend: expire the shared set after N seconds (0 = never)
 
 # List page crawling settings
 DEFAULT_MAX_PAGES = 10  # Default maximum pages to crawl when total pages cannot be determined
+# Bounded frontier: generate list pages lazily while fewer than this many requests are
+# queued or in progress (0 = yield every list page up front; opt in with e.g. 200)
+FRONTIER_MAX_PENDING = 0
+FRONTIER_POLL_INTERVAL = 1.0  # Seconds between capacity checks while the frontier is full
+
+# Bulk book_id input for detail/comment spiders (spider arg book_source=db|<file>|-)
+BOOK_SOURCE_BATCH_SIZE = 1000  # Rows per keyset page when querying pending books from the DB
+
+# Multi-process work queue (run_spiders.py pool)
+WORK_QUEUE_PATH = 'storage/queue/work_queue.sqlite3'
+WORK_QUEUE_BATCH_SIZE = 50  # book_ids claimed per batch by detail/comment workers
+WORK_QUEUE_STALE_SECONDS = 3600  # Claimed but unfinished tasks older than this are re-queued on start
 
-# Create logs directory if it doesn't exist
-import os
-if not os.path.exists('logs'):
-    os.makedirs('logs')
-# Ensure local persistence directories exist for resume/skip
-os.makedirs('storage/state', exist_ok=True)
-os.makedirs('storage/jobs', exist_ok=True)
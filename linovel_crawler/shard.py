@@ -0,0 +1,68 @@
+"""
+分片爬取
+
+``--shard i/N`` 把工作确定性地划分给 N 个互不通信的 worker（i 从 0 开始）：
+
+- 列表页按页码取模：``(page - 1) % N == i``
+- book_id 按数值取模（非数字ID使用 crc32），详情/评论 Spider 只处理归属本分片的书籍
+
+每个分片使用独立的 JOBDIR 与本地状态文件（在原路径后追加 ``_shard<i>of<N>``），
+多个容器可并行运行而不会重复爬取。
+"""
+
+import os
+import zlib
+
+
+def parse(spec):
+    """解析 ``"i/N"``，返回 (index, count)；spec 为空时返回 None"""
+    if not spec:
+        return None
+    if isinstance(spec, tuple):
+        index, count = spec
+    else:
+        try:
+            index, _, count = str(spec).partition('/')
+            index, count = int(index), int(count)
+        except ValueError:
+            raise ValueError(f"无效的分片参数: {spec}，格式应为 i/N") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"无效的分片参数: {spec}，要求 0 <= i < N")
+    return index, count
+
+
+def suffix(shard):
+    return f"_shard{shard[0]}of{shard[1]}"
+
+
+def owns_page(shard, page):
+    if shard is None:
+        return True
+    index, count = shard
+    return (int(page) - 1) % count == index
+
+
+def owns_book(shard, book_id):
+    if shard is None:
+        return True
+    index, count = shard
+    book_id = str(book_id).strip()
+    value = int(book_id) if book_id.isdigit() else zlib.crc32(book_id.encode('utf-8'))
+    return value % count == index
+
+
+def isolate_settings(settings, shard):
+    """为分片追加 JOBDIR 与 RESUME_STATE_PATH 后缀，保留原有的设置优先级
+
+    需在 Spider.from_crawler 中调用（Scrapy 2.11+ 此时 settings 尚未冻结）。
+    """
+    if shard is None:
+        return
+    tag = suffix(shard)
+    jobdir = settings.get('JOBDIR')
+    if jobdir:
+        settings.set('JOBDIR', jobdir.rstrip('/\\') + tag, priority=settings.getpriority('JOBDIR'))
+    state_path = settings.get('RESUME_STATE_PATH')
+    if state_path:
+        root, ext = os.path.splitext(state_path)
+        settings.set('RESUME_STATE_PATH', f"{root}{tag}{ext}", priority=settings.getpriority('RESUME_STATE_PATH'))
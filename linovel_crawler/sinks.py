@@ -0,0 +1,325 @@
+"""
+附加输出（Sink）
+
+SinkFanoutPipeline 把 item 并行分发到 STORAGE_SINKS 中配置的多个输出，
+与写入 MySQL/SQLite 的 DatabasePipeline 相互独立：
+
+- 每个 sink 按 ``item_classes`` 过滤，拥有独立的缓冲区、批大小与刷新间隔；
+- 批量写入在线程池中执行，同一 sink 同时只有一个批次在写，保证顺序；
+- 单个 sink 出错或变慢只影响自身：异常被记录并计数，缓冲区满时丢弃新 item，
+  process_item 始终立即返回，不拖慢主流程。
+
+内置 sink：
+
+- ``JsonLinesSink``：按 item 类型写入本地 JSON Lines 文件
+- ``ColumnarSink``：按 item 类型写入 Parquet / Arrow 文件（需要 pyarrow）
+- ``RedisQueueSink``：RPUSH 到 Redis 列表，作为消息队列的替代
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import time
+
+from itemadapter import ItemAdapter
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.misc import load_object
+from twisted.internet import task, threads
+
+logger = logging.getLogger(__name__)
+
+
+class Sink:
+    """Sink 基类：子类实现 ``write_batch``，批次中的元素为 ``(item_cls, dict)``"""
+
+    name = None
+
+    def __init__(self, item_classes=None, batch_size=500, flush_interval=5.0, max_pending=50000):
+        self.item_classes = tuple(
+            load_object(c) if isinstance(c, str) else c for c in item_classes
+        ) if item_classes else None
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.max_pending = int(max_pending)
+
+    @classmethod
+    def from_crawler(cls, crawler, **options):
+        return cls(**options)
+
+    def accepts(self, item):
+        return self.item_classes is None or isinstance(item, self.item_classes)
+
+    def open(self, spider):
+        pass
+
+    def write_batch(self, batch):
+        raise NotImplementedError
+
+    def close(self, spider):
+        pass
+
+
+def _item_name(item_cls):
+    return item_cls.__name__
+
+
+def _field_names(item_cls):
+    """item 类声明的字段名，兼容 scrapy.Item 与轻量 dataclass item"""
+    fields = getattr(item_cls, 'fields', None)
+    if fields is not None:
+        return list(fields)
+    return [field.name for field in dataclasses.fields(item_cls)]
+
+
+def _json_default(value):
+    return str(value)
+
+
+class JsonLinesSink(Sink):
+    """按 item 类型写入 JSON Lines 文件，路径支持 ``{spider}`` 与 ``{item}`` 占位符"""
+
+    name = 'jsonlines'
+
+    def __init__(self, path='storage/sinks/{spider}/{item}.jsonl', **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._spider_name = None
+        self._files = {}
+
+    def open(self, spider):
+        self._spider_name = spider.name
+
+    def _file_for(self, item_cls):
+        f = self._files.get(item_cls)
+        if f is None:
+            path = self.path.format(spider=self._spider_name, item=_item_name(item_cls))
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            f = self._files[item_cls] = open(path, 'a', encoding='utf-8')
+        return f
+
+    def write_batch(self, batch):
+        touched = set()
+        for item_cls, data in batch:
+            f = self._file_for(item_cls)
+            f.write(json.dumps(data, ensure_ascii=False, default=_json_default))
+            f.write('\n')
+            touched.add(f)
+        for f in touched:
+            f.flush()
+
+    def close(self, spider):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+class ColumnarSink(Sink):
+    """按 item 类型写入 Parquet / Arrow 文件，每次运行生成新文件"""
+
+    name = 'columnar'
+
+    def __init__(self, directory='storage/sinks/{spider}', file_format='parquet', **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.file_format = file_format
+        self._spider_name = None
+        self._run_id = time.strftime('%Y%m%d%H%M%S')
+        self._exporters = {}
+
+    def open(self, spider):
+        from linovel_crawler import export
+
+        export._require_pyarrow()
+        self._spider_name = spider.name
+
+    def _exporter_for(self, item_cls):
+        entry = self._exporters.get(item_cls)
+        if entry is None:
+            from linovel_crawler import export
+
+            directory = self.directory.format(spider=self._spider_name)
+            os.makedirs(directory, exist_ok=True)
+            extension = 'parquet' if self.file_format == 'parquet' else 'arrow'
+            path = os.path.join(directory, f"{_item_name(item_cls)}-{self._run_id}.{extension}")
+            exporter_cls = export.ParquetItemExporter if self.file_format == 'parquet' else export.ArrowItemExporter
+            f = open(path, 'wb')
+            exporter = exporter_cls(f, batch_size=self.batch_size, fields_to_export=_field_names(item_cls))
+            exporter.start_exporting()
+            entry = self._exporters[item_cls] = (f, exporter)
+        return entry[1]
+
+    def write_batch(self, batch):
+        for item_cls, data in batch:
+            self._exporter_for(item_cls).export_item(data)
+
+    def close(self, spider):
+        for f, exporter in self._exporters.values():
+            try:
+                exporter.finish_exporting()
+            finally:
+                f.close()
+        self._exporters.clear()
+
+
+class RedisQueueSink(Sink):
+    """以 Redis 列表作为消息队列：每个 item 序列化为 JSON 后 RPUSH
+
+    ``key`` 支持 ``{spider}`` 与 ``{item}`` 占位符；``max_length`` 大于0时用 LTRIM 保留最新的条目。
+    """
+
+    name = 'redis_queue'
+
+    def __init__(self, key='sink:{spider}:{item}', max_length=0, client=None, **kwargs):
+        super().__init__(**kwargs)
+        self.key = key
+        self.max_length = int(max_length)
+        self.client = client
+        self._spider_name = None
+
+    def open(self, spider):
+        self._spider_name = spider.name
+        if self.client is None:
+            from linovel_crawler.dedup import _redis_client_from_env
+
+            self.client = _redis_client_from_env()
+        self.client.ping()
+
+    def write_batch(self, batch):
+        pipe = self.client.pipeline(transaction=False)
+        keys = set()
+        for item_cls, data in batch:
+            key = self.key.format(spider=self._spider_name, item=_item_name(item_cls))
+            pipe.rpush(key, json.dumps(data, ensure_ascii=False, default=_json_default))
+            keys.add(key)
+        if self.max_length > 0:
+            for key in keys:
+                pipe.ltrim(key, -self.max_length, -1)
+        pipe.execute()
+
+    def close(self, spider):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+class _SinkState:
+    """单个 sink 的运行时状态"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.buffer = []
+        self.inflight = None
+        self.last_flush = time.monotonic()
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+
+class SinkFanoutPipeline:
+    """把 item 分发到多个 sink；未配置 STORAGE_SINKS 时不启用"""
+
+    def __init__(self, sinks, stats=None):
+        self.states = [_SinkState(sink) for sink in sinks]
+        self.stats = stats
+        self._timer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        configured = crawler.settings.getdict('STORAGE_SINKS')
+        if not configured:
+            raise NotConfigured
+        sinks = []
+        for path, options in configured.items():
+            sink_cls = load_object(path)
+            sinks.append(sink_cls.from_crawler(crawler, **(options or {})))
+        return cls(sinks, crawler.stats)
+
+    def open_spider(self, spider):
+        for state in list(self.states):
+            try:
+                state.sink.open(spider)
+                spider.logger.info(f"SinkFanoutPipeline: 已启用 {self._name(state)}")
+            except Exception as e:
+                # 打不开的 sink 直接停用，不影响其他输出
+                spider.logger.error(f"SinkFanoutPipeline: {self._name(state)} 初始化失败，已停用: {e}")
+                self.states.remove(state)
+        self._timer = task.LoopingCall(self._flush_due)
+        self._timer.start(1.0, now=False)
+
+    def process_item(self, item, spider):
+        adapter = None
+        for state in self.states:
+            if not state.sink.accepts(item):
+                continue
+            if len(state.buffer) >= state.sink.max_pending:
+                state.dropped += 1
+                continue
+            if adapter is None:
+                # 复制为普通 dict，后台线程写入时不受后续修改影响
+                adapter = (type(item), ItemAdapter(item).asdict())
+            state.buffer.append(adapter)
+            if len(state.buffer) >= state.sink.batch_size:
+                self._flush(state)
+        return item
+
+    def _flush_due(self):
+        now = time.monotonic()
+        for state in self.states:
+            if state.buffer and now - state.last_flush >= state.sink.flush_interval:
+                self._flush(state)
+
+    def _flush(self, state):
+        if state.inflight is not None or not state.buffer:
+            return state.inflight
+        batch, state.buffer = state.buffer, []
+        state.last_flush = time.monotonic()
+
+        def _done(result):
+            state.written += len(batch)
+
+        def _failed(failure):
+            state.errors += 1
+            logger.error(f"SinkFanoutPipeline: {self._name(state)} 写入 {len(batch)} 条失败: {failure.value}")
+
+        def _release(_):
+            state.inflight = None
+            if len(state.buffer) >= state.sink.batch_size:
+                self._flush(state)
+
+        # 先登记在途批次再挂回调，Deferred 已完成时 _release 也能正确清除
+        d = state.inflight = threads.deferToThread(state.sink.write_batch, batch)
+        d.addCallbacks(_done, _failed)
+        d.addBoth(_release)
+        return d
+
+    async def close_spider(self, spider):
+        if self._timer is not None and self._timer.running:
+            self._timer.stop()
+        for state in self.states:
+            # 等待在途批次，再把剩余缓冲写完
+            while state.inflight is not None or state.buffer:
+                pending = state.inflight if state.inflight is not None else self._flush(state)
+                await maybe_deferred_to_future(pending)
+            try:
+                await maybe_deferred_to_future(threads.deferToThread(state.sink.close, spider))
+            except Exception as e:
+                state.errors += 1
+                spider.logger.error(f"SinkFanoutPipeline: {self._name(state)} 关闭失败: {e}")
+            self._report(state, spider)
+
+    def _report(self, state, spider):
+        name = self._name(state)
+        if self.stats is not None:
+            self.stats.set_value(f'sinks/{name}/written', state.written)
+            self.stats.set_value(f'sinks/{name}/dropped', state.dropped)
+            self.stats.set_value(f'sinks/{name}/errors', state.errors)
+        spider.logger.info(
+            f"SinkFanoutPipeline: {name} 写入 {state.written} 条, 丢弃 {state.dropped} 条, 失败批次 {state.errors}"
+        )
+
+    @staticmethod
+    def _name(state):
+        return state.sink.name or type(state.sink).__name__
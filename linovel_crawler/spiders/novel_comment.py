@@ -3,6 +3,8 @@ import json
 import os
 from datetime import datetime
 from urllib.parse import urljoin
+from linovel_crawler import book_source, frontier, items, shard
+from linovel_crawler.comment_parser import CommentParser
 from linovel_crawler.items import NovelCommentItem, CrawlStatusItem
 
 
@@ -17,25 +19,39 @@ class NovelCommentSpider(scrapy.Spider):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.base_url = os.getenv('base_url', 'https://www.linovel.net')
+        # 分片模式（spider 参数 shard=i/N）：只处理归属本分片的 book_id
+        self._shard = shard.parse(getattr(self, 'shard', None))
+        # 多进程模式：从本地工作队列领取 book_id（spider 参数 work_queue=<sqlite路径>）
+        self._work_queue = None
+        if getattr(self, 'work_queue', None):
+            from linovel_crawler.work_queue import SQLiteWorkQueue
+            self._work_queue = SQLiteWorkQueue(self.work_queue)
+            self.worker_id = getattr(self, 'worker_id', None) or f"{self.name}-{os.getpid()}"
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        shard.isolate_settings(crawler.settings, spider._shard)
+        spider.comment_parser = CommentParser(spider.base_url, items.comment_item_class(crawler.settings))
+        return spider
+
+    def _build_request(self, book_id):
+        return self.comment_parser.build_request(book_id, 1, self.parse_comments)
 
     def _iter_start_requests(self):
-        """公共起始请求生成器，供 start() 与 start_requests() 复用"""
-        book_ids = getattr(self, 'book_ids', None)
-        if book_ids:
-            for book_id in book_ids.split(','):
-                yield scrapy.Request(
-                    f"{self.base_url}/comment/items?type=book&tid={book_id.strip()}&pageSize=15&page=1",
-                    callback=self.parse_comments,
-                    meta={'book_id': book_id.strip(), 'page': 1},
-                    headers={
-                        'Accept': 'application/json, text/javascript, */*; q=0.01',
-                        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
-                        'X-Requested-With': 'XMLHttpRequest',
-                    }
-                )
-        else:
+        """公共起始请求生成器，供 start() 与 start_requests() 复用
+
+        book_id 来源：book_ids（逗号分隔）或 book_source（db / 文件路径 / - 表示标准输入），
+        均为惰性读取。
+        """
+        book_ids = book_source.iter_book_ids(self, self.query_pending_comments)
+        if book_ids is None:
             # 如果没有指定book_ids，输出提示
-            self.logger.info("未指定book_ids参数，将不爬取任何评论")
+            self.logger.info("未指定book_ids或book_source参数，将不爬取任何评论")
+            return
+        for book_id in book_ids:
+            if shard.owns_book(self._shard, book_id):
+                yield self._build_request(book_id)
 
     def start_requests(self):
         """兼容低版本Scrapy的启动入口"""
@@ -43,20 +59,32 @@ class NovelCommentSpider(scrapy.Spider):
 
     async def start(self):
         """Scrapy 2.13+ 推荐的异步启动入口"""
+        if self._work_queue is not None:
+            from linovel_crawler.work_queue import iter_claimed
+            async for book_id in iter_claimed(self.crawler, self._work_queue, 'comment', self.worker_id, self.logger):
+                yield self._build_request(book_id)
+            return
         for req in self._iter_start_requests():
+            # 大批量输入时按调度器容量逐步产出，避免一次性积压全部请求
+            await frontier.wait_for_capacity(self.crawler)
             yield req
 
+    def closed(self, reason):
+        if self._work_queue is not None:
+            # 已领取但未产出的任务（如 CLOSESPIDER 或中断时的剩余批次）放回队列
+            released = self._work_queue.release('comment', self.worker_id)
+            if released:
+                self.logger.info(f"工作队列: 放回 {released} 个未处理的 comment 任务（关闭原因: {reason}）")
+            self._work_queue.close()
+
     def query_pending_comments(self):
-        """查询待处理的评论"""
-        # 这个方法会在实际运行时通过pipeline调用数据库
-        pass
+        """查询待处理的评论：novels 中尚未完成 book_comments 状态的书籍，按页惰性产出 book_id"""
+        batch_size = self.crawler.settings.getint('BOOK_SOURCE_BATCH_SIZE', 1000)
+        return book_source.iter_pending(self, 'book_comments', batch_size)
 
     def parse_comments(self, response):
         """解析评论API响应"""
-        from linovel_crawler.comment_parser import CommentParser
-
-        comment_parser = CommentParser(self.base_url)
-        yield from comment_parser.parse_comments(response, self)
+        yield from self.comment_parser.parse_comments(response, self)
 
 
     def update_crawl_status(self, spider_name, status_type, identifier, status, retry_count=0):
@@ -3,7 +3,8 @@ import re
 import os
 from urllib.parse import urljoin
 from datetime import datetime
-from linovel_crawler.items import NovelItem, NovelVolumeItem, NovelChapterItem, CrawlStatusItem
+from linovel_crawler import book_source, fingerprint, frontier, items, shard
+from linovel_crawler.items import NovelItem, NovelVolumeItem, CrawlStatusItem
 
 
 class NovelDetailSpider(scrapy.Spider):
@@ -13,24 +14,52 @@ class NovelDetailSpider(scrapy.Spider):
         'JOBDIR': 'storage/jobs/novel_detail',
         'SCHEDULER_PERSIST': True,
     }
+    # 章节 item 类，由 LIGHTWEIGHT_ITEMS 决定（见 from_crawler）
+    chapter_item_cls = items.NovelChapterItem
+    # 是否把整本书的卷/章节合并为一个 NovelChapterBatchItem（CHAPTER_BATCH_ITEMS）
+    batch_chapters = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.base_url = os.getenv('base_url', 'https://www.linovel.net')
+        # 分片模式（spider 参数 shard=i/N）：只处理归属本分片的 book_id
+        self._shard = shard.parse(getattr(self, 'shard', None))
+        # 多进程模式：从本地工作队列领取 book_id（spider 参数 work_queue=<sqlite路径>）
+        self._work_queue = None
+        if getattr(self, 'work_queue', None):
+            from linovel_crawler.work_queue import SQLiteWorkQueue
+            self._work_queue = SQLiteWorkQueue(self.work_queue)
+            self.worker_id = getattr(self, 'worker_id', None) or f"{self.name}-{os.getpid()}"
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        shard.isolate_settings(crawler.settings, spider._shard)
+        spider.chapter_item_cls = items.chapter_item_class(crawler.settings)
+        spider.batch_chapters = crawler.settings.getbool('CHAPTER_BATCH_ITEMS', False)
+        return spider
+
+    def _build_request(self, book_id):
+        return scrapy.Request(
+            f"{self.base_url}/book/{book_id}.html",
+            callback=self.parse_detail,
+            meta={'book_id': book_id}
+        )
 
     def _iter_start_requests(self):
-        """公共起始请求生成器，供 start() 与 start_requests() 复用"""
-        book_ids = getattr(self, 'book_ids', None)
-        if book_ids:
-            for book_id in book_ids.split(','):
-                yield scrapy.Request(
-                    f"{self.base_url}/book/{book_id.strip()}.html",
-                    callback=self.parse_detail,
-                    meta={'book_id': book_id.strip()}
-                )
-        else:
+        """公共起始请求生成器，供 start() 与 start_requests() 复用
+
+        book_id 来源：book_ids（逗号分隔）或 book_source（db / 文件路径 / - 表示标准输入），
+        均为惰性读取。
+        """
+        book_ids = book_source.iter_book_ids(self, self.query_pending_books)
+        if book_ids is None:
             # 如果没有指定book_ids，输出提示
-            self.logger.info("未指定book_ids参数，将不爬取任何详情页")
+            self.logger.info("未指定book_ids或book_source参数，将不爬取任何详情页")
+            return
+        for book_id in book_ids:
+            if shard.owns_book(self._shard, book_id):
+                yield self._build_request(book_id)
 
     def start_requests(self):
         """兼容低版本Scrapy的启动入口"""
@@ -38,13 +67,28 @@ class NovelDetailSpider(scrapy.Spider):
 
     async def start(self):
         """Scrapy 2.13+ 推荐的异步启动入口"""
+        if self._work_queue is not None:
+            from linovel_crawler.work_queue import iter_claimed
+            async for book_id in iter_claimed(self.crawler, self._work_queue, 'detail', self.worker_id, self.logger):
+                yield self._build_request(book_id)
+            return
         for req in self._iter_start_requests():
+            # 大批量输入时按调度器容量逐步产出，避免一次性积压全部请求
+            await frontier.wait_for_capacity(self.crawler)
             yield req
 
+    def closed(self, reason):
+        if self._work_queue is not None:
+            # 已领取但未产出的任务（如 CLOSESPIDER 或中断时的剩余批次）放回队列
+            released = self._work_queue.release('detail', self.worker_id)
+            if released:
+                self.logger.info(f"工作队列: 放回 {released} 个未处理的 detail 任务（关闭原因: {reason}）")
+            self._work_queue.close()
+
     def query_pending_books(self):
-        """查询待处理的书籍"""
-        # 这个方法会在实际运行时通过pipeline调用数据库
-        pass
+        """查询待处理的书籍：novels 中尚未完成 detail_page 状态的书籍，按页惰性产出 book_id"""
+        batch_size = self.crawler.settings.getint('BOOK_SOURCE_BATCH_SIZE', 1000)
+        return book_source.iter_pending(self, 'detail_page', batch_size)
 
     def parse_detail(self, response):
         """解析小说详情页"""
@@ -130,7 +174,10 @@ class NovelDetailSpider(scrapy.Spider):
                 yield novel_item
 
             # 解析章节列表
-            yield from self.parse_chapters(response, book_id)
+            chapters = self.parse_chapters(response, book_id)
+            if self.batch_chapters:
+                chapters = items.chapter_batch(book_id, chapters)
+            yield from chapters
 
             # 标记为已完成
             yield self.update_crawl_status('novel_detail', 'detail_page', book_id, 'completed')
@@ -155,6 +202,8 @@ class NovelDetailSpider(scrapy.Spider):
             sections = section_list.xpath('.//div[@class="section"]')
             self.logger.info(f"book_id {book_id}: 找到 {len(sections)} 个section")
 
+            # 章节在全书中的顺序，跨卷连续编号
+            chapter_index = 0
             for section_index, section in enumerate(sections, 1):
                 self.logger.debug(f"book_id {book_id}: 处理section {section_index}")
                 # 解析卷信息
@@ -193,22 +242,22 @@ class NovelDetailSpider(scrapy.Spider):
                 self.logger.debug(f"book_id {book_id}: section {section_index} 找到 {len(chapters)} 个章节")
 
                 for chapter in chapters:
-                    chapter_item = NovelChapterItem()
-                    chapter_item['book_id'] = book_id
-                    chapter_item['volume_index'] = section_index
-
-                    # 章节URL
+                    # 章节URL与标题
                     chapter_url = chapter.xpath('@href').get()
-                    if chapter_url:
-                        chapter_item['chapter_url'] = urljoin(self.base_url, chapter_url)
-
-                    # 章节标题
-                    chapter_title = chapter.xpath('text()').get()
-                    if chapter_title:
-                        chapter_item['chapter_title'] = chapter_title.strip()
-
-                    if chapter_item.get('chapter_url') and chapter_item.get('chapter_title'):
-                        yield chapter_item
+                    chapter_title = (chapter.xpath('text()').get() or '').strip()
+
+                    # 只有当必要字段存在时才yield
+                    if chapter_url and chapter_title:
+                        chapter_url = urljoin(self.base_url, chapter_url)
+                        chapter_index += 1
+                        yield self.chapter_item_cls(
+                            book_id=book_id,
+                            volume_index=section_index,
+                            chapter_id=fingerprint.chapter_id(chapter_url),
+                            chapter_index=chapter_index,
+                            chapter_url=chapter_url,
+                            chapter_title=chapter_title,
+                        )
 
         except Exception as e:
             self.logger.error(f"解析章节列表失败 (book_id: {book_id}): {e}")
@@ -2,7 +2,9 @@ import scrapy
 import re
 import os
 from urllib.parse import urljoin
-from linovel_crawler.items import NovelItem, NovelVolumeItem, NovelChapterItem, CrawlStatusItem
+from linovel_crawler import fingerprint, frontier, items, shard
+from linovel_crawler.comment_parser import CommentParser
+from linovel_crawler.items import NovelItem, NovelVolumeItem, CrawlStatusItem
 
 
 class NovelListSpider(scrapy.Spider):
@@ -12,10 +14,39 @@ class NovelListSpider(scrapy.Spider):
         'JOBDIR': 'storage/jobs/novel_list',
         'SCHEDULER_PERSIST': True,
     }
+    # 章节 item 类，由 LIGHTWEIGHT_ITEMS 决定（见 from_crawler）
+    chapter_item_cls = items.NovelChapterItem
+    # 是否把整本书的卷/章节合并为一个 NovelChapterBatchItem（CHAPTER_BATCH_ITEMS）
+    batch_chapters = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.base_url = os.getenv('base_url', 'https://www.linovel.net')
+        # 有界队列模式下由探测请求写入的总页数
+        self._total_pages = None
+        # 分片模式（spider 参数 shard=i/N）：只处理归属本分片的列表页
+        self._shard = shard.parse(getattr(self, 'shard', None))
+        # 多进程模式：发现的 book_id 写入本地工作队列，由独立的详情/评论进程消费
+        self._work_queue = None
+        if getattr(self, 'work_queue', None):
+            from linovel_crawler.work_queue import SQLiteWorkQueue
+            self._work_queue = SQLiteWorkQueue(self.work_queue)
+            self.producer = getattr(self, 'producer', None) or self.name
+            self._work_queue.register_producer(self.producer)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        shard.isolate_settings(crawler.settings, spider._shard)
+        spider.chapter_item_cls = items.chapter_item_class(crawler.settings)
+        spider.batch_chapters = crawler.settings.getbool('CHAPTER_BATCH_ITEMS', False)
+        spider.comment_parser = CommentParser(spider.base_url, items.comment_item_class(crawler.settings))
+        return spider
+
+    def closed(self, reason):
+        if self._work_queue is not None:
+            self._work_queue.finish_producer(self.producer)
+            self._work_queue.close()
 
     def _iter_start_requests(self):
         """公共起始请求生成器，供 start() 与 start_requests() 复用"""
@@ -33,6 +64,8 @@ class NovelListSpider(scrapy.Spider):
             # 如果指定了最大页数，直接开始爬取
             # 状态检查由ResumeCrawlerMiddleware处理
             for page in range(start_page, max_pages + 1):
+                if not shard.owns_page(self._shard, page):
+                    continue
                 yield scrapy.Request(
                     f"{self.base_url}/cat/-1.html?page={page}",
                     callback=self.parse_list_page,
@@ -45,9 +78,86 @@ class NovelListSpider(scrapy.Spider):
 
     async def start(self):
         """Scrapy 2.13+ 推荐的异步启动入口"""
+        if self.crawler.settings.getint('FRONTIER_MAX_PENDING', 0) > 0:
+            async for req in self._iter_frontier_requests():
+                yield req
+            return
         for req in self._iter_start_requests():
             yield req
 
+    async def _iter_frontier_requests(self):
+        """有界队列模式：按调度器容量逐步生成列表页请求
+
+        待处理请求（调度器队列 + 下载中）达到 FRONTIER_MAX_PENDING 时暂停生成，
+        直到详情/评论请求被消化。已生成到的页码记录在 spider.state 中，
+        配合 JOBDIR 重启后从断点继续，内存与磁盘队列大小与站点规模无关。
+        """
+        settings = self.crawler.settings
+        high_water = settings.getint('FRONTIER_MAX_PENDING', 0)
+        poll_interval = settings.getfloat('FRONTIER_POLL_INTERVAL', 1.0)
+        start_page = int(getattr(self, 'start_page', 1))
+        max_pages = getattr(self, 'max_pages', None)
+
+        if max_pages:
+            last_page = int(max_pages)
+        else:
+            # 第1页同时用于探测总页数，不参与断点跳过，也不经过去重：
+            # JOBDIR 重启时若被 requests.seen 丢弃，回调不会执行，下面的等待将永不结束
+            start_page = max(start_page, 2)
+            yield scrapy.Request(
+                f"{self.base_url}/cat/-1.html?page=1",
+                callback=self.parse_frontier_probe,
+                errback=self._frontier_probe_failed,
+                dont_filter=True,
+                meta={'page': 1, 'resume_dont_skip': True}
+            )
+            while self._total_pages is None:
+                await frontier.sleep(poll_interval)
+            last_page = self._total_pages
+
+        state = getattr(self, 'state', None)
+        if state is not None:
+            start_page = max(start_page, state.get('frontier_next_page', start_page))
+
+        for page in range(start_page, last_page + 1):
+            if not shard.owns_page(self._shard, page):
+                continue
+            while frontier.pending_requests(self.crawler) >= high_water:
+                await frontier.sleep(poll_interval)
+            if state is not None:
+                state['frontier_next_page'] = page + 1
+            yield scrapy.Request(
+                f"{self.base_url}/cat/-1.html?page={page}",
+                callback=self.parse_list_page,
+                meta={'page': page}
+            )
+
+    def parse_frontier_probe(self, response):
+        """有界队列模式：记录总页数，并直接解析第1页内容"""
+        self._total_pages = self._extract_total_pages(response)
+        if shard.owns_page(self._shard, 1):
+            yield from self.parse_list_page(response)
+
+    def _frontier_probe_failed(self, failure):
+        self.logger.error(f"获取总页数失败: {failure.value}")
+        self._total_pages = self._extract_total_pages(None)
+
+    def _extract_total_pages(self, response):
+        """从分页控件解析总页数，无法解析时使用 DEFAULT_MAX_PAGES"""
+        if response is not None:
+            # XPath: //ul[@class="pagination"]/li[position()=last()-1]/a/text()
+            total_pages_element = response.xpath('//ul[@class="pagination"]/li[position()=last()-1]/a/text()').get()
+            if total_pages_element:
+                try:
+                    total_pages = int(total_pages_element.strip())
+                    self.logger.info(f"总页数: {total_pages}")
+                    return total_pages
+                except ValueError:
+                    pass
+        default_max_pages = self.crawler.settings.getint('DEFAULT_MAX_PAGES', 10)
+        self.logger.warning(f"无法获取总页数，使用默认最大页数: {default_max_pages}")
+        return default_max_pages
+
     def parse_total_pages(self, response):
         """解析总页数"""
         try:
@@ -59,6 +169,8 @@ class NovelListSpider(scrapy.Spider):
 
                 # 生成所有页面的请求
                 for page in range(1, total_pages + 1):
+                    if not shard.owns_page(self._shard, page):
+                        continue
                     yield scrapy.Request(
                         f"{self.base_url}/cat/-1.html?page={page}",
                         callback=self.parse_list_page,
@@ -69,6 +181,8 @@ class NovelListSpider(scrapy.Spider):
                 default_max_pages = self.crawler.settings.get('DEFAULT_MAX_PAGES', 10)
                 self.logger.warning(f"无法获取总页数，使用默认最大页数: {default_max_pages}")
                 for page in range(1, default_max_pages + 1):
+                    if not shard.owns_page(self._shard, page):
+                        continue
                     yield scrapy.Request(
                         f"{self.base_url}/cat/-1.html?page={page}",
                         callback=self.parse_list_page,
@@ -89,6 +203,7 @@ class NovelListSpider(scrapy.Spider):
             # XPath: //div[@class='rank-book-list'] 为小说列表
             # XPath: //div[@class='rank-book'] 为单个小说
             novels = response.xpath('//div[@class="rank-book-list"]//div[@class="rank-book"]')
+            discovered = []
 
             for novel in novels:
                 novel_item = NovelItem()
@@ -104,12 +219,16 @@ class NovelListSpider(scrapy.Spider):
                     if book_id_match:
                         novel_item['book_id'] = book_id_match.group(1)
 
-                        # 生成详情页请求（状态检查在pipeline中处理）
-                        yield scrapy.Request(
-                            novel_item['detail_url'],
-                            callback=self.parse_novel_detail,
-                            meta={'book_id': novel_item['book_id']}
-                        )
+                        if self._work_queue is not None:
+                            # 多进程模式：交给详情/评论进程处理
+                            discovered.append(novel_item['book_id'])
+                        else:
+                            # 生成详情页请求（状态检查在pipeline中处理）
+                            yield scrapy.Request(
+                                novel_item['detail_url'],
+                                callback=self.parse_novel_detail,
+                                meta={'book_id': novel_item['book_id']}
+                            )
 
                 # XPath: //div[@class='book-cover']/img/@src 小说封面
                 cover_url = novel.xpath('.//div[@class="book-cover"]/img/@src').get()
@@ -142,6 +261,9 @@ class NovelListSpider(scrapy.Spider):
 
                     yield novel_item
 
+            if discovered:
+                self._work_queue.put(('detail', 'comment'), discovered)
+
             # 标记页面为已完成
             yield self.update_crawl_status('novel_list', 'list_page', str(page), 'completed')
 
@@ -242,22 +364,16 @@ class NovelListSpider(scrapy.Spider):
                 yield novel_item
 
             # 解析卷和章节信息
-            yield from self.parse_chapters(response, book_id)
+            chapters = self.parse_chapters(response, book_id)
+            if self.batch_chapters:
+                chapters = items.chapter_batch(book_id, chapters)
+            yield from chapters
 
             # 标记详情页处理完成
             yield self.update_crawl_status('novel_detail', 'detail_page', book_id, 'completed')
 
             # 同时触发评论Spider的第一个请求
-            yield scrapy.Request(
-                f"{self.base_url}/comment/items?type=book&tid={book_id}&pageSize=15&page=1",
-                callback=self.parse_comments,
-                meta={'book_id': book_id, 'page': 1},
-                headers={
-                    'Accept': 'application/json, text/javascript, */*; q=0.01',
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
-                    'X-Requested-With': 'XMLHttpRequest',
-                }
-            )
+            yield self.comment_parser.build_request(book_id, 1, self.parse_comments)
 
         except Exception as e:
             self.logger.error(f"处理小说详情失败 (book_id: {book_id}): {e}")
@@ -279,6 +395,8 @@ class NovelListSpider(scrapy.Spider):
             sections = section_list.xpath('.//div[@class="section"]')
             self.logger.info(f"book_id {book_id}: 找到 {len(sections)} 个section")
 
+            # 章节在全书中的顺序，跨卷连续编号
+            chapter_index = 0
             for section_index, section in enumerate(sections, 1):
                 self.logger.debug(f"book_id {book_id}: 处理section {section_index}")
                 # 解析卷信息
@@ -317,33 +435,29 @@ class NovelListSpider(scrapy.Spider):
                 self.logger.debug(f"book_id {book_id}: section {section_index} 找到 {len(chapters)} 个章节")
 
                 for chapter in chapters:
-                    chapter_item = NovelChapterItem()
-                    chapter_item['book_id'] = book_id
-                    chapter_item['volume_index'] = section_index
-
-                    # 章节URL
+                    # 章节URL与标题
                     chapter_url = chapter.xpath('@href').get()
-                    if chapter_url:
-                        chapter_item['chapter_url'] = urljoin(self.base_url, chapter_url)
-
-                    # 章节标题
-                    chapter_title = chapter.xpath('text()').get()
-                    if chapter_title:
-                        chapter_item['chapter_title'] = chapter_title.strip()
+                    chapter_title = (chapter.xpath('text()').get() or '').strip()
 
                     # 只有当必要字段存在时才yield
-                    if chapter_item.get('chapter_url') and chapter_item.get('chapter_title'):
-                        yield chapter_item
+                    if chapter_url and chapter_title:
+                        chapter_url = urljoin(self.base_url, chapter_url)
+                        chapter_index += 1
+                        yield self.chapter_item_cls(
+                            book_id=book_id,
+                            volume_index=section_index,
+                            chapter_id=fingerprint.chapter_id(chapter_url),
+                            chapter_index=chapter_index,
+                            chapter_url=chapter_url,
+                            chapter_title=chapter_title,
+                        )
 
         except Exception as e:
             self.logger.error(f"解析章节列表失败 (book_id: {book_id}): {e}")
 
     def parse_comments(self, response):
         """解析评论数据"""
-        from linovel_crawler.comment_parser import CommentParser
-
-        comment_parser = CommentParser(self.base_url)
-        yield from comment_parser.parse_comments(response, self)
+        yield from self.comment_parser.parse_comments(response, self)
 
 
     def update_crawl_status(self, spider_name, status_type, identifier, status, retry_count=0):
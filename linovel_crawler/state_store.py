@@ -1,7 +1,7 @@
 import json
 import os
 import threading
-from typing import Iterable, Set
+from typing import Callable, Iterable, Set
 
 
 class LocalStateStore:
@@ -58,6 +58,13 @@ class LocalStateStore:
         with self._lock:
             self._completed.update(keys)
 
+    def discard_completed(self, predicate: Callable[[str], bool]) -> int:
+        """Remove completed keys for which ``predicate`` is true; returns the count."""
+        with self._lock:
+            doomed = [key for key in self._completed if predicate(key)]
+            self._completed.difference_update(doomed)
+            return len(doomed)
+
     def is_completed(self, key: str) -> bool:
         with self._lock:
             return key in self._completed
@@ -0,0 +1,1049 @@
+"""
+存储后端
+
+DatabasePipeline 通过统一的后端接口访问数据库，可在 MySQL 与嵌入式 SQLite 之间切换
+（STORAGE_BACKEND）：
+
+- ``mysql``：原有的 pymysql 实现，连接时自动建库。
+- ``sqlite``：WAL 模式的本地文件，写入按批提交（SQLITE_COMMIT_EVERY 条或
+  SQLITE_COMMIT_INTERVAL 秒），单机爬取和基准测试时写入没有网络往返。
+
+两个后端使用相同的表结构与 ``%s`` 占位符 SQL，方言差异（建表语句、UPSERT）由后端处理。
+
+novel_chapters 以 ``(book_id, chapter_id)`` 为唯一键（chapter_id 取自章节URL），
+旧版以 ``chapter_url(500)`` 前缀为唯一键的表在 create_tables 时自动在线迁移，见 ``migrate_chapters``。
+
+crawl_status_summary 按 (spider_name, status_type, status) 保存 crawl_status 的行数，
+由 DatabasePipeline 以增量方式维护，统计脚本读取该表而不扫描 crawl_status。
+
+novel_comments 支持两种布局（COMMENT_TABLE_LAYOUT）：
+
+- ``standard``：comment_id 主键，附加 (book_id, create_time) 索引，外键可关闭（COMMENT_FOREIGN_KEY）
+- ``partitioned``（仅 MySQL）：主键 (book_id, create_time, comment_id) 使同一本书的评论按时间聚簇，
+  按 create_time 逐月 RANGE 分区，按时间范围查询只访问相关分区；MySQL 分区表不支持外键，
+  引用完整性改为离线检查（``orphan_comment_books`` / ``delete_orphan_comments``）。
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+from linovel_crawler import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 各表的唯一约束列，SQLite 的 ON CONFLICT 需要显式指定
+CONFLICT_COLUMNS = {
+    'novels': ('book_id',),
+    'novel_volumes': ('book_id', 'volume_index'),
+    'novel_chapters': ('book_id', 'chapter_id'),
+    'novel_comments': ('comment_id',),
+    'crawl_status': ('spider_name', 'status_type', 'identifier'),
+    'crawl_status_summary': ('spider_name', 'status_type', 'status'),
+}
+
+# novel_comments 的 (book_id, create_time) 索引：按书籍取评论并按时间排序/筛选
+COMMENT_INDEXES = {
+    'idx_book_time': '(book_id, create_time)',
+}
+
+# 分区布局中 create_time 属于主键不能为空，缺失时使用该时间（落入最早的历史分区）
+UNKNOWN_COMMENT_TIME = datetime(1970, 1, 1)
+
+# crawl_status 的二级索引：按状态筛选（覆盖预加载查询）与按更新时间范围统计
+STATUS_INDEXES = {
+    'idx_status': '(status, spider_name, status_type, identifier)',
+    'idx_last_update': '(last_update)',
+}
+
+
+class StorageBackend:
+    """存储后端基类：连接管理、建表与 UPSERT 方言"""
+
+    name = None
+    errors = ()
+    # novel_comments 是否为分区布局（create_time 不能为空）
+    comment_partitioned = False
+
+    def __init__(self):
+        self.connection = None
+        self._upsert_cache = {}
+
+    def connect(self):
+        raise NotImplementedError
+
+    def create_tables(self):
+        raise NotImplementedError
+
+    def reconnect(self):
+        pass
+
+    # 写入按批提交的后端需要调用方每隔 flush_interval 秒调用 flush_due()；None 表示每次 commit 即提交
+    flush_interval = None
+
+    def flush_due(self):
+        """提交已超过提交间隔的批量写入，避免空闲时长时间持有写事务"""
+        pass
+
+    def migrate_chapters(self):
+        """把旧版 novel_chapters 迁移到 (book_id, chapter_id) 唯一键"""
+        pass
+
+    def stream_cursor(self):
+        """用于大结果集分批读取（fetchmany）的游标"""
+        return self.connection.cursor()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def upsert_sql(self, table, columns, updates):
+        """生成 ``INSERT ... 冲突时更新`` 语句
+
+        ``updates`` 为 {列名: 'replace' | 'coalesce' | 'add'}：replace 直接用新值覆盖，
+        coalesce 仅在新值非空时覆盖，add 在旧值上累加新值。
+        """
+        key = (table, tuple(columns), tuple(updates.items()))
+        sql = self._upsert_cache.get(key)
+        if sql is None:
+            sql = self._upsert_cache[key] = self._build_upsert(table, columns, updates)
+        return sql
+
+    def _build_upsert(self, table, columns, updates):
+        raise NotImplementedError
+
+    def orphan_comment_books(self):
+        """novel_comments 中在 novels 表里不存在的 book_id（无外键时的延迟完整性检查）"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT DISTINCT c.book_id FROM novel_comments c
+                WHERE NOT EXISTS (SELECT 1 FROM novels n WHERE n.book_id = c.book_id)
+            """)
+            return [row[0] for row in cursor.fetchall()]
+
+    def delete_orphan_comments(self):
+        """按 book_id 逐本删除孤立评论（走 book_id 前缀索引），返回删除的行数"""
+        total = 0
+        for book_id in self.orphan_comment_books():
+            with self.connection.cursor() as cursor:
+                cursor.execute("DELETE FROM novel_comments WHERE book_id = %s", (book_id,))
+                total += cursor.rowcount
+            self.connection.commit()
+        return total
+
+    def ensure_status_summary(self):
+        """汇总表为空而 crawl_status 已有数据时（首次升级）做一次全量重建"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM crawl_status_summary LIMIT 1")
+            if cursor.fetchone():
+                return
+            cursor.execute("SELECT 1 FROM crawl_status LIMIT 1")
+            if not cursor.fetchone():
+                return
+        self.rebuild_status_summary()
+
+    def rebuild_status_summary(self):
+        """按 crawl_status 重新计算汇总表，返回汇总行数
+
+        汇总由各进程按增量维护，进程被强制结束时可能丢失最后一批增量，可用此方法校正。
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM crawl_status_summary")
+            cursor.execute("""
+                INSERT INTO crawl_status_summary (spider_name, status_type, status, row_count)
+                SELECT spider_name, status_type, COALESCE(status, 'pending'), COUNT(*)
+                FROM crawl_status
+                GROUP BY spider_name, status_type, COALESCE(status, 'pending')
+            """)
+            rows = cursor.rowcount
+        self.connection.commit()
+        logger.info(f"crawl_status_summary 已重建: {rows} 行")
+        return rows
+
+    # crawl_status.identifier 中的 book_id（评论页为 ``<book_id>_<页码>``），与 fingerprint.status_book_id 一致
+    status_book_expr = None
+
+    def delete_crawl_status(self, spider_name=None, status_type=None, book_from=None, book_to=None,
+                            batch_size=5000, progress=None):
+        """按条件分批删除 crawl_status 并同步扣减 crawl_status_summary，返回删除的行数
+
+        按主键 id 键集分页，每批的删除与汇总扣减在同一事务中提交，中途中断也不会使汇总失准；
+        指定 book 范围时只匹配带 book_id 的状态（不含列表页）。``progress(累计删除数)`` 在每批提交后调用。
+        """
+        conditions, params = ['id > %s'], []
+        if spider_name:
+            conditions.append('spider_name = %s')
+            params.append(spider_name)
+        if status_type:
+            conditions.append('status_type = %s')
+            params.append(status_type)
+        if book_from is not None or book_to is not None:
+            conditions.append("status_type <> %s")
+            params.append(fingerprint.STATUS_TYPES[fingerprint.KIND_LIST][1])
+        if book_from is not None:
+            conditions.append(f'{self.status_book_expr} >= %s')
+            params.append(book_from)
+        if book_to is not None:
+            conditions.append(f'{self.status_book_expr} <= %s')
+            params.append(book_to)
+        select_sql = f"""
+            SELECT id, spider_name, status_type, COALESCE(status, 'pending') FROM crawl_status
+            WHERE {' AND '.join(conditions)} ORDER BY id LIMIT %s
+        """
+        summary_sql = self.upsert_sql('crawl_status_summary', (
+            'spider_name', 'status_type', 'status', 'row_count'
+        ), {'row_count': 'add'})
+
+        total, last_id = 0, 0
+        while True:
+            with self.connection.cursor() as cursor:
+                cursor.execute(select_sql, [last_id, *params, batch_size])
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                ids = [row[0] for row in rows]
+                cursor.execute(f"DELETE FROM crawl_status WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+                deltas = {}
+                for _, *key in rows:
+                    deltas[tuple(key)] = deltas.get(tuple(key), 0) - 1
+                cursor.executemany(summary_sql, [(*key, delta) for key, delta in deltas.items()])
+            self.connection.commit()
+            total += len(rows)
+            last_id = ids[-1]
+            if progress:
+                progress(total)
+        return total
+
+
+_MYSQL_ASSIGNMENTS = {
+    'replace': '{col}=VALUES({col})',
+    'coalesce': '{col}=COALESCE(VALUES({col}), {col})',
+    'add': '{col}={col} + VALUES({col})',
+}
+
+_SQLITE_ASSIGNMENTS = {
+    'replace': '{col}=excluded.{col}',
+    'coalesce': '{col}=COALESCE(excluded.{col}, {col})',
+    'add': '{col}={col} + excluded.{col}',
+}
+
+
+class MySQLBackend(StorageBackend):
+    name = 'mysql'
+    status_book_expr = "CAST(SUBSTRING_INDEX(identifier, '_', 1) AS UNSIGNED)"
+
+    def __init__(self, config, migration_batch_size=5000, comment_layout='standard',
+                 comment_foreign_key=True, comment_partition_start='2018-01', comment_partitions_ahead=12):
+        super().__init__()
+        import pymysql
+
+        self._pymysql = pymysql
+        self.errors = (pymysql.Error,)
+        self.config = config
+        self.migration_batch_size = max(1, int(migration_batch_size))
+        if comment_layout not in ('standard', 'partitioned'):
+            raise ValueError(f"未知的 COMMENT_TABLE_LAYOUT: {comment_layout}")
+        self.comment_partitioned = comment_layout == 'partitioned'
+        self.comment_foreign_key = comment_foreign_key and not self.comment_partitioned
+        self.comment_partition_start = _parse_month(comment_partition_start)
+        self.comment_partitions_ahead = max(1, int(comment_partitions_ahead))
+
+    def connect(self):
+        pymysql = self._pymysql
+        # 连接MySQL（不指定数据库）
+        mysql_config_no_db = self.config.copy()
+        mysql_config_no_db.pop('database', None)
+
+        temp_connection = pymysql.connect(**mysql_config_no_db)
+
+        # 创建数据库，转义数据库名防止注入
+        db_name = self.config.get('database')
+        if not db_name:
+            raise ValueError("mysql_database环境变量未设置")
+
+        # 验证和转义数据库名（只允许字母、数字、下划线）
+        if not re.match(r'^[a-zA-Z0-9_]+$', db_name):
+            raise ValueError(f"数据库名包含非法字符: {db_name}")
+
+        with temp_connection.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+            logger.info(f"数据库 `{db_name}` 创建成功")
+
+        temp_connection.close()
+
+        # 连接到指定数据库
+        self.connection = pymysql.connect(**self.config)
+        logger.info("MySQL连接成功")
+        return self.connection
+
+    def reconnect(self):
+        self.connection.ping(reconnect=True)
+
+    def stream_cursor(self):
+        from pymysql.cursors import SSCursor
+
+        return self.connection.cursor(SSCursor)
+
+    def create_tables(self):
+        """自动创建数据库表"""
+        with self.connection.cursor() as cursor:
+            # 小说基本信息表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS novels (
+                    book_id VARCHAR(20) PRIMARY KEY,
+                    title VARCHAR(255) NOT NULL,
+                    cover_url TEXT,
+                    author VARCHAR(100),
+                    intro TEXT,
+                    tags JSON,
+                    word_count INT,
+                    popularity INT,
+                    favorites INT,
+                    status VARCHAR(20),
+                    sign_status VARCHAR(50),
+                    last_update VARCHAR(50),
+                    detail_url TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+            # 小说卷信息表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS novel_volumes (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    book_id VARCHAR(20) NOT NULL,
+                    volume_index INT NOT NULL,
+                    volume_title VARCHAR(255),
+                    volume_word_count INT,
+                    volume_desc TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE KEY unique_book_volume (book_id, volume_index),
+                    FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+            # 小说章节信息表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS novel_chapters (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    book_id VARCHAR(20) NOT NULL,
+                    volume_index INT,
+                    chapter_id BIGINT NOT NULL,
+                    chapter_index INT,
+                    chapter_url TEXT NOT NULL,
+                    chapter_title VARCHAR(500),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE KEY unique_book_chapter (book_id, chapter_id),
+                    FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+            # 小说评论表
+            cursor.execute(self._comment_table_ddl('novel_comments'))
+
+            # 爬取状态表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_status (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    spider_name VARCHAR(50) NOT NULL,
+                    status_type VARCHAR(50) NOT NULL,
+                    identifier VARCHAR(100) NOT NULL,
+                    status VARCHAR(20) DEFAULT 'pending',
+                    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    retry_count INT DEFAULT 0,
+                    UNIQUE KEY unique_status (spider_name, status_type, identifier),
+                    KEY idx_status (status, spider_name, status_type, identifier),
+                    KEY idx_last_update (last_update)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+            # 爬取状态汇总表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_status_summary (
+                    spider_name VARCHAR(50) NOT NULL,
+                    status_type VARCHAR(50) NOT NULL,
+                    status VARCHAR(20) NOT NULL,
+                    row_count BIGINT NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    PRIMARY KEY (spider_name, status_type, status)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+
+            self.connection.commit()
+            logger.info("数据库表检查/创建完成")
+
+        self._ensure_indexes('crawl_status', STATUS_INDEXES)
+        self._prepare_comment_table()
+        self.migrate_chapters()
+        self.ensure_status_summary()
+
+    def _ensure_indexes(self, table, indexes):
+        """为旧版表在线补建二级索引"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                (table,)
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in indexes if name not in existing]
+            if not missing:
+                return
+            try:
+                cursor.execute(
+                    f"ALTER TABLE {table} "
+                    + ', '.join(f"ADD INDEX {name} {indexes[name]}" for name in missing)
+                    + ", ALGORITHM=INPLACE, LOCK=NONE"
+                )
+                logger.info(f"{table} 已补建索引: {', '.join(missing)}")
+            except self.errors as e:
+                logger.error(f"{table} 补建索引失败: {e}")
+
+    def _comment_table_ddl(self, table):
+        """按 COMMENT_TABLE_LAYOUT 生成评论表建表语句"""
+        if self.comment_partitioned:
+            partitions = ',\n'.join(
+                f"                    PARTITION {name} VALUES LESS THAN ({bound})"
+                for name, bound in self._comment_partition_specs(None)
+            )
+            return f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    comment_id VARCHAR(50) NOT NULL,
+                    book_id VARCHAR(20) NOT NULL,
+                    user_name VARCHAR(100),
+                    content TEXT,
+                    create_time DATETIME NOT NULL,
+                    like_count INT DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (book_id, create_time, comment_id),
+                    KEY idx_comment_id (comment_id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                PARTITION BY RANGE COLUMNS (create_time) (
+{partitions}
+                )
+            """
+        foreign_key = (
+            ",\n                FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE"
+            if self.comment_foreign_key else ''
+        )
+        return f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                comment_id VARCHAR(50) PRIMARY KEY,
+                book_id VARCHAR(20) NOT NULL,
+                user_name VARCHAR(100),
+                content TEXT,
+                create_time DATETIME,
+                like_count INT DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                KEY idx_book_time (book_id, create_time){foreign_key}
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+
+    def _comment_partition_specs(self, after):
+        """按月生成分区定义 [(分区名, 上界)]，到当前月份之后 comment_partitions_ahead 个月为止
+
+        ``after`` 为已有的最后一个月分区 (年, 月)，为 None 时从历史分区开始生成完整列表
+        （包括 ``p_history`` 与 ``p_future``）。
+        """
+        today = date.today()
+        last = _add_months((today.year, today.month), self.comment_partitions_ahead)
+        specs = []
+        if after is None:
+            specs.append(('p_history', f"'{_month_bound(self.comment_partition_start)}'"))
+            month = self.comment_partition_start
+        else:
+            month = _add_months(after, 1)
+        while month <= last:
+            specs.append((f"p{month[0]:04d}{month[1]:02d}", f"'{_month_bound(_add_months(month, 1))}'"))
+            month = _add_months(month, 1)
+        if after is None:
+            specs.append(('p_future', 'MAXVALUE'))
+        return specs
+
+    def _comment_partition_names(self, table='novel_comments'):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL",
+                (table,)
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _prepare_comment_table(self):
+        """按配置的布局检查评论表：补索引、删除外键或补充未来的月分区"""
+        partitions = self._comment_partition_names()
+        if self.comment_partitioned:
+            if not partitions:
+                logger.warning(
+                    "COMMENT_TABLE_LAYOUT=partitioned，但 novel_comments 仍是普通表，"
+                    "请停止评论爬虫后运行 python maintain_comments.py --convert 转换"
+                )
+                return
+            self.ensure_comment_partitions()
+            return
+        if partitions:
+            logger.warning("novel_comments 是分区表，与 COMMENT_TABLE_LAYOUT=standard 不一致，按分区表使用")
+            self.comment_partitioned = True
+            return
+        self._ensure_indexes('novel_comments', COMMENT_INDEXES)
+        if not self.comment_foreign_key:
+            self._drop_comment_foreign_keys()
+
+    def _drop_comment_foreign_keys(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS "
+                "WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'novel_comments'"
+            )
+            names = [row[0] for row in cursor.fetchall()]
+            if not names:
+                return
+            try:
+                cursor.execute(
+                    "ALTER TABLE novel_comments "
+                    + ', '.join(f"DROP FOREIGN KEY `{name}`" for name in names)
+                    + ", ALGORITHM=INPLACE, LOCK=NONE"
+                )
+                logger.info(f"novel_comments 已删除外键: {', '.join(names)}")
+            except self.errors as e:
+                logger.error(f"novel_comments 删除外键失败: {e}")
+
+    def ensure_comment_partitions(self, table='novel_comments'):
+        """拆分 p_future，补齐到当前月份之后 comment_partitions_ahead 个月的分区，返回新增的分区数
+
+        p_future 中通常没有数据，REORGANIZE 只涉及空分区，开销很小。
+        """
+        months = sorted(
+            (int(name[1:5]), int(name[5:7])) for name in self._comment_partition_names(table)
+            if re.match(r'^p\d{6}$', name)
+        )
+        after = months[-1] if months else _add_months(self.comment_partition_start, -1)
+        specs = self._comment_partition_specs(after)
+        if not specs:
+            return 0
+        definitions = ', '.join(f"PARTITION {name} VALUES LESS THAN ({bound})" for name, bound in specs)
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO "
+                    f"({definitions}, PARTITION p_future VALUES LESS THAN (MAXVALUE))"
+                )
+            logger.info(f"{table} 新增分区: {specs[0][0]} ~ {specs[-1][0]}")
+        except self.errors as e:
+            logger.error(f"{table} 新增分区失败: {e}")
+            return 0
+        return len(specs)
+
+    def convert_comments_to_partitioned(self):
+        """把普通布局的 novel_comments 复制到分区表并原子替换，返回复制的行数
+
+        按 comment_id 分批复制，原表保留为 novel_comments_old 由人工确认后删除。
+        复制期间的新写入不会同步，需停止评论爬虫后执行。
+        """
+        if not self.comment_partitioned:
+            raise ValueError("COMMENT_TABLE_LAYOUT 不是 partitioned")
+        if self._comment_partition_names():
+            logger.info("novel_comments 已是分区表")
+            return 0
+        with self.connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS novel_comments_new")
+            cursor.execute(self._comment_table_ddl('novel_comments_new'))
+        total = 0
+        last_id = ''
+        while True:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT comment_id FROM novel_comments WHERE comment_id > %s ORDER BY comment_id LIMIT %s",
+                    (last_id, self.migration_batch_size)
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    break
+                cursor.execute(
+                    "INSERT IGNORE INTO novel_comments_new "
+                    "(comment_id, book_id, user_name, content, create_time, like_count, created_at) "
+                    "SELECT comment_id, book_id, user_name, content, COALESCE(create_time, %s), like_count, created_at "
+                    "FROM novel_comments WHERE comment_id > %s AND comment_id <= %s",
+                    (UNKNOWN_COMMENT_TIME, last_id, ids[-1])
+                )
+                total += cursor.rowcount
+            self.connection.commit()
+            last_id = ids[-1]
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "RENAME TABLE novel_comments TO novel_comments_old, novel_comments_new TO novel_comments"
+            )
+        logger.info(f"novel_comments 已转换为分区表: 复制 {total} 行，原表保留为 novel_comments_old")
+        return total
+
+    def _chapter_schema(self):
+        """返回 (是否已有 chapter_id 列, 是否仍有旧的 URL 唯一索引)"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+                "AND TABLE_NAME = 'novel_chapters' AND COLUMN_NAME = 'chapter_id'"
+            )
+            has_column = cursor.fetchone()[0] > 0
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() "
+                "AND TABLE_NAME = 'novel_chapters' AND INDEX_NAME = 'unique_chapter_url'"
+            )
+            has_url_index = cursor.fetchone()[0] > 0
+        return has_column, has_url_index
+
+    def migrate_chapters(self):
+        """在线迁移旧版 novel_chapters
+
+        1. ``ALGORITHM=INPLACE, LOCK=NONE`` 增加 chapter_id / chapter_index 列，不阻塞读写；
+        2. 按主键分批从 chapter_url 回填 chapter_id；
+        3. 按主键区间分批删除 (book_id, chapter_id) 重复的旧行，只保留最新一条；
+        4. 建立 (book_id, chapter_id) 唯一索引并删除 chapter_url(500) 前缀索引。
+
+        多个进程同时启动时用 GET_LOCK 串行化，任一步失败只记录日志，下次启动继续。
+        """
+        has_column, has_url_index = self._chapter_schema()
+        if has_column and not has_url_index:
+            return
+
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK('linovel_migrate_chapters', 600)")
+            if cursor.fetchone()[0] != 1:
+                logger.warning("未能获取章节表迁移锁，跳过本次迁移")
+                return
+        try:
+            has_column, has_url_index = self._chapter_schema()
+            if has_column and not has_url_index:
+                return
+            logger.info("开始迁移 novel_chapters 到 (book_id, chapter_id) 唯一键")
+            with self.connection.cursor() as cursor:
+                if not has_column:
+                    cursor.execute(
+                        "ALTER TABLE novel_chapters "
+                        "ADD COLUMN chapter_id BIGINT NULL AFTER volume_index, "
+                        "ADD COLUMN chapter_index INT NULL AFTER chapter_id, "
+                        "ALGORITHM=INPLACE, LOCK=NONE"
+                    )
+            filled = self._backfill_chapter_ids()
+            removed = self._delete_duplicate_chapters()
+            # 迁移期间旧版进程可能仍在写入无 chapter_id 的行，改为 NOT NULL 前再补一次
+            filled += self._backfill_chapter_ids()
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "ALTER TABLE novel_chapters "
+                    "MODIFY chapter_id BIGINT NOT NULL, "
+                    "ADD UNIQUE KEY unique_book_chapter (book_id, chapter_id), "
+                    "DROP INDEX unique_chapter_url, "
+                    "ALGORITHM=INPLACE, LOCK=NONE"
+                )
+            logger.info(f"novel_chapters 迁移完成: 回填 {filled} 行, 删除重复 {removed} 行")
+        except self.errors as e:
+            self.connection.rollback()
+            logger.error(f"novel_chapters 迁移失败，下次启动时重试: {e}")
+        finally:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT RELEASE_LOCK('linovel_migrate_chapters')")
+
+    def _backfill_chapter_ids(self):
+        """按主键分批回填 chapter_id，每批单独提交，不长时间持有锁"""
+        total = 0
+        last_id = 0
+        while True:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, chapter_url FROM novel_chapters "
+                    "WHERE id > %s AND chapter_id IS NULL ORDER BY id LIMIT %s",
+                    (last_id, self.migration_batch_size)
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                cursor.executemany(
+                    "UPDATE novel_chapters SET chapter_id = %s WHERE id = %s",
+                    [(fingerprint.chapter_id(url), row_id) for row_id, url in rows]
+                )
+            self.connection.commit()
+            last_id = rows[-1][0]
+            total += len(rows)
+        return total
+
+    def _delete_duplicate_chapters(self):
+        """按主键区间分批删除重复章节的旧行，每批单独提交
+
+        重复行先用一致性读（不加锁）找出，再按主键删除，每个事务只锁定本批的行，
+        不会像整表自连接 DELETE 那样长时间持有全表的行锁/间隙锁并产生大量 undo。
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM novel_chapters")
+            max_id = cursor.fetchone()[0]
+        total = 0
+        for low in range(0, max_id, self.migration_batch_size):
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT c.id FROM novel_chapters c "
+                    "WHERE c.id > %s AND c.id <= %s AND EXISTS ("
+                    "SELECT 1 FROM novel_chapters n "
+                    "WHERE n.book_id = c.book_id AND n.chapter_id = c.chapter_id AND n.id > c.id)",
+                    (low, low + self.migration_batch_size)
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    continue
+                total += cursor.execute(
+                    f"DELETE FROM novel_chapters WHERE id IN ({', '.join(['%s'] * len(ids))})", ids
+                )
+            self.connection.commit()
+        return total
+
+    def _build_upsert(self, table, columns, updates):
+        assignments = ', '.join(
+            _MYSQL_ASSIGNMENTS[mode].format(col=col)
+            for col, mode in updates.items()
+        )
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON DUPLICATE KEY UPDATE {assignments}"
+        )
+
+
+def _parse_month(value):
+    """``YYYY-MM`` 转换为 (年, 月)"""
+    year, month = str(value).split('-')[:2]
+    return int(year), int(month)
+
+
+def _add_months(month, count):
+    index = month[0] * 12 + month[1] - 1 + count
+    return index // 12, index % 12 + 1
+
+
+def _month_bound(month):
+    return f"{month[0]:04d}-{month[1]:02d}-01 00:00:00"
+
+
+class _SQLiteCursor:
+    """sqlite3 游标包装：支持 ``with`` 语句，并把 ``%s`` 占位符转换为 ``?``"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), params or ())
+        return self._cursor.rowcount
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql.replace('%s', '?'), seq_of_params)
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+# 同一进程内按数据库文件绝对路径共享的连接：{path: _SQLiteConnection}
+_shared_connections = {}
+_shared_connections_lock = threading.Lock()
+
+
+class _SQLiteConnection:
+    """sqlite3 连接包装：``commit()`` 按批真正提交，减少 fsync 次数
+
+    未提交期间持有 WAL 写锁，空闲时由 ``flush_due()``（见 SQLiteBackend.flush_interval）按时提交。
+    同一进程内的多个 SQLiteBackend（如 run_all_spiders 中的三个 DatabasePipeline）打开同一文件时
+    共享一个连接（引用计数，最后一个 ``close()`` 才真正关闭），彼此之间不会因未提交的批次争用写锁；
+    写入都在反应器线程中执行，批次由各管道交替累积，任一方提交时一并提交。
+    """
+
+    def __init__(self, connection, commit_every=500, commit_interval=1.0, path=None):
+        self._connection = connection
+        self.commit_every = max(1, commit_every)
+        self.commit_interval = commit_interval
+        self.path = path
+        self._refs = 1
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def cursor(self, *args):
+        return _SQLiteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._pending += 1
+        if (self._pending >= self.commit_every
+                or time.monotonic() - self._last_commit >= self.commit_interval):
+            self.flush()
+
+    def flush(self):
+        self._connection.commit()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def flush_due(self):
+        if self._pending and time.monotonic() - self._last_commit >= self.commit_interval:
+            self.flush()
+
+    def rollback(self):
+        self._connection.rollback()
+        self._pending = 0
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        with _shared_connections_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if _shared_connections.get(self.path) is self:
+                del _shared_connections[self.path]
+        try:
+            self.flush()
+        finally:
+            self._connection.close()
+
+
+class SQLiteBackend(StorageBackend):
+    name = 'sqlite'
+    errors = (sqlite3.Error,)
+    status_book_expr = ("CAST(CASE WHEN instr(identifier, '_') > 0 "
+                        "THEN substr(identifier, 1, instr(identifier, '_') - 1) ELSE identifier END AS INTEGER)")
+
+    def __init__(self, path, commit_every=500, commit_interval=1.0):
+        super().__init__()
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+
+    def connect(self):
+        path = os.path.abspath(self.path)
+        with _shared_connections_lock:
+            connection = _shared_connections.get(path)
+            if connection is not None:
+                # 同一进程内已打开该文件：共享连接，避免另开连接在反应器线程中等待对方的写锁
+                connection._refs += 1
+                self.connection = connection
+                logger.info(f"SQLite连接已共享: {self.path}")
+                return self.connection
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 多个爬虫进程可共享同一文件，写锁冲突时最多等待30秒
+            raw = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            raw.execute('PRAGMA journal_mode=WAL')
+            raw.execute('PRAGMA synchronous=NORMAL')
+            raw.execute('PRAGMA foreign_keys=OFF')
+            self.connection = _SQLiteConnection(raw, self.commit_every, self.commit_interval, path)
+            _shared_connections[path] = self.connection
+        logger.info(f"SQLite连接成功: {self.path}")
+        return self.connection
+
+    @property
+    def flush_interval(self):
+        return self.commit_interval
+
+    def flush_due(self):
+        if self.connection is not None:
+            self.connection.flush_due()
+
+    def create_tables(self):
+        """与 MySQLBackend.create_tables 相同的表结构（SQLite 方言）"""
+        raw = self.connection._connection
+        raw.executescript("""
+            CREATE TABLE IF NOT EXISTS novels (
+                book_id VARCHAR(20) PRIMARY KEY,
+                title VARCHAR(255) NOT NULL,
+                cover_url TEXT,
+                author VARCHAR(100),
+                intro TEXT,
+                tags TEXT,
+                word_count INT,
+                popularity INT,
+                favorites INT,
+                status VARCHAR(20),
+                sign_status VARCHAR(50),
+                last_update VARCHAR(50),
+                detail_url TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TRIGGER IF NOT EXISTS novels_updated_at AFTER UPDATE ON novels
+            FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at BEGIN
+                UPDATE novels SET updated_at = CURRENT_TIMESTAMP WHERE book_id = NEW.book_id;
+            END;
+
+            CREATE TABLE IF NOT EXISTS novel_volumes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                book_id VARCHAR(20) NOT NULL,
+                volume_index INT NOT NULL,
+                volume_title VARCHAR(255),
+                volume_word_count INT,
+                volume_desc TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (book_id, volume_index),
+                FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
+            );
+
+            CREATE TABLE IF NOT EXISTS novel_chapters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                book_id VARCHAR(20) NOT NULL,
+                volume_index INT,
+                chapter_id BIGINT NOT NULL,
+                chapter_index INT,
+                chapter_url TEXT NOT NULL,
+                chapter_title VARCHAR(500),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (book_id, chapter_id),
+                FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
+            );
+
+            CREATE TABLE IF NOT EXISTS novel_comments (
+                comment_id VARCHAR(50) PRIMARY KEY,
+                book_id VARCHAR(20) NOT NULL,
+                user_name VARCHAR(100),
+                content TEXT,
+                create_time DATETIME,
+                like_count INT DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
+            );
+            CREATE INDEX IF NOT EXISTS novel_comments_book_time ON novel_comments (book_id, create_time);
+
+            CREATE TABLE IF NOT EXISTS crawl_status (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                spider_name VARCHAR(50) NOT NULL,
+                status_type VARCHAR(50) NOT NULL,
+                identifier VARCHAR(100) NOT NULL,
+                status VARCHAR(20) DEFAULT 'pending',
+                last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                retry_count INT DEFAULT 0,
+                UNIQUE (spider_name, status_type, identifier)
+            );
+            CREATE INDEX IF NOT EXISTS crawl_status_status
+                ON crawl_status (status, spider_name, status_type, identifier);
+            CREATE INDEX IF NOT EXISTS crawl_status_last_update ON crawl_status (last_update);
+            CREATE TRIGGER IF NOT EXISTS crawl_status_last_update AFTER UPDATE ON crawl_status
+            FOR EACH ROW WHEN NEW.last_update = OLD.last_update BEGIN
+                UPDATE crawl_status SET last_update = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END;
+
+            CREATE TABLE IF NOT EXISTS crawl_status_summary (
+                spider_name VARCHAR(50) NOT NULL,
+                status_type VARCHAR(50) NOT NULL,
+                status VARCHAR(20) NOT NULL,
+                row_count BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (spider_name, status_type, status)
+            );
+            CREATE TRIGGER IF NOT EXISTS crawl_status_summary_updated_at AFTER UPDATE ON crawl_status_summary
+            FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at BEGIN
+                UPDATE crawl_status_summary SET updated_at = CURRENT_TIMESTAMP
+                WHERE spider_name = NEW.spider_name AND status_type = NEW.status_type AND status = NEW.status;
+            END;
+        """)
+        logger.info("数据库表检查/创建完成")
+
+        self.migrate_chapters()
+        self.ensure_status_summary()
+
+    def migrate_chapters(self):
+        """SQLite 无法删除表内唯一约束，旧版表在一个事务内重建为新结构"""
+        raw = self.connection._connection
+        columns = [row[1] for row in raw.execute("PRAGMA table_info(novel_chapters)")]
+        if 'chapter_id' in columns:
+            return
+        logger.info("开始迁移 novel_chapters 到 (book_id, chapter_id) 唯一键")
+        raw.create_function('linovel_chapter_id', 1, fingerprint.chapter_id, deterministic=True)
+        self.connection.flush()
+        try:
+            raw.execute("BEGIN IMMEDIATE")
+            raw.execute("ALTER TABLE novel_chapters RENAME TO novel_chapters_old")
+            raw.execute("""
+                CREATE TABLE novel_chapters (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book_id VARCHAR(20) NOT NULL,
+                    volume_index INT,
+                    chapter_id BIGINT NOT NULL,
+                    chapter_index INT,
+                    chapter_url TEXT NOT NULL,
+                    chapter_title VARCHAR(500),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (book_id, chapter_id),
+                    FOREIGN KEY (book_id) REFERENCES novels(book_id) ON DELETE CASCADE
+                )
+            """)
+            # 按 id 升序插入，重复章节保留最新一条
+            raw.execute("""
+                INSERT OR REPLACE INTO novel_chapters
+                    (id, book_id, volume_index, chapter_id, chapter_url, chapter_title, created_at)
+                SELECT id, book_id, volume_index, linovel_chapter_id(chapter_url),
+                       chapter_url, chapter_title, created_at
+                FROM novel_chapters_old ORDER BY id
+            """)
+            raw.execute("DROP TABLE novel_chapters_old")
+            raw.commit()
+            logger.info("novel_chapters 迁移完成")
+        except sqlite3.Error as e:
+            raw.rollback()
+            logger.error(f"novel_chapters 迁移失败，下次启动时重试: {e}")
+
+    def _build_upsert(self, table, columns, updates):
+        assignments = ', '.join(
+            _SQLITE_ASSIGNMENTS[mode].format(col=col)
+            for col, mode in updates.items()
+        )
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON CONFLICT ({', '.join(CONFLICT_COLUMNS[table])}) DO UPDATE SET {assignments}"
+        )
+
+
+def build_backend(settings, mysql_config):
+    """根据 STORAGE_BACKEND 创建存储后端"""
+    backend = (settings.get('STORAGE_BACKEND') or 'mysql').lower()
+    if backend == 'mysql':
+        return MySQLBackend(
+            mysql_config,
+            migration_batch_size=settings.getint('CHAPTER_MIGRATION_BATCH_SIZE', 5000),
+            comment_layout=(settings.get('COMMENT_TABLE_LAYOUT') or 'standard').lower(),
+            comment_foreign_key=settings.getbool('COMMENT_FOREIGN_KEY', True),
+            comment_partition_start=settings.get('COMMENT_PARTITION_START', '2018-01'),
+            comment_partitions_ahead=settings.getint('COMMENT_PARTITIONS_AHEAD', 12),
+        )
+    if backend == 'sqlite':
+        if (settings.get('COMMENT_TABLE_LAYOUT') or 'standard').lower() != 'standard':
+            logger.warning("SQLite 不支持分区表，COMMENT_TABLE_LAYOUT 仅对 MySQL 生效")
+        return SQLiteBackend(
+            settings.get('SQLITE_PATH', 'storage/db/linovel.sqlite3'),
+            commit_every=settings.getint('SQLITE_COMMIT_EVERY', 500),
+            commit_interval=settings.getfloat('SQLITE_COMMIT_INTERVAL', 1.0),
+        )
+    raise ValueError(f"未知的 STORAGE_BACKEND: {backend}")
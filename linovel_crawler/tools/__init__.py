@@ -0,0 +1 @@
+"""命令行工具的实现，统一入口见 linovel_crawler.cli（``linovel <子命令>``）"""
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+item 内存占用基准
+
+分别创建 N 个 scrapy.Item 版与轻量版（LIGHTWEIGHT_ITEMS）的章节/评论 item，
+用 tracemalloc 统计 item 对象本身的内存（字段值预先创建并共享，不计入），
+输出每个 item 的平均字节数与节省比例。
+
+用法示例：
+  python benchmark_items.py
+  python benchmark_items.py --count 200000
+"""
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime
+
+from linovel_crawler.items import (
+    NovelChapterItem, NovelChapterRecord, NovelCommentItem, NovelCommentRecord,
+)
+
+
+def chapter_fields(i):
+    return {
+        'book_id': str(100000 + i % 1000),
+        'volume_index': i % 20,
+        'chapter_id': 500000 + i,
+        'chapter_index': i,
+        'chapter_url': f"https://www.linovel.net/book/{100000 + i % 1000}/{500000 + i}.html",
+        'chapter_title': f"第{i}章",
+    }
+
+
+def comment_fields(i):
+    return {
+        'book_id': str(100000 + i % 1000),
+        'comment_id': str(9000000 + i),
+        'user_name': f"user{i % 5000}",
+        'content': f"评论内容 {i}",
+        'create_time': datetime(2024, 1, 1),
+        'like_count': i % 100,
+    }
+
+
+def measure(item_cls, fields_list):
+    """返回 item_cls 每个实例占用的平均字节数"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [item_cls(**fields) for fields in fields_list]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # 扣除保存 item 的列表本身
+    list_bytes = 8 * len(items)
+    del items
+    return (after - before - list_bytes) / len(fields_list)
+
+
+def parse_args(argv=None, prog=None):
+    p = argparse.ArgumentParser(prog=prog, description='比较 scrapy.Item 与轻量 item 的内存占用')
+    p.add_argument('--count', type=int, default=100000, help='每种 item 创建的数量（默认 100000）')
+    return p.parse_args(argv)
+
+
+def main(argv=None, prog=None):
+    args = parse_args(argv, prog)
+    cases = (
+        ('章节', chapter_fields, NovelChapterItem, NovelChapterRecord),
+        ('评论', comment_fields, NovelCommentItem, NovelCommentRecord),
+    )
+    print(f"每种 item 创建 {args.count:,} 个")
+    print(f"{'类型':<6}{'scrapy.Item':>14}{'轻量 item':>14}{'节省':>10}")
+    for label, make_fields, item_cls, record_cls in cases:
+        fields_list = [make_fields(i) for i in range(args.count)]
+        item_bytes = measure(item_cls, fields_list)
+        record_bytes = measure(record_cls, fields_list)
+        saving = 1 - record_bytes / item_bytes if item_bytes else 0
+        print(f"{label:<6}{item_bytes:>12.0f} B{record_bytes:>12.0f} B{saving:>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
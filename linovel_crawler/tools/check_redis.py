@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+检查Redis缓存中的数据
+
+默认只执行常数时间的命令（DBSIZE、INFO、PFCOUNT 计数与少量抽查位），
+可以在爬虫运行时随时执行；``--scan`` 用增量 SCAN + 管道 BITCOUNT 精确统计各 spider 的完成数，
+``--pause`` 控制批间休眠，避免占满 Redis；``--book`` 一次往返查看整本书的评论完成页。
+"""
+
+import argparse
+from collections import Counter
+
+from linovel_crawler import config, fingerprint, redis_status
+
+# 抽查的完成状态（按 crawl_status 键名书写，查询时转换为位图中的位）
+SAMPLE_KEYS = [
+    'crawl_status:novel_list:list_page:1',
+    'crawl_status:novel_detail:detail_page:100818',
+    'crawl_status:novel_comment:comment_page:100007_1'
+]
+
+
+def parse_args(argv=None, prog=None):
+    p = argparse.ArgumentParser(prog=prog, description='检查Redis缓存中的数据')
+    p.add_argument('--scan', action='store_true', help='增量 SCAN 精确统计各 spider 的完成数（键很多时耗时较长）')
+    p.add_argument('--book', type=int, help='查看一本书已完成的评论页码')
+    p.add_argument('--batch-size', type=int, default=1000, help='每次 SCAN 的键数（默认1000）')
+    p.add_argument('--limit', type=int, default=0, help='--scan 最多检查的键数，0 表示不限')
+    p.add_argument('--pause', type=float, default=0.0, help='--scan 批间休眠秒数（默认0）')
+    return p.parse_args(argv)
+
+
+def print_summary(redis_client):
+    """常数时间的概览：键总数、内存占用与完成计数
+
+    计数由启动预加载与 DatabasePipeline 的每次完成共同更新，反映正在运行的爬虫。
+    """
+    info = redis_client.info('memory')
+    print(f"键总数: {redis_client.dbsize()}，内存占用: {info.get('used_memory_human')}")
+
+    counts = redis_status.counters(redis_client)
+    print("\n不同Spider的已完成缓存（HyperLogLog 近似值，含运行中爬虫的实时完成，只增不减）:")
+    for spider_name, status_type in redis_status.STATUS_TYPES:
+        print(f"  {spider_name} ({status_type}): 约 {counts[(spider_name, status_type)]} 个")
+    print(f"  url_cache: 约 {counts['url_cache']} 个")
+
+    print(f"\n关键缓存键检查:")
+    pipe = redis_client.pipeline(transaction=False)
+    for status_key in SAMPLE_KEYS:
+        pipe.getbit(*redis_status.completed_bit(fingerprint.from_status_key(status_key)))
+    for status_key, completed in zip(SAMPLE_KEYS, pipe.execute()):
+        print(f"  {status_key}: {'completed' if completed else None}")
+
+
+def scan_status_keys(redis_client, batch_size, limit, pause):
+    """增量遍历完成位图（及评论页溢出集合），每批一次管道 BITCOUNT/SCARD；
+    另统计 url_cache 时间桶与旧版字符串键"""
+    bitmap_count = Counter()
+    completed_count = Counter()
+    for keys in redis_status.scan_batches(
+            redis_client, f"{redis_status.BITS_PREFIX}*", batch_size, limit, pause):
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            if f":{redis_status.OVERFLOW_TAG}:" in key:
+                pipe.scard(key)
+            else:
+                pipe.bitcount(key)
+        for key, count in zip(keys, pipe.execute()):
+            names = tuple(key[len(redis_status.BITS_PREFIX):].split(':', 2)[:2])
+            bitmap_count[names] += 1
+            completed_count[names] += count
+    print(f"找到 {sum(bitmap_count.values())} 个完成位图/集合，共 {sum(completed_count.values())} 个已完成页面")
+
+    print("\n不同Spider的缓存分布:")
+    for names in redis_status.STATUS_TYPES:
+        print(f"  {names[0]} ({names[1]}): {completed_count.get(names, 0)} 个已完成，"
+              f"{bitmap_count.get(names, 0)} 个键")
+
+    url_total = 0
+    for keys in redis_status.scan_batches(
+            redis_client, f"{redis_status.URL_CACHE_PREFIX}*", batch_size, limit, pause):
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.scard(key)
+        url_total += sum(pipe.execute())
+    print(f"\nurl_cache缓存: {url_total} 个")
+
+    legacy_total = sum(len(keys) for keys in redis_status.scan_batches(
+        redis_client, f"{redis_status.LEGACY_STATUS_PREFIX}*", batch_size, limit, pause))
+    if legacy_total:
+        print(f"旧版 crawl_status:* 字符串键: {legacy_total} 个（不再读取，到期自动删除）")
+
+
+def print_book(redis_client, book_id):
+    """整本书已完成的评论页（一次往返）"""
+    pages = redis_status.completed_pages(redis_client, book_id)
+    print(f"\nbook_id {book_id} 已完成评论页 {len(pages)} 个: {pages}")
+
+
+def check_redis_cache(args):
+    try:
+        # 连接Redis（支持密码与ACL用户名，可选）
+        redis_client = config.redis_client()
+
+        # 检查连接
+        redis_client.ping()
+        print("Redis连接成功")
+
+        print_summary(redis_client)
+        if args.book:
+            print_book(redis_client, args.book)
+        if args.scan:
+            print()
+            scan_status_keys(redis_client, args.batch_size, args.limit, args.pause)
+
+    except Exception as e:
+        print(f"检查失败: {e}")
+
+def main(argv=None, prog=None):
+    check_redis_cache(parse_args(argv, prog))
+
+
+if __name__ == "__main__":
+    main()
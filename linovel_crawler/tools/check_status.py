@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+检查crawl_status表中的数据
+"""
+
+import argparse
+
+from linovel_crawler import config
+
+
+def check_crawl_status():
+    try:
+        conn = config.mysql_connect()
+
+        cursor = conn.cursor()
+
+        # 检查总记录数（读取汇总表，不扫描 crawl_status）
+        cursor.execute('SELECT COALESCE(SUM(row_count), 0) FROM crawl_status_summary')
+        count = cursor.fetchone()[0]
+        print(f'crawl_status表中有 {count} 条记录')
+
+        if count > 0:
+            # 检查不同状态的分布
+            cursor.execute('''
+                SELECT status, SUM(row_count) as count
+                FROM crawl_status_summary
+                GROUP BY status
+                HAVING count <> 0
+                ORDER BY count DESC
+            ''')
+            status_stats = cursor.fetchall()
+            print('\n状态分布:')
+            for status, cnt in status_stats:
+                print(f'  {status}: {cnt} 条')
+
+            # 检查前10条记录
+            cursor.execute('SELECT spider_name, status_type, identifier, status, retry_count, last_update FROM crawl_status ORDER BY last_update DESC LIMIT 10')
+            rows = cursor.fetchall()
+            print('\n最近10条记录:')
+            for row in rows:
+                spider_name, status_type, identifier, status, retry_count, last_update = row
+                print(f'  {spider_name} - {status_type} - {identifier}: {status} (重试:{retry_count})')
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"检查失败: {e}")
+
+def main(argv=None, prog=None):
+    argparse.ArgumentParser(prog=prog, description='检查crawl_status表中的数据').parse_args(argv)
+    check_crawl_status()
+
+
+if __name__ == "__main__":
+    main()
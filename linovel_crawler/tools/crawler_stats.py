@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+爬虫统计和监控脚本
+
+状态统计与进度读取 crawl_status_summary 汇总表（由爬虫写入状态时增量维护），
+数据总量默认使用 information_schema 的估算行数，统计开销不随数据量增长。
+
+用法：
+  python crawler_stats.py                  # 统计报告
+  python crawler_stats.py --exact          # 数据总量使用精确的 COUNT(*)（大表较慢）
+  python crawler_stats.py --rebuild-summary  # 按 crawl_status 重建汇总表后再统计
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from linovel_crawler import config
+
+
+def rebuild_summary():
+    """建表/补索引后按 crawl_status 全量重建汇总表"""
+    from linovel_crawler.storage import MySQLBackend
+
+    backend = MySQLBackend(config.mysql_config())
+    backend.connect()
+    try:
+        backend.create_tables()
+        rows = backend.rebuild_status_summary()
+        print(f"汇总表已重建: {rows} 行")
+    finally:
+        backend.close()
+
+
+def get_crawler_stats(exact=False):
+    """获取爬虫统计信息"""
+    try:
+        connection = config.mysql_connect()
+        cursor = connection.cursor()
+
+        print("爬虫统计报告")
+        print("=" * 60)
+
+        # 1. 数据总量统计
+        print("\n数据总量统计:")
+        tables = ['novels', 'novel_volumes', 'novel_chapters', 'novel_comments']
+        if exact:
+            for table in tables:
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                count = cursor.fetchone()[0]
+                print(f"   {table}: {count:,} 条记录")
+        else:
+            cursor.execute(f"""
+                SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})
+            """, tables)
+            estimates = dict(cursor.fetchall())
+            for table in tables:
+                print(f"   {table}: 约 {estimates.get(table) or 0:,} 条记录")
+
+        # 2. 爬取状态统计
+        print("\n爬取状态统计:")
+        cursor.execute("""
+            SELECT spider_name, status, SUM(row_count) as count
+            FROM crawl_status_summary
+            GROUP BY spider_name, status
+            HAVING count <> 0
+            ORDER BY spider_name, status
+        """)
+
+        status_stats = cursor.fetchall()
+        current_spider = None
+        for spider_name, status, count in status_stats:
+            if spider_name != current_spider:
+                if current_spider:
+                    print()
+                print(f"   {spider_name}:")
+                current_spider = spider_name
+            status_text = {
+                'pending': '待处理',
+                'processing': '处理中',
+                'completed': '已完成',
+                'failed': '已失败'
+            }.get(status, f'{status}')
+            print(f"     {status_text}: {count:,}")
+
+        # 3. 失败统计和重试分析（idx_status 索引，只扫描失败状态的行）
+        print("\n失败和重试统计:")
+        cursor.execute("""
+            SELECT spider_name, status_type, COUNT(*) as failed_count,
+                   AVG(retry_count) as avg_retries, MAX(retry_count) as max_retries
+            FROM crawl_status
+            WHERE status = 'failed'
+            GROUP BY spider_name, status_type
+            ORDER BY failed_count DESC
+        """)
+
+        failed_stats = cursor.fetchall()
+        if failed_stats:
+            for spider_name, status_type, failed_count, avg_retries, max_retries in failed_stats:
+                print(f"   {spider_name} - {status_type}:")
+                print(f"     失败次数: {failed_count:,}")
+                print(f"     平均重试: {avg_retries:.1f} 次")
+                print(f"     最大重试: {max_retries:.1f} 次")
+        else:
+            print("   暂无失败记录")
+
+        # 4. 最近活动统计（idx_last_update 索引，只扫描时间范围内的行）
+        print("\n最近活动统计:")
+        # 最近1小时
+        one_hour_ago = datetime.now() - timedelta(hours=1)
+        cursor.execute("""
+            SELECT COUNT(*) FROM crawl_status
+            WHERE last_update >= %s
+        """, (one_hour_ago,))
+        recent_count = cursor.fetchone()[0]
+        print(f"   最近1小时更新: {recent_count:,} 条")
+
+        # 最近24小时
+        one_day_ago = datetime.now() - timedelta(days=1)
+        cursor.execute("""
+            SELECT COUNT(*) FROM crawl_status
+            WHERE last_update >= %s
+        """, (one_day_ago,))
+        day_count = cursor.fetchone()[0]
+        print(f"   最近24小时更新: {day_count:,} 条")
+
+        # 5. 进度估算
+        print("\n爬取进度估算:")
+
+        # 列表页完成情况
+        cursor.execute("""
+            SELECT
+                SUM(CASE WHEN status = 'completed' THEN row_count ELSE 0 END) as completed,
+                SUM(row_count) as total
+            FROM crawl_status_summary
+            WHERE spider_name = 'novel_list' AND status_type = 'list_page'
+        """)
+        list_result = cursor.fetchone()
+        if list_result and list_result[1]:
+            completed_pages = list_result[0] or 0
+            total_pages = list_result[1]
+            progress = (completed_pages / total_pages) * 100
+            print(f"   列表页进度: {progress:.1f}% ({completed_pages}/{total_pages})")
+        # 小说详情完成情况
+        cursor.execute("""
+            SELECT
+                SUM(CASE WHEN status = 'completed' THEN row_count ELSE 0 END) as completed,
+                SUM(row_count) as total
+            FROM crawl_status_summary
+            WHERE spider_name = 'novel_detail' AND status_type = 'detail_page'
+        """)
+        detail_result = cursor.fetchone()
+        if detail_result and detail_result[1]:
+            completed_details = detail_result[0] or 0
+            total_details = detail_result[1]
+            progress = (completed_details / total_details) * 100
+            print(f"   详情页进度: {progress:.1f}% ({completed_details}/{total_details})")
+        # 评论完成情况
+        cursor.execute("""
+            SELECT
+                SUM(CASE WHEN status = 'completed' THEN row_count ELSE 0 END) as completed,
+                SUM(row_count) as total
+            FROM crawl_status_summary
+            WHERE spider_name = 'novel_comment' AND status_type = 'comment_page'
+        """)
+        comment_result = cursor.fetchone()
+        if comment_result and comment_result[1]:
+            completed_comments = comment_result[0] or 0
+            total_comments = comment_result[1]
+            progress = (completed_comments / total_comments) * 100
+            print(f"   评论页进度: {progress:.1f}% ({completed_comments}/{total_comments})")
+        cursor.close()
+        connection.close()
+
+        print("\n统计报告生成完成！")
+
+    except Exception as e:
+        print(f"获取统计信息失败: {e}")
+
+def get_failed_items_details():
+    """获取失败项目的详细信息"""
+    try:
+        connection = config.mysql_connect()
+        cursor = connection.cursor()
+
+        print("\n失败项目详情 (最近10条):")
+        print("-" * 60)
+
+        cursor.execute("""
+            SELECT spider_name, status_type, identifier, retry_count, last_update
+            FROM crawl_status
+            WHERE status = 'failed'
+            ORDER BY last_update DESC
+            LIMIT 10
+        """)
+
+        failed_items = cursor.fetchall()
+        if failed_items:
+            for spider_name, status_type, identifier, retry_count, last_update in failed_items:
+                print(f"   {spider_name} | {status_type} | {identifier} | 重试{retry_count}次 | {last_update}")
+        else:
+            print("   无失败项目")
+
+        cursor.close()
+        connection.close()
+
+    except Exception as e:
+        print(f"获取失败详情失败: {e}")
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='爬虫统计报告')
+    parser.add_argument('--exact', action='store_true', help='数据总量使用精确的 COUNT(*)')
+    parser.add_argument('--rebuild-summary', action='store_true', help='先按 crawl_status 重建状态汇总表')
+    args = parser.parse_args(argv)
+    if args.rebuild_summary:
+        rebuild_summary()
+    get_crawler_stats(exact=args.exact)
+    get_failed_items_details()
+
+
+if __name__ == '__main__':
+    main()
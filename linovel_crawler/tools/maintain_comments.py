@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+评论表维护脚本
+
+配合 COMMENT_TABLE_LAYOUT 使用：
+
+- 分区布局（MySQL）下补充未来的月分区、把普通表转换为分区表
+- 无外键时做延迟完整性检查：查找/删除 novels 中不存在的书籍的评论
+
+用法示例：
+  # 检查孤立评论（不修改数据）
+  python maintain_comments.py --check-orphans
+
+  # 删除孤立评论
+  python maintain_comments.py --delete-orphans
+
+  # 补齐未来的月分区（爬虫启动时也会自动执行，可放入定时任务）
+  python maintain_comments.py --add-partitions
+
+  # 把现有的 novel_comments 转换为分区表（需先停止评论爬虫）
+  python maintain_comments.py --convert
+
+说明：
+- 通过 .env 读取 MySQL 连接信息，按项目 settings 中的 STORAGE_BACKEND / COMMENT_TABLE_LAYOUT 连接
+- --add-partitions 与 --convert 需要 COMMENT_TABLE_LAYOUT = 'partitioned'
+"""
+
+import argparse
+import sys
+
+from linovel_crawler import config, storage
+
+
+def parse_args(argv=None, prog=None):
+    p = argparse.ArgumentParser(prog=prog, description='评论表维护：分区与孤立数据检查')
+    p.add_argument('--check-orphans', action='store_true', help='列出 novels 中不存在的 book_id 的评论')
+    p.add_argument('--delete-orphans', action='store_true', help='删除孤立评论')
+    p.add_argument('--add-partitions', action='store_true', help='补齐未来的月分区')
+    p.add_argument('--convert', action='store_true', help='把普通表转换为分区表（原表保留为 novel_comments_old）')
+    args = p.parse_args(argv)
+    if not (args.check_orphans or args.delete_orphans or args.add_partitions or args.convert):
+        p.error('请至少指定一个操作')
+    return args
+
+
+def main(argv=None, prog=None):
+    args = parse_args(argv, prog)
+    try:
+        return run(args)
+    except Exception as e:
+        print(f"评论表维护失败: {e}")
+        return 1
+
+
+def run(args):
+    settings = config.project_settings()
+
+    backend = storage.build_backend(settings, config.mysql_config())
+    if (args.convert or args.add_partitions) and backend.name != 'mysql':
+        print('[ERROR] 分区表仅支持 MySQL 存储后端')
+        return 1
+    backend.connect()
+    try:
+        if args.convert:
+            rows = backend.convert_comments_to_partitioned()
+            print(f"[OK] 已转换为分区表，复制 {rows:,} 行；确认无误后可手动 DROP TABLE novel_comments_old")
+
+        if args.add_partitions:
+            if not backend.comment_partitioned:
+                print('[WARN] COMMENT_TABLE_LAYOUT 不是 partitioned，跳过 --add-partitions')
+            else:
+                added = backend.ensure_comment_partitions()
+                print(f"[OK] 新增 {added} 个分区")
+
+        if args.check_orphans or args.delete_orphans:
+            books = backend.orphan_comment_books()
+            print(f"孤立评论涉及 {len(books)} 本书" + (f": {', '.join(books[:20])}" if books else ''))
+            if args.delete_orphans and books:
+                deleted = backend.delete_orphan_comments()
+                print(f"[OK] 已删除孤立评论 {deleted:,} 条")
+    finally:
+        backend.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
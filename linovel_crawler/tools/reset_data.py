@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+一键清理数据脚本（破坏性操作）
+
+功能：
+- MySQL 数据清空：支持 TRUNCATE 和 DROP DATABASE
+- Redis 清理：支持 FLUSHDB 或按前缀删除断点缓存键（完成位图、url_cache、计数、去重集合与旧版 crawl_status 键），
+  增量 SCAN 后按块 UNLINK，实时显示进度
+- 本地断点状态清理：storage/state 与 storage/jobs
+- 选择性重置爬取状态（--reset-status）：按 spider / status_type / book_id 范围，
+  同时清理数据库 crawl_status（同步汇总表）、Redis 完成位图、本地状态文件与相关 spider 的去重记录；
+  作业目录只在重置覆盖整个 spider 时删除，业务数据保留，重新爬取时覆盖更新
+
+用法示例：
+  # 仅清空业务表并清理 Redis 相关键（推荐）
+  python reset_data.py --truncate --clear-redis --clear-local --yes
+
+  # 彻底重置数据库（删除并重新创建），并清空 Redis 整库（极度危险）
+  python reset_data.py --drop-db --flush-redis --clear-local --yes
+
+  # 只重新爬取 book_id 100000~100999 的评论
+  python reset_data.py --reset-status --spider novel_comment --book-from 100000 --book-to 100999 --yes
+
+说明：
+- 通过 .env 读取连接信息（MySQL/Redis）
+- 需要 --yes 参数确认后才会执行
+- 执行 --reset-status 前请先停止爬虫，否则运行中的进程会把内存中的完成状态重新写回
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+
+from linovel_crawler import config, dedup, fingerprint, redis_status
+
+SPIDERS = tuple(spider for spider, _ in fingerprint.STATUS_TYPES.values())
+LIST_SPIDER, LIST_STATUS_TYPE = fingerprint.STATUS_TYPES[fingerprint.KIND_LIST]
+# status_type -> 写入该状态的 spider_name
+STATUS_TYPE_OWNERS = {status_type: spider for spider, status_type in fingerprint.STATUS_TYPES.values()}
+COMMENT_SPIDER, COMMENT_STATUS_TYPE = fingerprint.STATUS_TYPES[fingerprint.KIND_COMMENT]
+# 整本书评论完成状态：novel_comment 按它挑选待爬书籍（book_source.iter_pending）
+BOOK_COMMENTS_STATUS_TYPE = 'book_comments'
+STATUS_TYPE_OWNERS[BOOK_COMMENTS_STATUS_TYPE] = COMMENT_SPIDER
+# --clear-redis 按前缀删除的键：断点缓存与 RedisSeenSet 的去重集合
+REDIS_PATTERNS = redis_status.KEY_PATTERNS + ('dedup:*',)
+
+
+def parse_args(argv=None, prog=None):
+    p = argparse.ArgumentParser(prog=prog, description='破坏性数据清理（谨慎使用）')
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument('--truncate', action='store_true', help='TRUNCATE 业务表清空（保留数据库）')
+    g.add_argument('--drop-db', action='store_true', help='DROP DATABASE 并重新创建（最危险）')
+    g.add_argument('--reset-status', action='store_true',
+                   help='只重置选中的爬取状态（数据库、Redis、本地状态一并处理），保留业务数据')
+
+    p.add_argument('--clear-redis', action='store_true', help='按前缀删除 Redis 断点缓存与去重键（批量 UNLINK）')
+    p.add_argument('--flush-redis', action='store_true', help='Redis FLUSHDB（整库清空，最危险）')
+    p.add_argument('--clear-local', action='store_true', help='清理 storage/state 与 storage/jobs')
+
+    s = p.add_argument_group('--reset-status 的选择条件（可组合，均不指定时重置全部爬取状态）')
+    s.add_argument('--spider', choices=SPIDERS, help='只重置该 spider 的状态')
+    s.add_argument('--status-type', choices=tuple(STATUS_TYPE_OWNERS), help='只重置该类型的状态')
+    s.add_argument('--book-from', type=int, help='book_id 下限（含），不匹配列表页状态')
+    s.add_argument('--book-to', type=int, help='book_id 上限（含），不匹配列表页状态')
+
+    p.add_argument('--batch-size', type=int, default=1000, help='每批 SCAN/UNLINK 的键数与删除的行数（默认1000）')
+    p.add_argument('--yes', action='store_true', help='确认执行，否则仅打印将要执行的操作')
+    args = p.parse_args(argv)
+
+    selective = (args.spider, args.status_type, args.book_from, args.book_to)
+    if not args.reset_status and any(v is not None for v in selective):
+        p.error('--spider/--status-type/--book-from/--book-to 只能与 --reset-status 一起使用')
+    if args.reset_status and (args.clear_redis or args.flush_redis or args.clear_local):
+        p.error('--reset-status 会同时处理数据库、Redis 与本地状态，不能与 --clear-redis/--flush-redis/--clear-local 同用')
+    by_range = args.book_from is not None or args.book_to is not None
+    if by_range and args.status_type == LIST_STATUS_TYPE:
+        p.error('--book-from/--book-to 不适用于 list_page')
+    if by_range and args.spider == LIST_SPIDER:
+        p.error('--book-from/--book-to 不适用于 novel_list 的列表页状态')
+    return args
+
+
+class Progress:
+    """单行刷新的进度输出"""
+
+    def __init__(self, label):
+        self.label = label
+        self.shown = False
+
+    def __call__(self, count):
+        print(f'\r  {self.label}: {count:,}', end='', flush=True)
+        self.shown = True
+
+    def done(self):
+        if self.shown:
+            print()
+            self.shown = False
+
+
+def get_mysql_conn():
+    return config.mysql_connect()
+
+
+def drop_and_recreate_database(db_name: str):
+    """删除并重建数据库（使用不指定 database 的连接）"""
+    conn = config.mysql_connect(database=False)
+    cur = conn.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS `{db_name}`")
+    cur.execute(f"CREATE DATABASE `{db_name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def truncate_tables(conn):
+    """清空业务表，处理外键顺序并暂时关闭约束"""
+    cur = conn.cursor()
+    cur.execute('SET FOREIGN_KEY_CHECKS=0')
+    # 先删子表，再删父表，最后状态表
+    for tbl in ['novel_chapters', 'novel_volumes', 'novel_comments', 'novels', 'crawl_status',
+                'crawl_status_summary']:
+        try:
+            cur.execute(f'TRUNCATE TABLE {tbl}')
+        except Exception as e:
+            print(f'[WARN] TRUNCATE {tbl} 失败: {e}')
+    cur.execute('SET FOREIGN_KEY_CHECKS=1')
+    conn.commit()
+    cur.close()
+
+
+def clear_redis(prefix_only: bool, batch_size=1000):
+    client = config.redis_client()
+    client.ping()
+    if prefix_only:
+        progress = Progress('已删除 Redis 键')
+        total = redis_status.delete_matching(client, REDIS_PATTERNS, batch_size, progress=progress)
+        progress.done()
+        print(f'[OK] 已删除 Redis 键（按前缀）：{total} 个')
+    else:
+        client.flushdb()
+        print('[OK] 已执行 Redis FLUSHDB（整库清空）')
+
+
+def clear_local_state():
+    for path in ['storage/state', 'storage/jobs']:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path, exist_ok=True)
+            print(f'[OK] 已清理本地目录并重建：{path}')
+
+
+def selection_matches(args, spider_name, status_type, identifier):
+    """状态三元组是否在 --reset-status 的选择范围内（与数据库、Redis 的筛选规则一致）"""
+    if args.spider and spider_name != args.spider:
+        return False
+    if args.status_type and status_type != args.status_type:
+        return False
+    if args.book_from is None and args.book_to is None:
+        return True
+    book_id = fingerprint.status_book_id(status_type, identifier)
+    return (book_id is not None
+            and (args.book_from is None or book_id >= args.book_from)
+            and (args.book_to is None or book_id <= args.book_to))
+
+
+def describe_selection(args):
+    parts = [f'spider={args.spider or "全部"}', f'status_type={args.status_type or "全部"}']
+    if args.book_from is not None or args.book_to is not None:
+        low = args.book_from if args.book_from is not None else '-∞'
+        high = args.book_to if args.book_to is not None else '+∞'
+        parts.append(f'book_id ∈ [{low}, {high}]')
+    return ', '.join(parts)
+
+
+def affected_spiders(args):
+    """需要处理作业目录与去重集合的 spider
+
+    novel_list 会顺带爬取详情页与评论，其作业目录与去重集合也可能包含选中的请求。
+    """
+    owner = args.spider or STATUS_TYPE_OWNERS.get(args.status_type)
+    if not owner:
+        return list(SPIDERS)
+    return [spider for spider in SPIDERS if spider in (owner, LIST_SPIDER)]
+
+
+def covers_spider(args, spider):
+    """重置是否覆盖该 spider 的全部状态；只有这时才整体删除它的作业目录与去重集合"""
+    return (args.status_type is None and args.book_from is None and args.book_to is None
+            and args.spider in (None, spider))
+
+
+def local_key_matches(args, key):
+    parts = fingerprint.split_status_key(key)
+    return parts is not None and selection_matches(args, *parts)
+
+
+def seen_key_matches(args, key):
+    """去重指纹（fingerprint 整数键）是否对应选中的请求"""
+    parts = fingerprint.status_parts(key)
+    return parts is not None and selection_matches(args, *parts)
+
+
+def reset_status(args):
+    """按选择条件重置数据库、Redis 与本地的爬取状态，并处理相关 spider 的作业目录与去重集合"""
+    from linovel_crawler import storage
+    from linovel_crawler.state_store import LocalStateStore
+
+    settings = config.project_settings()
+    selection = dict(spider_name=args.spider, status_type=args.status_type,
+                     book_from=args.book_from, book_to=args.book_to)
+
+    # 数据库：按主键分批删除，汇总表在同一事务中扣减
+    backend = storage.build_backend(settings, config.mysql_config())
+    backend.connect()
+    try:
+        progress = Progress('已删除 crawl_status 行')
+        deleted = backend.delete_crawl_status(**selection, batch_size=args.batch_size, progress=progress)
+        progress.done()
+        book_comments = 0
+        if args.status_type == COMMENT_STATUS_TYPE:
+            # 只删评论页状态时整本书的完成状态仍在，novel_comment 不会再选中这些书
+            book_comments = backend.delete_crawl_status(**dict(selection, status_type=BOOK_COMMENTS_STATUS_TYPE),
+                                                        batch_size=args.batch_size)
+    finally:
+        backend.close()
+    print(f'[OK] 已删除 crawl_status {deleted:,} 行（crawl_status_summary 已同步扣减）')
+    if book_comments:
+        print(f'[OK] 已删除对应书籍的 {BOOK_COMMENTS_STATUS_TYPE} 状态 {book_comments:,} 行')
+
+    # Redis：完成位图与 url_cache
+    client = None
+    try:
+        client = config.redis_client()
+        client.ping()
+        progress = Progress('已删除 Redis 键')
+        keys, books = redis_status.clear_completed(client, **selection, batch_size=args.batch_size,
+                                                   progress=progress)
+        progress.done()
+        print(f'[OK] 已删除 Redis 键 {keys:,} 个，逐本清零 {books:,} 个 book_id 的完成位')
+    except Exception as e:
+        client = None
+        print(f'[WARN] Redis 状态清理失败（数据库已重置，可修复连接后重新执行）: {e}')
+
+    # 本地状态文件：每个文件都可能包含所有 spider 的完成状态
+    root, ext = os.path.splitext(settings.get('RESUME_STATE_PATH', 'storage/state/{spider}_status.json'))
+    removed = 0
+    for path in sorted(glob.glob(f"{root.replace('{spider}', '*')}*{ext}")):
+        store = LocalStateStore(path)
+        store.load()
+        count = store.discard_completed(lambda key: local_key_matches(args, key))
+        if count:
+            store.save()
+            removed += count
+    print(f'[OK] 已从本地状态文件移除 {removed:,} 条')
+
+    reset_seen_requests(args, client)
+
+
+def reset_seen_requests(args, client):
+    """处理相关 spider 的作业目录与去重集合，否则选中的请求仍会被当作重复丢弃
+
+    重置覆盖整个 spider 时整体删除；只覆盖一部分时保留作业目录（其中的调度队列与
+    requests.seen 无法按条件删除，删掉会丢失其余请求的进度），只从 Redis 去重集合与
+    storage/state 下的去重文件中剔除选中的指纹，并提示不带 JOBDIR 重新运行。
+    """
+    kept = []
+    for spider in affected_spiders(args):
+        jobdirs = sorted(glob.glob(f'storage/jobs/{spider}') + glob.glob(f'storage/jobs/{spider}_*'))
+        seen_path = os.path.join('storage', 'state', f'{spider}_dedup_seen.bin')
+        set_key, bloom_key = f'dedup:set:{spider}', f'dedup:bf:{spider}'
+
+        if covers_spider(args, spider):
+            for path in jobdirs:
+                shutil.rmtree(path, ignore_errors=True)
+                print(f'[OK] 已删除作业目录：{path}')
+            if os.path.exists(seen_path):
+                os.remove(seen_path)
+                print(f'[OK] 已删除去重文件：{seen_path}')
+            if client is not None:
+                try:
+                    deleted = redis_status.delete_keys(client, [[set_key, bloom_key]])
+                    print(f'[OK] 已删除 {spider} 的 Redis 去重集合 {deleted} 个')
+                except Exception as e:
+                    print(f'[WARN] 删除 {spider} 的 Redis 去重集合失败: {e}')
+            continue
+
+        kept += jobdirs
+        matches = lambda key: seen_key_matches(args, key)
+        if os.path.exists(seen_path):
+            try:
+                print(f'[OK] 已从去重文件 {seen_path} 移除 {dedup.prune_file(seen_path, matches):,} 个指纹')
+            except OSError as e:
+                print(f'[WARN] 处理去重文件失败：{seen_path} - {e}')
+        if client is not None:
+            try:
+                count = dedup.prune_redis_set(client, set_key, matches, args.batch_size)
+                if count:
+                    print(f'[OK] 已从 {set_key} 移除 {count:,} 个指纹')
+                if client.exists(bloom_key):
+                    print(f'[WARN] {bloom_key} 为布隆过滤器，无法按条件删除；选中的请求仍可能被过滤，'
+                          f'需要时用 --reset-status --spider {spider} 整体重置')
+            except Exception as e:
+                print(f'[WARN] 处理 {spider} 的 Redis 去重集合失败: {e}')
+
+    if kept:
+        print(f"[提示] 以下作业目录还保存着未选中请求的调度队列与去重记录，已保留：{', '.join(kept)}")
+        print('       其中的 requests.seen 仍会丢弃选中的请求，请不带 JOBDIR 重新爬取，例如：')
+        print('       scrapy crawl <spider> -s JOBDIR= -a book_ids=<...>')
+
+
+def main(argv=None, prog=None):
+    config.load_env()
+    args = parse_args(argv, prog)
+
+    db_name = os.getenv('mysql_database')
+    print('将执行以下操作:')
+    if args.truncate:
+        print('- TRUNCATE MySQL 业务表（保留数据库与结构）')
+    if args.drop_db:
+        print(f'- DROP 并重建数据库 `{db_name}`')
+    if args.flush_redis:
+        print('- Redis FLUSHDB（整库清空）')
+    elif args.clear_redis:
+        print(f"- 按前缀删除 Redis 键：{', '.join(REDIS_PATTERNS)}")
+    if args.clear_local:
+        print('- 清理本地断点状态：storage/state 与 storage/jobs')
+    if args.reset_status:
+        print(f'- 重置爬取状态（{describe_selection(args)}）：数据库 crawl_status 与汇总表、Redis 完成位图、本地状态文件')
+        if args.status_type == COMMENT_STATUS_TYPE:
+            print(f'- 同时删除对应书籍的 {BOOK_COMMENTS_STATUS_TYPE} 状态（novel_comment 据此挑选待爬书籍）')
+        spiders = affected_spiders(args)
+        whole = [spider for spider in spiders if covers_spider(args, spider)]
+        partial = [spider for spider in spiders if not covers_spider(args, spider)]
+        if whole:
+            print(f"- 删除作业目录与去重集合：{', '.join(whole)}")
+        if partial:
+            print(f"- 从去重集合中剔除选中的请求（作业目录保留）：{', '.join(partial)}")
+
+    if not args.yes:
+        print('\n未提供 --yes，已模拟展示。若要执行，请追加 --yes')
+        return 0
+
+    if args.reset_status:
+        reset_status(args)
+        print('\n重置完成')
+        return 0
+
+    # MySQL 部分
+    if args.drop_db:
+        drop_and_recreate_database(db_name)
+        print(f'[OK] 已重置数据库：{db_name}')
+    elif args.truncate:
+        conn = get_mysql_conn()
+        truncate_tables(conn)
+        conn.close()
+        print('[OK] 已清空业务表')
+
+    # Redis 部分
+    if args.flush_redis:
+        clear_redis(prefix_only=False)
+    elif args.clear_redis:
+        clear_redis(prefix_only=True, batch_size=args.batch_size)
+
+    # 本地断点状态
+    if args.clear_local:
+        clear_local_state()
+
+    print('\n清理完成')
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print('\n已取消')
+        sys.exit(130)
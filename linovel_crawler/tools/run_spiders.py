@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+小说爬虫启动脚本
+支持断点续爬和多种运行模式
+
+Scrapy 只在真正启动爬虫时导入，``--help`` 与参数错误可以立即返回。
+"""
+
+import os
+import sys
+import argparse
+import multiprocessing
+import shutil
+
+from linovel_crawler import config
+from linovel_crawler import shard as sharding
+
+
+def _crawler_process(settings=None):
+    from scrapy.crawler import CrawlerProcess
+
+    return CrawlerProcess(settings if settings is not None else config.project_settings())
+
+def _jobdir(spider_name, shard=None):
+    """Spider 默认作业目录；分片模式下追加分片后缀（与 shard.isolate_settings 一致）"""
+    jobdir = f'storage/jobs/{spider_name}'
+    return jobdir + sharding.suffix(shard) if shard else jobdir
+
+def _shard_args(shard=None):
+    return {'shard': f'{shard[0]}/{shard[1]}'} if shard else {}
+
+def run_novel_list_spider(max_pages=None, start_page=1, shard=None):
+    """运行小说列表爬虫"""
+    process = _crawler_process()
+
+    # 自愈可能损坏的作业目录
+    ensure_jobdir_healthy(_jobdir('novel_list', shard))
+
+    spider_args = _shard_args(shard)
+    if max_pages:
+        spider_args['max_pages'] = max_pages
+        spider_args['start_page'] = start_page
+
+    process.crawl('novel_list', **spider_args)
+    process.start()
+
+def run_novel_detail_spider(book_ids=None, shard=None, book_source=None):
+    """运行小说详情爬虫"""
+    process = _crawler_process()
+
+    ensure_jobdir_healthy(_jobdir('novel_detail', shard))
+
+    spider_args = _shard_args(shard)
+    if book_ids:
+        spider_args['book_ids'] = book_ids
+    elif book_source:
+        spider_args['book_source'] = book_source
+
+    process.crawl('novel_detail', **spider_args)
+    process.start()
+
+def run_novel_comment_spider(book_ids=None, shard=None, book_source=None):
+    """运行小说评论爬虫"""
+    process = _crawler_process()
+
+    ensure_jobdir_healthy(_jobdir('novel_comment', shard))
+
+    spider_args = _shard_args(shard)
+    if book_ids:
+        spider_args['book_ids'] = book_ids
+    elif book_source:
+        spider_args['book_source'] = book_source
+
+    process.crawl('novel_comment', **spider_args)
+    process.start()
+
+def run_all_spiders(max_pages=None, book_ids=None, shard=None, book_source=None):
+    """运行所有爬虫"""
+    process = _crawler_process()
+
+    # 尽量在启动前自愈作业目录
+    ensure_jobdir_healthy(_jobdir('novel_list', shard))
+    ensure_jobdir_healthy(_jobdir('novel_detail', shard))
+    ensure_jobdir_healthy(_jobdir('novel_comment', shard))
+
+    if not book_ids and book_source:
+        # 批量来源只交给详情/评论爬虫，列表爬虫照常运行
+        spider_args_list = _shard_args(shard)
+        if max_pages:
+            spider_args_list['max_pages'] = max_pages
+
+        process.crawl('novel_list', **spider_args_list)
+        process.crawl('novel_detail', book_source=book_source, **_shard_args(shard))
+        process.crawl('novel_comment', book_source=book_source, **_shard_args(shard))
+    elif book_ids:
+        # 如果指定了book_ids，运行所有爬虫
+        spider_args_list = _shard_args(shard)
+        if max_pages:
+            spider_args_list['max_pages'] = max_pages
+
+        spider_args_detail = {'book_ids': book_ids, **_shard_args(shard)}
+        spider_args_comment = {'book_ids': book_ids, **_shard_args(shard)}
+
+        process.crawl('novel_list', **spider_args_list)
+        process.crawl('novel_detail', **spider_args_detail)
+        process.crawl('novel_comment', **spider_args_comment)
+    else:
+        # 如果没有指定book_ids，运行列表爬虫（它会自动触发详情页和评论页的爬取）
+        spider_args_list = _shard_args(shard)
+        if max_pages:
+            spider_args_list['max_pages'] = max_pages
+
+        process.crawl('novel_list', **spider_args_list)
+
+    process.start()
+
+def _run_pool_worker(spider_name, worker_id, spider_args):
+    """工作进程入口：独立的 CrawlerProcess，作业目录与状态文件按 worker 隔离"""
+    settings = config.project_settings()
+    jobdir = f'storage/jobs/{spider_name}_{worker_id}'
+    # 分片后缀由 Spider 在 from_crawler 中追加
+    ensure_jobdir_healthy(_jobdir(f'{spider_name}_{worker_id}', sharding.parse(spider_args.get('shard'))))
+    settings.set('JOBDIR', jobdir, priority='cmdline')
+    settings.set('RESUME_STATE_PATH', f'storage/state/{{spider}}_{worker_id}_status.json', priority='cmdline')
+
+    process = _crawler_process(settings)
+    process.crawl(spider_name, worker_id=f'{spider_name}-{worker_id}', **spider_args)
+    process.start()
+
+def run_worker_pool(max_pages=None, start_page=1, book_ids=None, detail_workers=1, comment_workers=1, shard=None):
+    """多进程模式：列表、详情、评论分别运行在独立进程中，通过本地工作队列衔接
+
+    列表进程把发现的 book_id 写入队列，详情/评论进程各自领取并按调度器容量拉取，
+    列表进程结束且队列清空后工作进程自动退出。指定 book_ids 时直接入队，不启动列表进程。
+    """
+    from linovel_crawler.work_queue import SQLiteWorkQueue
+
+    queue_path = config.project_settings().get('WORK_QUEUE_PATH', 'storage/queue/work_queue.sqlite3')
+    if shard:
+        root, ext = os.path.splitext(queue_path)
+        queue_path = f'{root}{sharding.suffix(shard)}{ext}'
+    queue = SQLiteWorkQueue(queue_path)
+    # 先登记生产者，避免消费者在列表进程启动前误判队列已结束
+    queue.register_producer('novel_list')
+    if book_ids:
+        queue.put(('detail', 'comment'), [
+            b.strip() for b in book_ids.split(',')
+            if b.strip() and sharding.owns_book(shard, b)
+        ])
+        queue.finish_producer('novel_list')
+    queue.close()
+
+    ctx = multiprocessing.get_context('spawn')
+    workers = []
+    if not book_ids:
+        list_args = {'work_queue': queue_path, 'producer': 'novel_list', **_shard_args(shard)}
+        if max_pages:
+            list_args['max_pages'] = max_pages
+            list_args['start_page'] = start_page
+        workers.append(ctx.Process(target=_run_pool_worker, args=('novel_list', 'w0', list_args), name='novel_list-w0'))
+    for spider_name, count in (('novel_detail', detail_workers), ('novel_comment', comment_workers)):
+        for i in range(max(0, count)):
+            workers.append(ctx.Process(
+                target=_run_pool_worker,
+                args=(spider_name, f'w{i}', {'work_queue': queue_path, **_shard_args(shard)}),
+                name=f'{spider_name}-w{i}',
+            ))
+
+    for worker in workers:
+        worker.start()
+        print(f"已启动工作进程: {worker.name} (pid={worker.pid})")
+    failed = []
+    for worker in workers:
+        worker.join()
+        if worker.exitcode != 0:
+            failed.append(f"{worker.name}({worker.exitcode})")
+    if failed:
+        raise RuntimeError(f"工作进程异常退出: {', '.join(failed)}")
+
+def ensure_jobdir_healthy(jobdir: str):
+    """检查并自愈 Scrapy JOBDIR，避免队列文件损坏导致的 struct.error。
+
+    条件：如果存在 requests.queue 且文件大小小于 4 字节，视为损坏，直接清理目录。
+    """
+    try:
+        if not os.path.isdir(jobdir):
+            return
+        qfile = os.path.join(jobdir, 'requests.queue')
+        if os.path.exists(qfile):
+            try:
+                size = os.path.getsize(qfile)
+                if size < 4:
+                    print(f"检测到损坏的作业队列文件，正在清理: {qfile}")
+                    shutil.rmtree(jobdir, ignore_errors=True)
+                    os.makedirs(jobdir, exist_ok=True)
+            except Exception as e:
+                print(f"作业目录检查异常（忽略）：{jobdir} - {e}")
+    except Exception:
+        pass
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description='小说爬虫启动脚本')
+    parser.add_argument('spider', choices=['list', 'detail', 'comment', 'all', 'pool'],
+                       help='要运行的爬虫类型')
+    parser.add_argument('--max-pages', type=int, help='列表爬虫最大页数')
+    parser.add_argument('--start-page', type=int, default=1, help='列表爬虫起始页数')
+    parser.add_argument('--book-ids', help='指定书籍ID，多个用逗号分隔')
+    parser.add_argument('--book-source',
+                       help='批量书籍ID来源：db（查询未完成的书籍）、文件路径（每行一个ID）或 -（标准输入）')
+    parser.add_argument('--shard', help='分片运行，格式 i/N（i 从0开始），按页码与 book_id 划分工作')
+    parser.add_argument('--detail-workers', type=int, default=1, help='pool 模式下详情爬虫进程数')
+    parser.add_argument('--comment-workers', type=int, default=1, help='pool 模式下评论爬虫进程数')
+
+    args = parser.parse_args(argv)
+    try:
+        shard = sharding.parse(args.shard)
+    except ValueError as e:
+        parser.error(str(e))
+
+    config.ensure_runtime_dirs()
+
+    print(f"启动爬虫: {args.spider}")
+    if args.max_pages:
+        print(f"最大页数: {args.max_pages}")
+    if args.start_page > 1:
+        print(f"起始页数: {args.start_page}")
+    if args.book_ids:
+        print(f"指定书籍ID: {args.book_ids}")
+    if args.book_source:
+        print(f"书籍ID来源: {args.book_source}")
+    if shard:
+        print(f"分片: {shard[0]}/{shard[1]}")
+
+    try:
+        if args.spider == 'list':
+            run_novel_list_spider(args.max_pages, args.start_page, shard)
+        elif args.spider == 'detail':
+            run_novel_detail_spider(args.book_ids, shard, args.book_source)
+        elif args.spider == 'comment':
+            run_novel_comment_spider(args.book_ids, shard, args.book_source)
+        elif args.spider == 'all':
+            run_all_spiders(args.max_pages, args.book_ids, shard, args.book_source)
+        elif args.spider == 'pool':
+            run_worker_pool(args.max_pages, args.start_page, args.book_ids,
+                            args.detail_workers, args.comment_workers, shard)
+    except KeyboardInterrupt:
+        print("\n爬虫被用户中断")
+    except Exception as e:
+        print(f"爬虫运行出错: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+本地工作队列
+
+基于 SQLite（WAL 模式）的多进程任务队列，用于把列表阶段发现的 book_id
+分发给独立进程中的详情/评论 Spider。每个阶段（stage）一组任务，任务状态：
+
+- 0 待领取
+- 1 已领取（记录 worker 与领取时间；Spider 关闭时未产出的任务放回队列，
+  进程异常退出遗留的任务超时后重新放回）
+- 2 已完成（对应请求已交给调度器）
+
+生产者（如列表 Spider）在队列中登记，全部生产者结束且队列清空后消费者退出。
+"""
+
+import os
+import sqlite3
+import time
+
+PENDING = 0
+CLAIMED = 1
+DONE = 2
+
+
+class SQLiteWorkQueue:
+    """SQLite 多进程工作队列，每个进程各自持有连接"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self._create_tables()
+
+    def _create_tables(self):
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                stage TEXT NOT NULL,
+                book_id TEXT NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                claimed_at REAL,
+                PRIMARY KEY (stage, book_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (stage, state);
+            CREATE TABLE IF NOT EXISTS producers (
+                name TEXT PRIMARY KEY,
+                finished INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+
+    def close(self):
+        try:
+            self.connection.close()
+        except sqlite3.Error:
+            pass
+
+    def put(self, stages, book_ids):
+        """把 book_id 加入各阶段，已存在的任务保持原状态"""
+        rows = [(stage, str(book_id)) for stage in stages for book_id in book_ids]
+        if not rows:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO tasks (stage, book_id) VALUES (?, ?)", rows
+            )
+
+    def claim(self, stage, worker, limit):
+        """领取最多 limit 个待处理任务"""
+        conn = self.connection
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                "SELECT book_id FROM tasks WHERE stage = ? AND state = ? LIMIT ?",
+                (stage, PENDING, limit),
+            ).fetchall()
+            book_ids = [row[0] for row in rows]
+            if book_ids:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE tasks SET state = ?, worker = ?, claimed_at = ? WHERE stage = ? AND book_id = ?",
+                    [(CLAIMED, worker, now, stage, book_id) for book_id in book_ids],
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return book_ids
+
+    def complete(self, stage, worker, book_ids):
+        """把该 worker 已领取的指定任务标记为完成（请求已交给调度器，由 JOBDIR 负责续爬）"""
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE tasks SET state = ? WHERE stage = ? AND book_id = ? AND worker = ? AND state = ?",
+                [(DONE, stage, str(book_id), worker, CLAIMED) for book_id in book_ids],
+            )
+
+    def release(self, stage, worker):
+        """把该 worker 已领取但尚未产出的任务放回队列，返回放回数量"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE tasks SET state = ?, worker = NULL, claimed_at = NULL "
+                "WHERE stage = ? AND worker = ? AND state = ?",
+                (PENDING, stage, worker, CLAIMED),
+            )
+        return cursor.rowcount
+
+    def release_stale(self, stage, older_than):
+        """把领取超过 older_than 秒仍未完成的任务放回队列，返回放回数量"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE tasks SET state = ?, worker = NULL, claimed_at = NULL "
+                "WHERE stage = ? AND state = ? AND claimed_at < ?",
+                (PENDING, stage, CLAIMED, time.time() - older_than),
+            )
+        return cursor.rowcount
+
+    def pending(self, stage):
+        row = self.connection.execute(
+            "SELECT COUNT(*) FROM tasks WHERE stage = ? AND state = ?", (stage, PENDING)
+        ).fetchone()
+        return row[0]
+
+    def register_producer(self, name):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO producers (name, finished) VALUES (?, 0) "
+                "ON CONFLICT(name) DO UPDATE SET finished = 0",
+                (name,),
+            )
+
+    def finish_producer(self, name):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO producers (name, finished) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET finished = 1",
+                (name,),
+            )
+
+    def producers_finished(self):
+        row = self.connection.execute(
+            "SELECT COUNT(*) FROM producers WHERE finished = 0"
+        ).fetchone()
+        return row[0] == 0
+
+
+async def iter_claimed(crawler, queue, stage, worker, logger=None):
+    """消费者侧：按调度器容量分批领取任务并逐个产出 book_id
+
+    待处理请求达到高水位（FRONTIER_MAX_PENDING，未设置时为批大小的4倍）时暂停领取；
+    队列为空时轮询等待，直到全部生产者结束且该阶段没有待领取任务。
+    """
+    from linovel_crawler import frontier
+
+    settings = crawler.settings
+    batch_size = settings.getint('WORK_QUEUE_BATCH_SIZE', 50)
+    high_water = settings.getint('FRONTIER_MAX_PENDING', 0) or batch_size * 4
+    poll_interval = settings.getfloat('FRONTIER_POLL_INTERVAL', 1.0)
+
+    released = queue.release_stale(stage, settings.getint('WORK_QUEUE_STALE_SECONDS', 3600))
+    if released and logger:
+        logger.info(f"工作队列: 重新放回 {released} 个超时未完成的 {stage} 任务")
+
+    while True:
+        if frontier.pending_requests(crawler) >= high_water:
+            await frontier.sleep(poll_interval)
+            continue
+        book_ids = queue.claim(stage, worker, batch_size)
+        if book_ids:
+            for book_id in book_ids:
+                yield book_id
+                # 恢复执行说明请求已被引擎取走；未产出的任务在 Spider 关闭时放回队列
+                queue.complete(stage, worker, (book_id,))
+            continue
+        if queue.producers_finished() and queue.pending(stage) == 0:
+            if logger:
+                logger.info(f"工作队列: {stage} 阶段已无待处理任务，生产者均已结束")
+            return
+        await frontier.sleep(poll_interval)
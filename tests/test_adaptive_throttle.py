@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Request
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+
+from linovel_crawler.middlewares import AdaptiveThrottleMiddleware, _EndpointThrottle
+
+
+def make(**kwargs):
+    options = dict(concurrency=4, delay=0.4, min_concurrency=1, max_concurrency=8,
+                   max_delay=10.0, target_latency=2.0, max_error_rate=0.05, window=4)
+    options.update(kwargs)
+    return _EndpointThrottle('detail', **options)
+
+
+def feed(throttle, count, **record):
+    """记录 count 次响应，返回最后一次是否触发调整"""
+    due = False
+    for _ in range(count):
+        due = throttle.record(**record)
+    return due
+
+
+def test_window_triggers_adjustment():
+    throttle = make()
+    assert not feed(throttle, 3, latency=0.5)
+    assert throttle.record(latency=0.5)
+
+
+def test_healthy_window_increases_additively():
+    throttle = make()
+    feed(throttle, 4, latency=0.5)
+    assert throttle.adjust() == 'increase'
+    assert throttle.concurrency == 5
+    assert throttle.delay == pytest.approx(0.3)
+    assert throttle.responses == 0
+
+
+def test_slow_window_decreases_multiplicatively():
+    throttle = make()
+    feed(throttle, 4, latency=3.0)
+    assert throttle.adjust() == 'decrease'
+    assert throttle.concurrency == 2
+    assert throttle.delay == pytest.approx(0.8)
+
+
+def test_error_rate_above_limit_decreases():
+    throttle = make(window=20)
+    feed(throttle, 18, latency=0.5)
+    feed(throttle, 2, latency=0.5, error=True)
+    assert throttle.adjust() == 'decrease'
+
+
+def test_rate_limit_adjusts_after_a_quarter_window():
+    throttle = make(window=8)
+    assert not throttle.record(latency=0.5, error=True, rate_limited=True)
+    assert throttle.record(latency=0.5)
+    assert throttle.adjust() == 'decrease'
+
+
+def test_bounds_are_respected():
+    throttle = make(concurrency=1, delay=8.0, max_delay=10.0)
+    for _ in range(3):
+        feed(throttle, 4, error=True)
+        throttle.adjust()
+    assert throttle.concurrency == 1
+    assert throttle.delay == 10.0
+
+    throttle = make(concurrency=7, delay=0.012, min_delay=0.0)
+    for _ in range(3):
+        feed(throttle, 4, latency=0.1)
+        throttle.adjust()
+    assert throttle.concurrency == 8
+    assert throttle.delay == 0.0
+
+
+def test_zero_delay_grows_from_floor_when_backing_off():
+    throttle = make(delay=0.0)
+    feed(throttle, 4, error=True)
+    throttle.adjust()
+    assert throttle.delay == 0.05
+
+
+def make_middleware():
+    settings = Settings({'ADAPTIVE_THROTTLE_ENABLED': True, 'ADAPTIVE_THROTTLE_ENDPOINTS': {}})
+    crawler = SimpleNamespace(settings=settings, engine=SimpleNamespace(downloader=SimpleNamespace(slots={})))
+    crawler.stats = MemoryStatsCollector(crawler)
+    return AdaptiveThrottleMiddleware(crawler), crawler.engine.downloader.slots
+
+
+def detail_request(book_id):
+    return Request(f'https://www.linovel.net/book/{book_id}.html')
+
+
+def test_recreated_slot_gets_current_parameters():
+    middleware, slots = make_middleware()
+    spider = SimpleNamespace(logger=SimpleNamespace(info=lambda *a: None, debug=lambda *a: None))
+    state = middleware.states['detail']
+    slots[state.slot_key] = SimpleNamespace(concurrency=8, delay=0.0)
+
+    middleware.process_request(detail_request(1), spider)
+    state.concurrency, state.delay = 2, 1.6  # 已因 429 退避
+    middleware._apply(state, spider)
+
+    # 下载器回收空闲槽后以默认参数重建
+    del slots[state.slot_key]
+    middleware.process_request(detail_request(2), spider)  # 槽尚未重建时不同步
+    slots[state.slot_key] = recreated = SimpleNamespace(concurrency=8, delay=0.0)
+    middleware.process_request(detail_request(3), spider)
+    assert (recreated.concurrency, recreated.delay) == (2, 1.6)
+
+    recreated.concurrency = 5  # 同一槽对象不会重复同步
+    middleware.process_request(detail_request(4), spider)
+    assert recreated.concurrency == 5
@@ -0,0 +1,154 @@
+import logging
+from array import array
+from types import SimpleNamespace
+
+import pytest
+
+from linovel_crawler import dedup, fingerprint
+
+
+def comment(book_id, page):
+    return fingerprint.pack(fingerprint.KIND_COMMENT, book_id, page)
+
+
+SPIDER = SimpleNamespace(name='novel_comment', logger=logging.getLogger('test'))
+
+KEYS = [comment(1, 1), comment(2, 1), fingerprint.pack(fingerprint.KIND_DETAIL, 1), fingerprint.url_key('x')]
+
+
+def records(path):
+    with open(path, 'rb') as f:
+        return array('Q', f.read())
+
+
+def selected(key):
+    parts = fingerprint.status_parts(key)
+    return parts is not None and fingerprint.status_book_id(parts[1], parts[2]) == 1
+
+
+def test_prune_file(tmp_path):
+    path = tmp_path / 'novel_comment_dedup_seen.bin'
+    with open(path, 'wb') as f:
+        array('Q', KEYS).tofile(f)
+    assert dedup.prune_file(str(path), selected) == 2
+    assert list(array('Q', path.read_bytes())) == [comment(2, 1), fingerprint.url_key('x')]
+    assert dedup.prune_file(str(path), selected) == 0
+
+
+def test_pruned_file_is_loaded_by_disk_seen_set(tmp_path):
+    path = tmp_path / 'seen.bin'
+    with open(path, 'wb') as f:
+        array('Q', KEYS).tofile(f)
+    dedup.prune_file(str(path), selected)
+    seen = dedup.DiskSeenSet(str(path))
+    seen._load()
+    assert seen.add(comment(1, 1))
+    assert not seen.add(comment(2, 1))
+
+
+def test_prune_redis_set():
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis(decode_responses=True)
+    client.sadd('dedup:set:novel_comment', *KEYS)
+    assert dedup.prune_redis_set(client, 'dedup:set:novel_comment', selected, batch_size=1) == 2
+    assert {int(m) for m in client.smembers('dedup:set:novel_comment')} == {comment(2, 1), fingerprint.url_key('x')}
+
+
+def test_memory_seen_set_evicts_oldest_tenth():
+    seen = dedup.MemorySeenSet(max_entries=20)
+    for key in range(20):
+        assert seen.add(key)
+    assert not seen.add(5)
+    assert seen.add(20)
+    assert len(seen) == 19
+    assert 0 not in seen and 1 not in seen and 2 in seen and 20 in seen
+    assert seen.stats()['evicted'] == 2
+
+
+def test_disk_seen_set_flushes_and_reloads(tmp_path):
+    path = str(tmp_path / 'seen.bin')
+    seen = dedup.DiskSeenSet(path, flush_every=2)
+    seen.open(SPIDER)
+    for key in KEYS[:3]:
+        seen.add(key)
+    assert len(records(path)) == 2  # 第三条仍在缓冲中
+    seen.close(SPIDER)
+
+    reloaded = dedup.DiskSeenSet(path)
+    reloaded.open(SPIDER)
+    assert not reloaded.add(KEYS[2])
+    assert reloaded.add(KEYS[3])
+
+
+def test_disk_seen_set_compacts_evicted_records(tmp_path):
+    path = str(tmp_path / 'seen.bin')
+    seen = dedup.DiskSeenSet(path, max_entries=10, flush_every=1)
+    seen.open(SPIDER)
+    for key in range(25):
+        seen.add(key)
+    assert len(records(path)) == 25
+    seen.close(SPIDER)
+    assert list(records(path)) == list(seen._seen)
+
+    reloaded = dedup.DiskSeenSet(path, max_entries=10)
+    reloaded.open(SPIDER)
+    assert 24 in reloaded and 0 not in reloaded
+
+
+def test_disk_seen_set_restores_only_the_newest_records(tmp_path):
+    path = tmp_path / 'seen.bin'
+    with open(path, 'wb') as f:
+        array('Q', range(30)).tofile(f)
+    seen = dedup.DiskSeenSet(str(path), max_entries=10)
+    seen.open(SPIDER)
+    assert sorted(seen._seen) == list(range(20, 30))
+    assert seen.stats()['evicted'] == 20
+
+
+class FailingRedis:
+    """ping 成功、写入失败的 Redis 客户端"""
+
+    def __init__(self, ping_error=None):
+        self.ping_error = ping_error
+
+    def ping(self):
+        if self.ping_error:
+            raise self.ping_error
+        return True
+
+    def sadd(self, key, *members):
+        raise ConnectionError('redis down')
+
+    def close(self):
+        pass
+
+
+def test_redis_seen_set_falls_back_to_local_on_errors():
+    seen = dedup.RedisSeenSet(client=FailingRedis(), local_max_entries=100)
+    seen.open(SPIDER)
+    assert seen.add(KEYS[0])
+    assert not seen.add(KEYS[0])
+    assert seen.stats()['errors'] == 1
+    assert len(seen) == 1
+
+
+def test_redis_seen_set_unreachable_at_open_is_local_only():
+    seen = dedup.RedisSeenSet(client=FailingRedis(ConnectionError('refused')))
+    seen.open(SPIDER)
+    assert seen.client is None
+    assert seen.add(KEYS[0])
+    assert not seen.add(KEYS[0])
+    assert seen.stats()['errors'] == 0
+    seen.close(SPIDER)
+
+
+def test_redis_seen_set_uses_sadd_result():
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    client.sadd('dedup:set:novel_comment', KEYS[1])
+    seen = dedup.RedisSeenSet(client=client)
+    seen.open(SPIDER)
+    assert seen.add(KEYS[0])
+    assert not seen.add(KEYS[1])  # 其他进程已记录
+    assert seen.stats()['remote_hits'] == 1
+    assert len(seen) == 2
@@ -0,0 +1,85 @@
+import io
+import os
+from datetime import date, datetime
+
+import pytest
+
+from linovel_crawler import export
+
+
+@pytest.mark.parametrize('row, partition_by, expected', [
+    ({'updated_at': datetime(2025, 1, 2, 3, 4)}, 'date', 'dt=2025-01-02'),
+    ({'updated_at': date(2025, 1, 2)}, 'date', 'dt=2025-01-02'),
+    ({'updated_at': None}, 'date', 'dt=unknown'),
+    ({'book_id': '100818'}, 'book_id', f'book_bucket={100818 % 64}'),
+    ({'book_id': 'abc'}, 'book_id', 'book_bucket=0'),
+    ({'book_id': '1'}, 'none', ''),
+])
+def test_partition_key(row, partition_by, expected):
+    assert export.partition_key(row, partition_by, 'updated_at') == expected
+
+
+@pytest.mark.parametrize('name, value, expected', [
+    ('word_count', '12', 12),
+    ('word_count', 'n/a', None),
+    ('tags', ['a', 1], ['a', '1']),
+    ('tags', 'a', ['a']),
+    ('title', {'k': '值'}, '{"k": "值"}'),
+    ('title', 5, '5'),
+    ('title', None, None),
+])
+def test_to_column_value(name, value, expected):
+    assert export._to_column_value(name, value) == expected
+
+
+@pytest.fixture
+def pa():
+    return pytest.importorskip('pyarrow')
+
+
+def read_rows(pa, path):
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path).to_pylist()
+
+
+def test_partitioned_writer_splits_and_caps_open_files(pa, tmp_path):
+    schema = pa.schema([('book_id', pa.string()), ('n', pa.int64())])
+    writer = export.PartitionedWriter(str(tmp_path), schema, batch_size=2, max_open_files=1, run_id='t')
+    for i in range(5):
+        writer.write(f'book_bucket={i % 2}', {'book_id': str(i), 'n': i})
+    writer.close()
+
+    files = sorted(os.path.relpath(os.path.join(d, f), tmp_path)
+                   for d, _, names in os.walk(tmp_path) for f in names)
+    assert writer.rows_written == 5
+    # 只允许同时打开一个文件：分区0先写满一批，分区1写入时关闭分区0，收尾时分区0再开新文件
+    assert writer.files_written == len(files) == 3
+    rows = [row for f in files for row in read_rows(pa, tmp_path / f)]
+    assert sorted(row['n'] for row in rows) == [0, 1, 2, 3, 4]
+    for f in files:
+        bucket = int(f.split('=')[1].split(os.sep)[0])
+        assert all(row['n'] % 2 == bucket for row in read_rows(pa, tmp_path / f))
+
+
+def test_parquet_item_exporter_writes_batches(pa):
+    import pyarrow.parquet as pq
+
+    buffer = io.BytesIO()
+    exporter = export.ParquetItemExporter(buffer, batch_size=2)
+    exporter.start_exporting()
+    for i in range(3):
+        exporter.export_item({'book_id': str(i), 'word_count': str(i * 10), 'tags': ['x']})
+    exporter.finish_exporting()
+
+    table = pq.read_table(io.BytesIO(buffer.getvalue()))
+    assert table.schema.field('word_count').type == pa.int64()
+    assert table.schema.field('tags').type == pa.list_(pa.string())
+    assert table.to_pylist()[2] == {'book_id': '2', 'word_count': 20, 'tags': ['x']}
+    assert pq.ParquetFile(io.BytesIO(buffer.getvalue())).num_row_groups == 2
+
+
+def test_watermarks_round_trip(tmp_path):
+    assert export.load_watermarks(str(tmp_path)) == {}
+    export.save_watermarks(str(tmp_path / 'out'), {'novels': '2025-01-01 00:00:00'})
+    assert export.load_watermarks(str(tmp_path / 'out')) == {'novels': '2025-01-01 00:00:00'}
@@ -0,0 +1,108 @@
+import pytest
+
+from linovel_crawler import fingerprint
+
+BASE = 'https://www.linovel.net'
+
+
+@pytest.mark.parametrize('kind, primary, secondary', [
+    (fingerprint.KIND_LIST, 1, 0),
+    (fingerprint.KIND_DETAIL, 100818, 0),
+    (fingerprint.KIND_COMMENT, 100007, 1),
+    (fingerprint.KIND_COMMENT, 100007, (1 << 24) - 1),
+    (fingerprint.KIND_DETAIL, (1 << 37) + 5, 0),
+])
+def test_pack_unpack_round_trip(kind, primary, secondary):
+    key = fingerprint.pack(kind, primary, secondary)
+    assert fingerprint.unpack(key) == (kind, primary, secondary)
+
+
+@pytest.mark.parametrize('url, expected', [
+    (f'{BASE}/cat/-1.html?page=7', (fingerprint.KIND_LIST, 7, 0)),
+    (f'{BASE}/cat/-1.html?sort=new&page=3', (fingerprint.KIND_LIST, 3, 0)),
+    (f'{BASE}/book/100818.html', (fingerprint.KIND_DETAIL, 100818, 0)),
+    (f'{BASE}/book/100818.html?from=list', (fingerprint.KIND_DETAIL, 100818, 0)),
+    (f'{BASE}/comment/items?type=book&tid=100007&pageSize=20&page=4', (fingerprint.KIND_COMMENT, 100007, 4)),
+    (f'{BASE}/comment/items?type=book&tid=100007&pageSize=20', (fingerprint.KIND_COMMENT, 100007, 1)),
+])
+def test_route(url, expected):
+    assert fingerprint.route(url) == expected
+
+
+@pytest.mark.parametrize('url', [
+    f'{BASE}/book/100818/123456.html',
+    f'{BASE}/comment/items?type=chapter&tid=100007&page=1',
+    f'{BASE}/comment/items?type=book&page=1',
+    f'{BASE}/about.html',
+])
+def test_unrouted_urls_use_digest_keys(url):
+    assert fingerprint.route(url) is None
+    key = fingerprint.request_fingerprint(url)
+    assert key == fingerprint.url_key(url)
+    assert key & 0b11 == fingerprint.KIND_OTHER
+    assert 0 <= key < 1 << 64
+    assert fingerprint.status_parts(key) is None
+
+
+def test_request_key_rejects_oversized_comment_page():
+    url = f'{BASE}/comment/items?type=book&tid=1&page={1 << 24}'
+    assert fingerprint.request_key(url) is None
+
+
+@pytest.mark.parametrize('parts', [
+    ('novel_list', 'list_page', '12'),
+    ('novel_detail', 'detail_page', '100818'),
+    ('novel_comment', 'comment_page', '100007_3'),
+])
+def test_status_parts_round_trip(parts):
+    key = fingerprint.from_status_parts(*parts)
+    assert key is not None
+    assert fingerprint.status_parts(key) == parts
+    status_key = fingerprint.status_key(key)
+    assert status_key == 'crawl_status:' + ':'.join(parts)
+    assert fingerprint.from_status_key(status_key) == key
+    assert fingerprint.split_status_key(status_key) == parts
+
+
+def test_status_parts_match_request_keys():
+    url = f'{BASE}/comment/items?type=book&tid=100007&pageSize=20&page=3'
+    assert fingerprint.from_status_parts('novel_comment', 'comment_page', '100007_3') == fingerprint.request_key(url)
+
+
+@pytest.mark.parametrize('parts', [
+    ('novel_comment', 'book_comments', '100007'),
+    ('novel_detail', 'comment_page', '100007_1'),
+    ('novel_detail', 'detail_page', 'abc'),
+    ('novel_comment', 'comment_page', '100007'),
+    ('novel_comment', 'comment_page', f'100007_{1 << 24}'),
+])
+def test_from_status_parts_rejects_non_request_states(parts):
+    assert fingerprint.from_status_parts(*parts) is None
+
+
+def test_keys_from_status_skips_unknown_entries():
+    keys = list(fingerprint.keys_from_status([
+        'crawl_status:novel_detail:detail_page:1',
+        'crawl_status:novel_comment:book_comments:1',
+        'url_cache:whatever',
+    ]))
+    assert keys == [fingerprint.pack(fingerprint.KIND_DETAIL, 1)]
+
+
+@pytest.mark.parametrize('status_type, identifier, expected', [
+    ('list_page', '5', None),
+    ('detail_page', '100818', 100818),
+    ('comment_page', '100007_3', 100007),
+    ('book_comments', '100007', 100007),
+    ('detail_page', 'abc', None),
+])
+def test_status_book_id(status_type, identifier, expected):
+    assert fingerprint.status_book_id(status_type, identifier) == expected
+
+
+def test_chapter_id():
+    assert fingerprint.chapter_id(f'{BASE}/book/100818/123456.html') == 123456
+    odd = fingerprint.chapter_id(f'{BASE}/read/abc')
+    assert odd < 0
+    assert odd == fingerprint.chapter_id(f'{BASE}/read/abc')
+    assert -odd < 1 << 62
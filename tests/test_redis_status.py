@@ -0,0 +1,151 @@
+import pytest
+
+from linovel_crawler import fingerprint, redis_status
+
+COMMENT = fingerprint.KIND_COMMENT
+
+
+def comment_key(book_id, page):
+    return fingerprint.pack(COMMENT, book_id, page)
+
+
+def test_list_and_detail_bits_use_16_bit_shards():
+    key, offset = redis_status.completed_bit(fingerprint.pack(fingerprint.KIND_LIST, 1))
+    assert (key, offset) == ('crawl_status_bits:novel_list:list_page:0', 1)
+    key, offset = redis_status.completed_bit(fingerprint.pack(fingerprint.KIND_DETAIL, 100818))
+    assert key == f'crawl_status_bits:novel_detail:detail_page:{100818 >> 16}'
+    assert offset == 100818 - (1 << 16)
+
+
+def test_comment_pages_share_32_bit_slots():
+    book_id = 100007
+    shard, first = redis_status.completed_bit(comment_key(book_id, 1))
+    assert shard == f'crawl_status_bits:novel_comment:comment_page:{book_id >> 10}'
+    assert first == (book_id & 1023) * 32
+    for page in range(2, redis_status.COMMENT_SLOT_PAGES + 1):
+        assert redis_status.completed_bit(comment_key(book_id, page)) == (shard, first + page - 1)
+    # 同片中相邻的书紧接着上一本书的槽位
+    assert redis_status.completed_bit(comment_key(book_id + 1, 1)) == (shard, first + 32)
+
+
+@pytest.mark.parametrize('page', [0, redis_status.COMMENT_SLOT_PAGES + 1, 500])
+def test_comment_pages_outside_slot_go_to_overflow_set(page):
+    assert redis_status.completed_bit(comment_key(100007, page)) == (
+        'crawl_status_bits:novel_comment:comment_page:overflow:100007', None)
+
+
+def test_offsets_are_unique_within_a_shard():
+    seen = set()
+    for book_id in range(2048, 3072):
+        for page in (1, 17, 32):
+            seen.add(redis_status.completed_bit(comment_key(book_id, page)))
+    assert len(seen) == 1024 * 3
+    assert {key for key, _ in seen} == {'crawl_status_bits:novel_comment:comment_page:2'}
+    assert max(offset for _, offset in seen) == 1024 * 32 - 1
+
+
+def test_other_urls_have_no_bit():
+    assert redis_status.completed_bit(fingerprint.url_key('https://example.com/')) is None
+
+
+@pytest.fixture
+def client():
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+ROWS = [
+    ('novel_list', 'list_page', '3'),
+    ('novel_detail', 'detail_page', '100818'),
+    ('novel_comment', 'comment_page', '100007_1'),
+    ('novel_comment', 'comment_page', '100007_32'),
+    ('novel_comment', 'comment_page', '100007_40'),
+    ('novel_comment', 'comment_page', '100008_2'),
+    ('novel_comment', 'book_comments', '100007'),
+]
+
+
+def test_cache_completed_and_lookup(client):
+    assert redis_status.cache_completed(client, ROWS, batch_size=2) == 6
+    for row in ROWS[:-1]:
+        key = fingerprint.from_status_parts(*row)
+        assert redis_status.lookup(client, key, 'https://www.linovel.net/x') == (True, False)
+    missing = fingerprint.from_status_parts('novel_comment', 'comment_page', '100007_2')
+    assert redis_status.lookup(client, missing, 'https://www.linovel.net/x') == (False, False)
+    assert redis_status.completed_pages(client, 100007) == [1, 32, 40]
+    assert redis_status.completed_pages(client, 100008) == [2]
+    assert 0 < client.ttl('crawl_status_bits:novel_detail:detail_page:1') <= redis_status.COMPLETED_TTL
+
+
+def test_counters_follow_completions(client):
+    redis_status.cache_completed(client, ROWS)
+    redis_status.cache_completed(client, [('novel_detail', 'detail_page', '100818')])
+    redis_status.cache_url(client, 'https://www.linovel.net/book/1.html')
+    counts = redis_status.counters(client)
+    assert counts[('novel_list', 'list_page')] == 1
+    assert counts[('novel_detail', 'detail_page')] == 1
+    assert counts[('novel_comment', 'comment_page')] == 4
+    assert counts['url_cache'] == 1
+    assert redis_status.url_cached(client, 'https://www.linovel.net/book/1.html')
+
+
+def test_scan_batches_respects_limit(client):
+    for i in range(25):
+        client.set(f'url_cache:{i}', 1)
+    keys = [key for batch in redis_status.scan_batches(client, 'url_cache:*', batch_size=10, limit=12)
+            for key in batch]
+    assert len(keys) == 12
+
+
+def test_delete_matching(client):
+    redis_status.cache_completed(client, ROWS)
+    client.set('crawl_status:novel_detail:detail_page:1', 'completed')
+    client.set('unrelated', 1)
+    progress = []
+    deleted = redis_status.delete_matching(client, redis_status.KEY_PATTERNS, batch_size=2,
+                                           progress=progress.append)
+    assert deleted == progress[-1] > 0
+    assert client.keys('*') == ['unrelated']
+
+
+def test_clear_completed_by_book_range(client):
+    rows = [('novel_comment', 'comment_page', f'{book_id}_{page}')
+            for book_id in (1023, 1024, 1500, 2048) for page in (1, 33)]
+    rows.append(('novel_detail', 'detail_page', '1024'))
+    redis_status.cache_completed(client, rows)
+    deleted, cleared = redis_status.clear_completed(
+        client, spider_name='novel_comment', book_from=1024, book_to=2047)
+    # 1024~2047 恰好是评论页第1片：整片删除，两个溢出集合删除，不逐本清零
+    assert cleared == 0
+    assert deleted == 3
+    assert redis_status.completed_pages(client, 1023) == [1, 33]
+    assert redis_status.completed_pages(client, 1024) == []
+    assert redis_status.completed_pages(client, 1500) == []
+    assert redis_status.completed_pages(client, 2048) == [1, 33]
+    detail = fingerprint.from_status_parts('novel_detail', 'detail_page', '1024')
+    assert redis_status.lookup(client, detail, 'x')[0]
+
+
+def test_clear_completed_zeroes_partial_shards(client):
+    redis_status.cache_completed(client, [
+        ('novel_comment', 'comment_page', '100007_1'),
+        ('novel_comment', 'comment_page', '100008_1'),
+        ('novel_detail', 'detail_page', '100007'),
+        ('novel_detail', 'detail_page', '100008'),
+    ])
+    _, cleared = redis_status.clear_completed(client, book_from=100008, book_to=100008)
+    assert cleared == 2
+    assert redis_status.completed_pages(client, 100007) == [1]
+    assert redis_status.completed_pages(client, 100008) == []
+    key = lambda b: fingerprint.from_status_parts('novel_detail', 'detail_page', str(b))
+    assert redis_status.lookup(client, key(100007), 'x')[0]
+    assert not redis_status.lookup(client, key(100008), 'x')[0]
+
+
+def test_clear_completed_without_range_drops_selected_type(client):
+    redis_status.cache_completed(client, ROWS)
+    redis_status.clear_completed(client, status_type='comment_page')
+    assert redis_status.completed_pages(client, 100007) == []
+    counts = redis_status.counters(client)
+    assert counts[('novel_comment', 'comment_page')] == 0
+    assert counts[('novel_detail', 'detail_page')] == 1
@@ -0,0 +1,55 @@
+from linovel_crawler.row_cache import RowHashCache
+
+
+def test_unchanged_only_after_identical_write():
+    cache = RowHashCache()
+    row = ('100818', 'title', None)
+    assert not cache.unchanged('novels', '100818', row)
+    cache.remember('novels', '100818', row)
+    assert cache.unchanged('novels', '100818', row)
+    assert not cache.unchanged('novels', '100818', ('100818', 'new title', None))
+    # 同一主键在不同表中互不影响
+    assert not cache.unchanged('novel_volumes', '100818', row)
+
+
+def test_lru_eviction_keeps_recently_used_rows():
+    cache = RowHashCache(max_size=2)
+    cache.remember('t', 1, 'a')
+    cache.remember('t', 2, 'b')
+    assert cache.unchanged('t', 1, 'a')
+    cache.remember('t', 3, 'c')
+    assert len(cache) == 2
+    assert cache.unchanged('t', 1, 'a')
+    assert not cache.unchanged('t', 2, 'b')
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / 'cache' / 'rows.bin')
+    cache = RowHashCache(path=path)
+    cache.remember('novels', '1', ('1', 'x'))
+    cache.remember('novels', '2', ('2', 'y'))
+    cache.save()
+
+    reloaded = RowHashCache(path=path)
+    assert reloaded.unchanged('novels', '1', ('1', 'x'))
+    assert not reloaded.unchanged('novels', '2', ('2', 'changed'))
+
+
+def test_reload_keeps_newest_rows_when_shrinking(tmp_path):
+    path = str(tmp_path / 'rows.bin')
+    cache = RowHashCache(path=path)
+    for i in range(5):
+        cache.remember('t', i, i)
+    cache.save()
+
+    reloaded = RowHashCache(max_size=2, path=path)
+    assert reloaded.unchanged('t', 4, 4)
+    assert reloaded.unchanged('t', 3, 3)
+    assert not reloaded.unchanged('t', 0, 0)
+    assert len(reloaded) == 2
+
+
+def test_save_is_skipped_without_new_writes(tmp_path):
+    path = tmp_path / 'rows.bin'
+    RowHashCache(path=str(path)).save()
+    assert not path.exists()
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from scrapy.settings import Settings
+from scrapy.statscollectors import MemoryStatsCollector
+from twisted.internet import defer, task
+
+from linovel_crawler import sinks
+from linovel_crawler.items import CrawlStatusItem, NovelItem
+
+SPIDER = SimpleNamespace(name='novel_list', logger=logging.getLogger('test'))
+
+
+class RecordingSink(sinks.Sink):
+    def __init__(self, name, fail_open=False, fail_write=False, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.fail_open = fail_open
+        self.fail_write = fail_write
+        self.batches = []
+        self.closed = False
+
+    def open(self, spider):
+        if self.fail_open:
+            raise OSError('cannot open')
+
+    def write_batch(self, batch):
+        if self.fail_write:
+            raise OSError('disk full')
+        self.batches.append([data for _, data in batch])
+
+    def close(self, spider):
+        self.closed = True
+
+    @property
+    def written(self):
+        return [data for batch in self.batches for data in batch]
+
+
+class Threads:
+    """替代 twisted.internet.threads：默认同步执行，``hold`` 时挂起直到 ``release()``"""
+
+    def __init__(self):
+        self.hold = False
+        self.held = []
+
+    def deferToThread(self, func, *args):
+        if self.hold:
+            d = defer.Deferred()
+            self.held.append((d, func, args))
+            return d
+        return defer.maybeDeferred(func, *args)
+
+    def release(self):
+        self.hold = False
+        while self.held:
+            d, func, args = self.held.pop(0)
+            defer.maybeDeferred(func, *args).chainDeferred(d)
+
+
+@pytest.fixture
+def threads(monkeypatch):
+    threads = Threads()
+    monkeypatch.setattr(sinks, 'threads', threads)
+    return threads
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = task.Clock()
+
+    def looping_call(func):
+        call = task.LoopingCall(func)
+        call.clock = clock
+        return call
+
+    monkeypatch.setattr(sinks, 'task', SimpleNamespace(LoopingCall=looping_call))
+    return clock
+
+
+def open_pipeline(*sink_list):
+    pipeline = sinks.SinkFanoutPipeline(sink_list, MemoryStatsCollector(SimpleNamespace(settings=Settings())))
+    pipeline.open_spider(SPIDER)
+    return pipeline
+
+
+def novel(book_id):
+    return NovelItem(book_id=str(book_id), title='t')
+
+
+def test_failing_sink_does_not_affect_others(threads, clock):
+    good = RecordingSink('good', batch_size=2)
+    bad = RecordingSink('bad', fail_write=True, batch_size=2)
+    pipeline = open_pipeline(good, bad)
+    for book_id in range(4):
+        assert pipeline.process_item(novel(book_id), SPIDER) is not None
+    asyncio.run(pipeline.close_spider(SPIDER))
+
+    assert [data['book_id'] for data in good.written] == ['0', '1', '2', '3']
+    stats = pipeline.stats.get_stats()
+    assert stats['sinks/good/written'] == 4 and stats['sinks/good/errors'] == 0
+    assert stats['sinks/bad/written'] == 0 and stats['sinks/bad/errors'] == 2
+    assert bad.closed
+
+
+def test_sink_that_fails_to_open_is_disabled(threads, clock):
+    good = RecordingSink('good')
+    broken = RecordingSink('broken', fail_open=True)
+    pipeline = open_pipeline(good, broken)
+    assert [state.sink for state in pipeline.states] == [good]
+    pipeline.process_item(novel(1), SPIDER)
+    asyncio.run(pipeline.close_spider(SPIDER))
+    assert len(good.written) == 1 and not broken.closed
+
+
+def test_full_buffer_drops_while_a_batch_is_in_flight(threads, clock):
+    slow = RecordingSink('slow', batch_size=2, max_pending=3)
+    fast = RecordingSink('fast', batch_size=2)
+    pipeline = open_pipeline(slow, fast)
+    threads.hold = True
+    for book_id in range(6):
+        pipeline.process_item(novel(book_id), SPIDER)
+    slow_state, fast_state = pipeline.states
+    # 前两条在写，缓冲区满后第六条被丢弃；另一个 sink 不受影响
+    assert len(slow_state.buffer) == 3 and slow_state.dropped == 1
+    assert fast_state.dropped == 0
+
+    threads.release()
+    asyncio.run(pipeline.close_spider(SPIDER))
+    assert [data['book_id'] for data in slow.written] == ['0', '1', '2', '3', '4']
+    assert len(fast.written) == 6
+    assert pipeline.stats.get_value('sinks/slow/dropped') == 1
+
+
+def test_close_spider_flushes_remaining_buffer(threads, clock):
+    sink = RecordingSink('sink', batch_size=100)
+    pipeline = open_pipeline(sink)
+    for book_id in range(3):
+        pipeline.process_item(novel(book_id), SPIDER)
+    assert sink.batches == []
+    asyncio.run(pipeline.close_spider(SPIDER))
+    assert len(sink.written) == 3 and sink.closed
+
+
+def test_partial_batch_is_flushed_after_the_interval(threads, clock):
+    sink = RecordingSink('sink', batch_size=100, flush_interval=0)
+    pipeline = open_pipeline(sink)
+    pipeline.process_item(novel(1), SPIDER)
+    clock.advance(1.0)
+    assert len(sink.written) == 1
+    asyncio.run(pipeline.close_spider(SPIDER))
+
+
+def test_item_classes_filter(threads, clock):
+    sink = RecordingSink('status', item_classes=['linovel_crawler.items.CrawlStatusItem'])
+    pipeline = open_pipeline(sink)
+    pipeline.process_item(novel(1), SPIDER)
+    pipeline.process_item(CrawlStatusItem(spider_name='novel_list', status_type='list_page',
+                                          identifier='1', status='completed'), SPIDER)
+    asyncio.run(pipeline.close_spider(SPIDER))
+    assert [data['identifier'] for data in sink.written] == ['1']
@@ -0,0 +1,129 @@
+import sqlite3
+import time
+
+import pytest
+
+from linovel_crawler.storage import SQLiteBackend
+
+STATUS_COLUMNS = ('spider_name', 'status_type', 'identifier', 'status', 'retry_count')
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'db' / 'linovel.sqlite3'), commit_every=500, commit_interval=0.05)
+    backend.connect()
+    backend.create_tables()
+    yield backend
+    backend.close()
+
+
+def insert_status(backend, rows):
+    sql = backend.upsert_sql('crawl_status', STATUS_COLUMNS, {'status': 'replace'})
+    with backend.connection.cursor() as cursor:
+        cursor.executemany(sql, [(*row, 0) for row in rows])
+    backend.connection.commit()
+    backend.rebuild_status_summary()
+
+
+def summary(backend):
+    with backend.connection.cursor() as cursor:
+        cursor.execute("SELECT spider_name, status_type, status, row_count FROM crawl_status_summary")
+        return {tuple(row[:3]): row[3] for row in cursor.fetchall()}
+
+
+def test_idle_batch_is_committed_by_flush_due(backend):
+    with backend.connection.cursor() as cursor:
+        cursor.execute("INSERT INTO novels (book_id, title) VALUES (%s, %s)", ('1', 'a'))
+    backend.connection.commit()
+
+    other = sqlite3.connect(backend.path, timeout=0)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            other.execute("INSERT INTO novels (book_id, title) VALUES ('2', 'b')")
+        backend.flush_due()  # 尚未到提交间隔
+        with pytest.raises(sqlite3.OperationalError):
+            other.execute("INSERT INTO novels (book_id, title) VALUES ('2', 'b')")
+        time.sleep(backend.flush_interval)
+        backend.flush_due()
+        other.execute("INSERT INTO novels (book_id, title) VALUES ('2', 'b')")
+        other.commit()
+    finally:
+        other.close()
+
+
+def test_delete_crawl_status_by_book_range_keeps_summary_consistent(backend):
+    insert_status(backend, [
+        ('novel_list', 'list_page', '100', 'completed'),
+        ('novel_detail', 'detail_page', '100', 'completed'),
+        ('novel_detail', 'detail_page', '200', 'failed'),
+        ('novel_comment', 'comment_page', '100_1', 'completed'),
+        ('novel_comment', 'comment_page', '150_2', 'completed'),
+        ('novel_comment', 'comment_page', '1000_1', 'completed'),
+        ('novel_comment', 'book_comments', '100', 'completed'),
+    ])
+    progress = []
+    deleted = backend.delete_crawl_status(book_from=100, book_to=150, batch_size=2, progress=progress.append)
+    assert deleted == 4
+    assert progress == [2, 4]
+
+    with backend.connection.cursor() as cursor:
+        cursor.execute("SELECT spider_name, status_type, identifier FROM crawl_status ORDER BY id")
+        remaining = cursor.fetchall()
+    assert remaining == [
+        ('novel_list', 'list_page', '100'),
+        ('novel_detail', 'detail_page', '200'),
+        ('novel_comment', 'comment_page', '1000_1'),
+    ]
+    counts = summary(backend)
+    assert counts[('novel_detail', 'detail_page', 'completed')] == 0
+    assert counts[('novel_comment', 'comment_page', 'completed')] == 1
+    assert counts[('novel_list', 'list_page', 'completed')] == 1
+    backend.rebuild_status_summary()
+    assert {k: v for k, v in counts.items() if v} == summary(backend)
+
+
+def test_delete_crawl_status_by_spider_and_type(backend):
+    insert_status(backend, [
+        ('novel_comment', 'comment_page', '1_1', 'completed'),
+        ('novel_comment', 'book_comments', '1', 'completed'),
+        ('novel_detail', 'detail_page', '1', 'completed'),
+    ])
+    assert backend.delete_crawl_status(spider_name='novel_comment', status_type='book_comments') == 1
+    assert backend.delete_crawl_status(spider_name='novel_comment') == 1
+    assert summary(backend)[('novel_detail', 'detail_page', 'completed')] == 1
+
+
+def test_backends_in_one_process_share_the_connection(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    first = SQLiteBackend(path, commit_every=500, commit_interval=60)
+    second = SQLiteBackend(path, commit_every=500, commit_interval=60)
+    first.connect()
+    first.create_tables()
+    second.connect()
+    second.create_tables()
+    try:
+        assert first.connection is second.connection
+        for book_id, backend in enumerate((first, second, first, second)):
+            with backend.connection.cursor() as cursor:
+                cursor.execute("INSERT INTO novels (book_id, title) VALUES (%s, %s)", (str(book_id), 't'))
+            backend.connection.commit()  # 批量提交：写锁仍由共享连接持有，另一方不会阻塞
+
+        first.close()
+        with second.connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM novels")
+            assert cursor.fetchone()[0] == 4
+    finally:
+        second.close()
+
+    check = sqlite3.connect(path)
+    try:
+        assert check.execute("SELECT COUNT(*) FROM novels").fetchone()[0] == 4
+    finally:
+        check.close()
+
+    third = SQLiteBackend(path)
+    third.connect()  # 全部关闭后重新打开新连接
+    try:
+        assert third.connection._refs == 1
+    finally:
+        third.close()
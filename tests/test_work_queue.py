@@ -0,0 +1,142 @@
+import time
+
+import pytest
+
+from linovel_crawler.work_queue import CLAIMED, DONE, PENDING, SQLiteWorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = SQLiteWorkQueue(str(tmp_path / 'queue' / 'work.sqlite3'))
+    yield q
+    q.close()
+
+
+def states(queue, stage):
+    rows = queue.connection.execute(
+        "SELECT book_id, state, worker FROM tasks WHERE stage = ? ORDER BY book_id", (stage,)
+    ).fetchall()
+    return {book_id: (state, worker) for book_id, state, worker in rows}
+
+
+def test_put_is_idempotent_and_per_stage(queue):
+    queue.put(['detail', 'comment'], [1, 2])
+    queue.claim('detail', 'w1', 10)
+    queue.put(['detail', 'comment'], [2, 3])
+    assert queue.pending('detail') == 1
+    assert queue.pending('comment') == 3
+    assert states(queue, 'detail')['1'] == (CLAIMED, 'w1')
+
+
+def test_claim_hands_out_each_task_once(queue):
+    queue.put(['detail'], range(5))
+    first = queue.claim('detail', 'w1', 3)
+    second = queue.claim('detail', 'w2', 3)
+    assert len(first) == 3 and len(second) == 2
+    assert not set(first) & set(second)
+    assert queue.claim('detail', 'w3', 3) == []
+    assert queue.pending('detail') == 0
+
+
+def test_complete_only_marks_given_tasks_of_the_worker(queue):
+    queue.put(['detail'], [1, 2, 3])
+    claimed = queue.claim('detail', 'w1', 2)
+    queue.complete('detail', 'w2', claimed)
+    assert all(state == CLAIMED for state, _ in (states(queue, 'detail')[b] for b in claimed))
+    queue.complete('detail', 'w1', claimed[:1])
+    result = states(queue, 'detail')
+    assert result[claimed[0]][0] == DONE
+    assert result[claimed[1]][0] == CLAIMED
+    assert result['3'][0] == PENDING
+
+
+def test_release_returns_unfinished_claims(queue):
+    queue.put(['comment'], [1, 2, 3])
+    claimed = queue.claim('comment', 'w1', 3)
+    queue.complete('comment', 'w1', claimed[:1])
+    assert queue.release('comment', 'w1') == 2
+    result = states(queue, 'comment')
+    assert result[claimed[0]] == (DONE, 'w1')
+    assert result[claimed[1]] == (PENDING, None)
+    assert queue.release('comment', 'w1') == 0
+    assert sorted(queue.claim('comment', 'w2', 10)) == sorted(claimed[1:])
+
+
+def test_release_stale_only_touches_old_claims(queue):
+    queue.put(['detail'], [1, 2])
+    queue.claim('detail', 'w1', 1)
+    queue.connection.execute("UPDATE tasks SET claimed_at = ? WHERE state = ?", (time.time() - 100, CLAIMED))
+    queue.claim('detail', 'w2', 1)
+    assert queue.release_stale('detail', 50) == 1
+    assert queue.pending('detail') == 1
+    assert [w for s, w in states(queue, 'detail').values() if s == CLAIMED] == ['w2']
+
+
+def test_producers(queue):
+    assert queue.producers_finished()
+    queue.register_producer('novel_list')
+    assert not queue.producers_finished()
+    queue.finish_producer('novel_list')
+    assert queue.producers_finished()
+    queue.register_producer('novel_list')
+    assert not queue.producers_finished()
+
+
+def test_queue_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / 'work.sqlite3')
+    producer, consumer = SQLiteWorkQueue(path), SQLiteWorkQueue(path)
+    try:
+        producer.put(['detail'], [7])
+        assert consumer.claim('detail', 'w1', 5) == ['7']
+        assert producer.pending('detail') == 0
+    finally:
+        producer.close()
+        consumer.close()
+
+
+class _Engine:
+    slot = None
+
+
+class _Crawler:
+    def __init__(self, **settings):
+        from scrapy.settings import Settings
+
+        self.settings = Settings({'WORK_QUEUE_BATCH_SIZE': 2, **settings})
+        self.engine = _Engine()
+
+
+def test_iter_claimed_completes_taken_tasks_and_leaves_the_rest_for_release(queue):
+    import asyncio
+
+    from linovel_crawler.work_queue import iter_claimed
+
+    queue.put(['detail'], [1, 2, 3])
+
+    async def take(count):
+        gen = iter_claimed(_Crawler(), queue, 'detail', 'w1')
+        taken = [await gen.__anext__() for _ in range(count)]
+        await gen.aclose()
+        return taken
+
+    taken = asyncio.run(take(2))
+    result = states(queue, 'detail')
+    # 第一个已被取走并恢复执行，标记完成；第二个产出后生成器未再恢复，仍为已领取
+    assert result[taken[0]][0] == DONE
+    assert result[taken[1]][0] == CLAIMED
+    assert queue.release('detail', 'w1') == 1
+    assert queue.pending('detail') == 2
+
+
+def test_iter_claimed_drains_queue_once_producers_finish(queue):
+    import asyncio
+
+    from linovel_crawler.work_queue import iter_claimed
+
+    queue.put(['comment'], [1, 2, 3])
+
+    async def drain():
+        return [book_id async for book_id in iter_claimed(_Crawler(), queue, 'comment', 'w1')]
+
+    assert sorted(asyncio.run(drain())) == ['1', '2', '3']
+    assert {state for state, _ in states(queue, 'comment').values()} == {DONE}